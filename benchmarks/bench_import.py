@@ -0,0 +1,48 @@
+# Benchmarks for cold start of headless renders. Rendering (and each
+# render worker) shouldn't have to load the GUI toolkit, so importing
+# the render stack should be much cheaper than importing the UI.
+#
+# Usage: python benchmarks/bench_import.py [repeats]
+
+import sys
+import time
+import subprocess
+
+
+def time_import(module: str, repeats: int) -> float:
+    # Best time to start a fresh interpreter and import the module
+    best = float("inf")
+    for r in range(repeats):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-c", f"import {module}"], capture_output=True)
+        if result.returncode != 0:
+            return float("nan")  # Not importable here (e.g. Gtk isn't installed)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_imports(repeats: int):
+    baseline = time_import("sys", repeats)
+    for module in ["jackdaw.Rendering.Renderer", "jackdaw.Bounce", "jackdaw.UI"]:
+        t = time_import(module, repeats) - baseline
+        print(f"import {module}: {t * 1000:.1f} ms")
+
+
+def bench_worker_spawn(repeats: int):
+    # Time for a spawned worker to import the render stack
+    import multiprocessing as mp
+    ctx = mp.get_context("spawn")
+    best = float("inf")
+    for r in range(repeats):
+        start = time.perf_counter()
+        p = ctx.Process(target=__import__, args=("jackdaw.Rendering.Renderer",))
+        p.start()
+        p.join()
+        best = min(best, time.perf_counter() - start)
+    print(f"spawn worker importing jackdaw.Rendering.Renderer: {best * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    bench_imports(repeats)
+    bench_worker_spawn(repeats)
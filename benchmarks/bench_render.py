@@ -0,0 +1,193 @@
+# Benchmarks for rendering synthetic routing graphs through the Renderer,
+# with 1 up to N render workers. Each run happens in a fresh interpreter
+# (with an empty render cache), so that peak memory use and start-up costs
+# are measured for that run alone. Results are printed, and can be written
+# out as JSON to compare across commits.
+#
+# Usage: python benchmarks/bench_render.py [--workers N] [--seconds S] [--size N] [--json out.json]
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from typing import Dict, List
+
+
+##########
+# GRAPHS #
+##########
+
+def add_component(datatype: str) -> int:
+    from jackdaw.Data import data
+    from jackdaw.Data.ProjectData import RouterComponentDataWrapper
+    wrapper = RouterComponentDataWrapper()
+    wrapper.datatype.value = datatype
+    comp_id = data.router_components.get_unique_key()
+    data.router_components[comp_id] = wrapper
+    return comp_id
+
+
+def connect(from_id: int, from_node: str, to_id: int, to_node: str):
+    from jackdaw.Data import data
+    from jackdaw.Data.ProjectData import RouterRouteData
+    route = RouterRouteData()
+    route.from_component.value = from_id
+    route.from_node.value = from_node
+    route.to_component.value = to_id
+    route.to_node.value = to_node
+    data.routes.add(route)
+
+
+def chain_graph(size: int):
+    # A sine through a long chain of pass throughs
+    previous = add_component("SineSignalData")
+    for i in range(size):
+        component = add_component("PassThroughData")
+        connect(previous, "Out", component, "In")
+        previous = component
+    connect(previous, "Out", add_component("MasterOutputData"), "To Master")
+
+
+def fan_in_graph(size: int):
+    # Many sources mixed straight into the master output
+    master = add_component("MasterOutputData")
+    for i in range(size):
+        source = add_component("SineSignalData" if i % 2 == 0 else "SawtoothSignalData")
+        connect(source, "Out", master, "To Master")
+
+
+def tree_graph(size: int):
+    # A deep binary tree: each branch splits the stereo outputs of
+    # two subtrees into mono, and joins them back into stereo
+    def subtree(depth: int, leaf: int) -> int:
+        if depth == 0:
+            return add_component("SineSignalData" if leaf % 2 == 0 else "SawtoothSignalData")
+        join = add_component("MonoToStereoData")
+        for i, side in enumerate(["Left", "Right"]):
+            split = add_component("StereoToMonoData")
+            connect(subtree(depth - 1, 2 * leaf + i), "Out", split, "In")
+            connect(split, side, join, side)
+        return join
+
+    depth = max(1, (size // 3).bit_length())  # About size components in total
+    connect(subtree(depth, 0), "Out", add_component("MasterOutputData"), "To Master")
+
+
+GRAPHS = {
+    "chain": chain_graph,
+    "fan-in": fan_in_graph,
+    "tree": tree_graph,
+}
+
+
+#######
+# RUN #
+#######
+
+def peak_rss_mb(who: int) -> float:
+    rss = resource.getrusage(who).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / (1 << 10)  # Bytes on macOS, KB elsewhere
+
+
+def run(graph: str, size: int, workers: int, seconds: float) -> Dict:
+    # Render a graph with the given number of workers (in this process)
+    from jackdaw.Data import data
+    from jackdaw.Rendering.Renderer import Renderer
+    from jackdaw.Rendering.RenderQueue import RenderQueue
+    from jackdaw.Rendering.Playback import PlaybackEngine
+
+    os.chdir(tempfile.mkdtemp())  # Don't touch any ProjectData.json, or the real render cache
+    Renderer.CACHE_PATH = os.path.join(os.getcwd(), "render_cache.sqlite")
+    RenderQueue.WORKERS = workers
+    GRAPHS[graph](size)
+    components = len(data.router_components)
+
+    began = time.perf_counter()
+    renderer = Renderer.instance()
+    try:
+        started = time.perf_counter()
+        renderer.render_master(0, Renderer.CHUNK_SIZE)
+        first_chunk = time.perf_counter()
+        samples = int(seconds * PlaybackEngine.SAMPLE_RATE)
+        renderer.render_master(Renderer.CHUNK_SIZE, samples)
+        finished = time.perf_counter()
+    finally:
+        Renderer.clear_instance()
+
+    return {
+        "graph": graph,
+        "components": components,
+        "workers": workers,
+        "audio_seconds": seconds,
+        "startup_seconds": started - began,
+        "first_chunk_seconds": first_chunk - started,
+        "samples_per_second": samples / (finished - first_chunk),
+        "peak_rss_mb": peak_rss_mb(resource.RUSAGE_SELF),
+        "worker_peak_rss_mb": peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def run_in_subprocess(graph: str, size: int, workers: int, seconds: float) -> Dict:
+    result = subprocess.run([sys.executable, __file__, "--run", graph, "--size", str(size),
+                             "--workers", str(workers), "--seconds", str(seconds)],
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def worker_counts(max_workers: int) -> List[int]:
+    # 1, 2, 4, ... up to max_workers
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+if __name__ == "__main__":
+    import multiprocessing as mp
+
+    parser = argparse.ArgumentParser(description="Benchmark rendering of synthetic routing graphs.")
+    parser.add_argument("--workers", type=int, default=mp.cpu_count(), help="Largest number of workers to try")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Seconds of audio to render")
+    parser.add_argument("--size", type=int, default=64, help="Approximate number of components per graph")
+    parser.add_argument("--graphs", nargs="+", choices=list(GRAPHS), default=list(GRAPHS))
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--run", choices=list(GRAPHS), help=argparse.SUPPRESS)  # A single run
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run(args.run, args.size, args.workers, args.seconds)))
+        sys.exit(0)
+
+    results = []
+    for graph in args.graphs:
+        for workers in worker_counts(args.workers):
+            r = run_in_subprocess(graph, args.size, workers, args.seconds)
+            results.append(r)
+            print(f"{graph} ({r['components']} components, {workers} workers): "
+                  f"{r['samples_per_second'] / 1000:.1f} k samples/s, "
+                  f"first chunk {r['first_chunk_seconds'] * 1000:.1f} ms, "
+                  f"peak RSS {r['peak_rss_mb']:.0f} MB (workers {r['worker_peak_rss_mb']:.0f} MB)")
+
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump({
+                "commit": commit(),
+                "python": platform.python_version(),
+                "cpus": mp.cpu_count(),
+                "results": results,
+            }, f, indent=2)
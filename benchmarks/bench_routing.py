@@ -0,0 +1,109 @@
+# Benchmarks for route editing on large routing graphs.
+# Route edits happen in response to UI events, so should
+# stay interactive even with thousands of nodes.
+#
+# Usage: python benchmarks/bench_routing.py [components]
+
+import os
+import sys
+import time
+import tempfile
+from jackdaw.Rendering.Typedefs import Node, Route
+from jackdaw.Rendering.RoutingGraph import topological_order, RoutingGraph
+
+
+def chain_parents(components: int):
+    # A long chain of components, each with an input and an output node
+    parents = dict()
+    for i in range(components):
+        parents[Node(i, "In")] = {Node(i - 1, "Out")} if i > 0 else set()
+        parents[Node(i, "Out")] = {Node(i, "In")}
+    return parents
+
+
+def tree_parents(components: int, fan_in: int = 4):
+    # A tree of components, each mixing the outputs of fan_in others
+    parents = dict()
+    for i in range(components):
+        parents[Node(i, "In")] = {Node(c, "Out") for c in range(i * fan_in + 1, i * fan_in + 1 + fan_in)
+                                  if c < components}
+        parents[Node(i, "Out")] = {Node(i, "In")}
+    return parents
+
+
+def time_call(f, repeats: int = 5) -> float:
+    best = float("inf")
+    for r in range(repeats):
+        start = time.perf_counter()
+        f()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_render_order(components: int):
+    for name, parents in [("chain", chain_parents(components)), ("tree", tree_parents(components))]:
+        t = time_call(lambda: topological_order(parents))
+        print(f"render order ({name}, {len(parents)} nodes): {t * 1000:.2f} ms")
+
+
+def bench_graph_edits(components: int):
+    # Add and remove a single route in the middle of a long chain
+    graph = RoutingGraph()
+    for i in range(1, components):
+        graph.add_route(Route(Node(i - 1, "Out"), Node(i, "In")))
+    graph.downstream(Node(0, "Out"))
+
+    edits = 1000
+    middle = Route(Node(components // 2 - 1, "Out"), Node(components // 2, "In"))
+    start = time.perf_counter()
+    for e in range(edits):
+        graph.remove_route(middle)
+        graph.add_route(middle)
+    t = (time.perf_counter() - start) / (2 * edits)
+    print(f"routing graph edit ({2 * components} nodes): {t * 1e6:.2f} us per edit")
+
+
+def bench_recalculate_routes(components: int):
+    from jackdaw.Data import data
+    from jackdaw.Data.ProjectData import RouterComponentDataWrapper, RouterRouteData
+    from jackdaw.Rendering.Renderer import Renderer
+
+    def route(from_id: int, to_id: int) -> RouterRouteData:
+        r = RouterRouteData()
+        r.from_component.value = from_id
+        r.from_node.value = "Out"
+        r.to_component.value = to_id
+        r.to_node.value = "In"
+        return r
+
+    for i in range(components):
+        wrapper = RouterComponentDataWrapper()
+        wrapper.datatype.value = "PassThroughData"
+        data.router_components[i] = wrapper
+    for i in range(1, components):
+        data.routes.add(route(i - 1, i))
+
+    renderer = Renderer.instance()
+    try:
+        edits = 20
+        start = time.perf_counter()
+        for e in range(edits):
+            # Alternately re-route the middle and the head of the chain
+            r = route(components // 2 - 1, components // 2) if e % 2 == 0 else route(0, 1)
+            existing = [x for x in data.routes
+                        if (x.from_component.value, x.to_component.value) ==
+                        (r.from_component.value, r.to_component.value)]
+            data.routes.remove(existing)
+            data.routes.add(r)
+        t = (time.perf_counter() - start) / (2 * edits)
+        print(f"recalculate routes ({2 * components} nodes): {t * 1000:.2f} ms per edit")
+    finally:
+        Renderer.clear_instance()
+
+
+if __name__ == "__main__":
+    components = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    os.chdir(tempfile.mkdtemp())  # Don't touch any ProjectData.json in the working directory
+    bench_render_order(components)
+    bench_graph_edits(components)
+    bench_recalculate_routes(components)
@@ -0,0 +1,72 @@
+# Benchmark of the VoiceEngine: the cost of rendering a chunk with 1 up to
+# VoiceEngine.VOICES voices sounding at once, and so the cost of each
+# additional voice. For comparison, the same chunks are also rendered note
+# by note, with an Oscillator per note.
+#
+# Usage: python benchmarks/bench_voices.py [--chunk N] [--repeats N]
+
+import time
+import argparse
+import numpy as np
+from typing import Callable, Dict
+
+
+def best_time(render: Callable[[], object], repeats: int) -> float:
+    # Best of several runs, in seconds per call
+    best = float("inf")
+    for _ in range(5):
+        began = time.perf_counter()
+        for _ in range(repeats):
+            render()
+        best = min(best, (time.perf_counter() - began) / repeats)
+    return best
+
+
+def run(chunk: int, repeats: int) -> Dict[int, Dict[str, float]]:
+    from jackdaw.Rendering.VoiceEngine import VoiceEngine
+    from jackdaw.Rendering.Wavetable import Oscillator
+
+    rng = np.random.default_rng(0)
+    engine = VoiceEngine("sine")
+    oscillator = Oscillator("sine")
+    start = 100000
+
+    results: Dict[int, Dict[str, float]] = dict()
+    for voices in range(1, VoiceEngine.VOICES + 1):
+        # Chords, held down over the chunk
+        starts = np.sort(rng.integers(start - 20000, start, voices))
+        ends = starts + 40000
+        stops = ends + VoiceEngine.RELEASE
+        frequencies = rng.uniform(55.0, 1760.0, voices)
+        notes = (starts, ends, stops, frequencies)
+
+        def note_by_note():
+            result = np.zeros(chunk, dtype=np.float32)
+            for note_start, frequency in zip(starts, frequencies):
+                oscillator.seek(frequency, start - int(note_start))
+                result += oscillator.render(frequency, chunk) - 0.5
+            return result
+
+        results[voices] = {
+            "voice_engine": best_time(lambda: engine.render(start, chunk, notes), repeats),
+            "note_by_note": best_time(note_by_note, repeats),
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the cost per voice of the VoiceEngine.")
+    parser.add_argument("--chunk", type=int, default=256, help="Samples per chunk")
+    parser.add_argument("--repeats", type=int, default=200, help="Chunks rendered per timing")
+    args = parser.parse_args()
+
+    results = run(args.chunk, args.repeats)
+    for voices in results:
+        r = results[voices]
+        print(f"{voices:3d} voices: {r['voice_engine'] * 1e6:7.1f} us/chunk "
+              f"(note by note {r['note_by_note'] * 1e6:7.1f} us/chunk)")
+
+    counts = np.array(list(results))
+    for name in ["voice_engine", "note_by_note"]:
+        slope, intercept = np.polyfit(counts, [results[v][name] for v in results], 1)
+        print(f"{name}: {intercept * 1e6:.1f} us/chunk + {slope * 1e6:.2f} us per voice")
@@ -22,5 +22,6 @@ setuptools.setup(
     ],
     package_dir={"": "src"},
     packages=setuptools.find_packages(where="src"),
-    python_requires=">=3.6",
+    python_requires=">=3.8",
+    extras_require={"audio": ["sounddevice"]},  # For playing audio (see Rendering.Playback.DeviceSink)
 )
@@ -0,0 +1,31 @@
+import os
+import argparse
+from jackdaw.Data.ProjectData import ProjectData
+from jackdaw.Rendering.Bounce import bounce
+from jackdaw.Rendering.Playback import WavSink, PlaybackEngine
+
+
+def bounce_project(project: str, output: str, start: float, end: float, sample_format: str):
+    # Open the project (so that the files it refers to are found next to it, wherever we're run from)
+    if not os.path.isfile(project):
+        raise Exception(f"No project file at \"{project}\"")
+    ProjectData.clear_instance()
+    ProjectData.FILENAME = os.path.abspath(project)
+    ProjectData.instance()
+
+    rate = PlaybackEngine.SAMPLE_RATE
+    stats = bounce(WavSink(output, sample_format), int(round(start * rate)), int(round(end * rate)))
+    print(f"Rendered {stats.audio_seconds:.2f} s of audio in {stats.seconds:.2f} s "
+          f"({stats.speed:.1f} x real time)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the master output of a project to a WAV file.")
+    parser.add_argument("project", help="The project file (e.g. ProjectData.json)")
+    parser.add_argument("output", help="The WAV file to write")
+    parser.add_argument("--start", type=float, default=0.0, help="Start time, in seconds")
+    parser.add_argument("--end", type=float, required=True, help="End time, in seconds")
+    parser.add_argument("--format", choices=list(WavSink.FORMATS), default="pcm16",
+                        help="Sample format of the WAV file")
+    args = parser.parse_args()
+    bounce_project(args.project, args.output, args.start, args.end, args.format)
@@ -0,0 +1,16 @@
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+
+
+class MasterOutputData(RouterComponentData):
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.MasterOutput import MasterOutput
+        return MasterOutput(id)
+
+    def create_component_renderer(self):
+        return MasterOutputRenderer()
+
+
+class MasterOutputRenderer(ComponentRenderer):
+    pass
@@ -0,0 +1,35 @@
+import numpy as np
+from typing import Dict
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Signal import Signal
+
+
+class MonoToStereoRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.TIME_INVARIANT
+    routing = {"Out": (("Left", 0), ("Right", 0))}
+
+    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
+        result = Signal()
+        if "Left" in inputs:
+            result[0] = inputs["Left"][0]
+        else:
+            result[0] = np.zeros(samples)
+
+        if "Right" in inputs:
+            result[1] = inputs["Right"][0]
+        else:
+            result[1] = np.zeros(samples)
+
+        return result
+
+
+class MonoToStereoData(RouterComponentData):
+
+    def create_component_renderer(self):
+        return MonoToStereoRenderer()
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.MonoToStereo import MonoToStereo
+        return MonoToStereo(id)
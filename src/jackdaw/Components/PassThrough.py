@@ -0,0 +1,25 @@
+from typing import Dict
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Signal import Signal
+
+
+class PassThroughData(RouterComponentData):
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.PassThrough import PassThrough
+        return PassThrough(id)
+
+    def create_component_renderer(self):
+        return PassThroughRenderer()
+
+
+class PassThroughRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.TIME_INVARIANT
+    routing = {"Out": "In"}
+
+    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
+        if "In" in inputs:
+            return inputs["In"]
+        return Signal()
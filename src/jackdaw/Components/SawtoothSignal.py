@@ -0,0 +1,34 @@
+from typing import Dict
+from jackdaw.Data.DataObjects import RawDataObject
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Wavetable import Oscillator
+
+
+class SawtoothSignalData(RouterComponentData):
+
+    def __init__(self):
+        super().__init__()
+        self.frequency = RawDataObject(440.0)
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.SawtoothSignal import SawtoothSignal
+        return SawtoothSignal(id)
+
+    def create_component_renderer(self):
+        return SawtoothSignalRenderer(self.frequency.value)
+
+
+class SawtoothSignalRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.STATELESS
+
+    def __init__(self, frequency: float = 440.0):
+        self.frequency = frequency
+        self._oscillator = Oscillator("sawtooth", self.sample_rate)
+
+    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
+        # Render a sawtooth signal (starting from the phase it has at the start sample)
+        self._oscillator.seek(self.frequency, start)
+        return Signal.wrap(self._oscillator.render(self.frequency, samples)[None, :], [0])
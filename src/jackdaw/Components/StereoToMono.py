@@ -0,0 +1,31 @@
+from typing import Dict
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Signal import Signal
+
+
+class StereoToMonoRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.TIME_INVARIANT
+    routing = {"Left": (("In", 0),), "Right": (("In", 1),)}
+
+    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
+        result = Signal()
+        if "In" not in inputs:
+            return result
+
+        if output_node == "Left":
+            result[0] = inputs["In"][0]
+        elif output_node == "Right":
+            result[0] = inputs["In"][1]
+        return result
+
+
+class StereoToMonoData(RouterComponentData):
+
+    def create_component_renderer(self):
+        return StereoToMonoRenderer()
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.StereoToMono import StereoToMono
+        return StereoToMono(id)
@@ -0,0 +1,82 @@
+import numpy as np
+from typing import Dict, List, Tuple, Union
+from jackdaw.Data.DataObjects import *
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.NoteIndex import NoteEvents, note_index
+from jackdaw.Rendering.AudioFiles import DecodedAudio, read_audio
+from jackdaw.Rendering.Timeline import track_audio
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+
+
+class TrackSignalData(RouterComponentData):
+
+    def __init__(self):
+        super().__init__()
+        self.track = RawDataObject(0)
+        self._notes = ""  # Key of the notes to render (set when created from render parameters)
+        self._audio: List[Tuple[int, DecodedAudio]] = []  # Audio clips to play (likewise)
+
+    def create_component(self, id: int):
+        from jackdaw.UI.RouterComponents.TrackSignal import TrackSignal
+        return TrackSignal(id)
+
+    def create_component_renderer(self):
+        return TrackSignalRenderer(self._notes, self._audio)
+
+    def render_parameters(self) -> dict:
+        # What is rendered also depends on the notes and audio clips placed on the track
+        parameters = super().render_parameters()
+        parameters["notes"] = note_index().key(self.track.value)
+        parameters["audio"] = [[start, *audio] for start, audio in track_audio(self.track.value)]
+        return parameters
+
+    def deserialize(self, data: dict) -> None:
+        data = dict(data)
+        self._notes = data.pop("notes", "")
+        self._audio = [(clip[0], DecodedAudio(*clip[1:])) for clip in data.pop("audio", [])]
+        super().deserialize(data)
+
+
+# Plays the notes of a track (as sine waves, on a VoiceEngine), finding
+# the notes that sound during each chunk through the track's NoteEvents,
+# so the cost of a chunk only depends on how many notes it contains.
+# Each note starts exactly on its first sample. The audio clips of the
+# track are mixed in channel by channel, decoded straight from their
+# files, so only the part of a file under a chunk is touched.
+# Chunks with nothing sounding in them come out silent, for nothing.
+class TrackSignalRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.STATELESS
+
+    def __init__(self, notes: str = "", audio: List[Tuple[int, DecodedAudio]] = None):
+        self._key = notes
+        self._notes: Union[NoteEvents, None] = None
+        self._voices = VoiceEngine("sine", self.sample_rate)
+        self._audio = audio or []
+
+    def prepare(self) -> None:
+        if self._key != "":
+            self._notes = NoteEvents(NoteEvents.block_name(self._key))
+
+    def release(self) -> None:
+        if self._notes is not None:
+            self._notes.close()
+            self._notes = None
+
+    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
+        end = start + samples
+        notes = self._notes.query(start, end) if self._notes is not None else None
+        playing = [(s, audio) for s, audio in self._audio if s < end and s + audio.frames > start]
+        if len(playing) == 0 and (notes is None or len(notes[0]) == 0):
+            return Signal.silence(samples)  # Nothing sounding
+
+        channels = max([1] + [audio.channels for _, audio in playing])
+        result = np.zeros((channels, samples), dtype=Signal.DTYPE)
+        if notes is not None:
+            result[0] = self._voices.render(start, samples, notes)
+        for s, audio in playing:
+            first, last = max(start, s), min(end, s + audio.frames)
+            result[0: audio.channels, first - start: last - start] += read_audio(audio, first - s, last - s)
+        return Signal.wrap(result, range(channels))
@@ -0,0 +1,9 @@
+import os
+import importlib
+
+# Import all component data types (and their renderers). None of
+# these depend on Gtk, the widgets live in jackdaw.UI.RouterComponents
+for f in os.listdir(os.path.dirname(__file__)):
+    if f.endswith(".py") and "__" not in f:
+        module = f"jackdaw.Components.{f.replace('.py', '')}"
+        importlib.import_module(module)
@@ -34,13 +34,21 @@ class HasOnChangeListeners:
         """
         self._on_change_listeners.append(listener)
 
+    def remove_on_change_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Remove a listener that was previously added.
+        :param listener: The listener to remove.
+        :return: None
+        """
+        self._on_change_listeners.remove(listener)
+
     def invoke_on_change_listeners(self) -> None:
         """
         Call all of the currently-registered
         "on change" listeners.
         :return: None
         """
-        for listener in self._on_change_listeners:
+        for listener in list(self._on_change_listeners):
             listener()
 
 
@@ -1,4 +1,5 @@
 import os
+from typing import List
 from jackdaw.Data.DataObjects import *
 from jackdaw.Utils.Singleton import Singleton
 
@@ -19,13 +20,19 @@ class MidiClipData(DataObject):
         self.notes = DataObjectSet(MidiNoteData)
 
 
+class AudioClipData(DataObject):
+
+    def __init__(self):
+        self.file = RawDataObject("")  # A WAV file, relative to the directory of the project file
+
+
 class PlaylistClipData(DataObject):
 
     def __init__(self):
-        self.clip = RawDataObject(0)
+        self.clip = RawDataObject(0)  # Key of the clip in midi_clips or audio_clips (depending on the type)
         self.track = RawDataObject(0)
         self.beat = RawDataObject(0.0)
-        self.type = RawDataObject("MIDI")
+        self.type = RawDataObject("MIDI")  # "MIDI" or "Audio"
 
 
 class RouterComponentData(DataObject):
@@ -41,6 +48,28 @@ class RouterComponentData(DataObject):
         raise Exception(f"Tried to create a router component renderer from "
                         f"uninitialized data of type \"{self.__class__.__name__}\"!")
 
+    # Parameters that don't affect what the component renders
+    NON_RENDER_PARAMETERS = {"position"}
+
+    def render_parameters(self) -> dict:
+        """
+        :return: The serialization of the parameters that affect rendering.
+        """
+        serialized = self.serialize()
+        return {k: serialized[k] for k in serialized if k not in self.NON_RENDER_PARAMETERS}
+
+    def render_parameter_objects(self) -> List[HasOnChangeListeners]:
+        """
+        :return: The data objects holding parameters that affect rendering,
+                 for listening to changes of those parameters.
+        """
+        objects = []
+        for attr_name in dir(self):
+            attr = getattr(self, attr_name)
+            if attr_name not in self.NON_RENDER_PARAMETERS and isinstance(attr, HasOnChangeListeners):
+                objects.append(attr)
+        return objects
+
     @classmethod
     def diaply_name(cls):
         return cls.__name__.replace("Data", "")
@@ -78,6 +107,15 @@ class RouterRouteData(DataObject):
         self.to_node = RawDataObject("Unknown node")
 
 
+class FrozenNodeData(DataObject):
+
+    def __init__(self):
+        self.component = RawDataObject(-1)
+        self.node = RawDataObject("Unknown node")
+        self.file = RawDataObject("")  # Relative to the directory of the project file
+        self.channels = RawDataObject(0)
+
+
 class ProjectData(Singleton, DataObject):
 
     def __init__(self):
@@ -86,9 +124,11 @@ class ProjectData(Singleton, DataObject):
 
         # Setup data components
         self.midi_clips = DataObjectDict(int, MidiClipData)
+        self.audio_clips = DataObjectDict(int, AudioClipData)
         self.playlist_clips = DataObjectSet(PlaylistClipData)
         self.router_components = DataObjectDict(int, RouterComponentDataWrapper)
         self.routes = DataObjectSet(RouterRouteData)
+        self.frozen_nodes = DataObjectSet(FrozenNodeData)
 
         self.load()
 
@@ -107,12 +147,19 @@ class ProjectData(Singleton, DataObject):
 
     def empty_project_assertions(self):
         assert len(self.midi_clips) == 0
+        assert len(self.audio_clips) == 0
         assert len(self.playlist_clips) == 0
         assert len(self.router_components) == 0
         assert len(self.routes) == 0
+        assert len(self.frozen_nodes) == 0
 
     ################
     # STATIC STUFF #
     ################
 
     FILENAME = "ProjectData.json"
+
+    @staticmethod
+    def path(file: str) -> str:
+        # Files that the project refers to are relative to the project file
+        return os.path.join(os.path.dirname(os.path.abspath(ProjectData.FILENAME)), file)
@@ -3,13 +3,17 @@ from jackdaw.Gi import Gtk, add_timeout
 from jackdaw.TimeControl import TimeControl
 from jackdaw.Session import call_session_close_methods
 from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Playback import PlaybackEngine, output_sink
 
 
 def start_main_loop():
     ControlPanel.instance()
     Renderer.instance()
+    playback = PlaybackEngine(output_sink())
+    playback.start()
     add_timeout(TimeControl.update, 16, repeats=0)
     Gtk.main()
+    playback.stop()
     call_session_close_methods()
 
 
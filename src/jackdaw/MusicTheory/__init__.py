@@ -1 +1,20 @@
 NOTES = ["C", "C#", "D", "D#", "E", "F", "F#", "G", "G#", "A", "A#", "B"]
+
+
+def note_number(name: str) -> int:
+    """
+    :param name: A note name, such as "C3" or "F#4".
+    :return: The number of semitones from C0 up to the note.
+    """
+    note, octave = name.rstrip("0123456789"), name.lstrip("ABCDEFG#")
+    if note not in NOTES or octave == "":
+        raise Exception(f"Unknown note \"{name}\"")
+    return int(octave) * 12 + NOTES.index(note)
+
+
+def note_frequency(name: str) -> float:
+    """
+    :param name: A note name, such as "C3" or "F#4".
+    :return: The frequency of the note in Hz (equal temperament, with A4 at 440 Hz).
+    """
+    return 440.0 * 2.0 ** ((note_number(name) - note_number("A4")) / 12)
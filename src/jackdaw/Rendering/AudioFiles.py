@@ -0,0 +1,185 @@
+import os
+import struct
+import hashlib
+import numpy as np
+from typing import Dict, NamedTuple, Tuple, Union
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Playback import PlaybackEngine
+
+
+# The sample data of a WAV file, read in place through a memory map, so
+# that only the pages of the file that are actually read are ever loaded
+# (and only the samples that are asked for are converted to float32).
+# Integer PCM (8, 16, 24 or 32 bit) and float (32 or 64 bit) samples are
+# supported, including in WAVE_FORMAT_EXTENSIBLE files.
+class WavFile:
+
+    PCM = 1
+    FLOAT = 3
+    EXTENSIBLE = 0xFFFE
+
+    def __init__(self, path: str):
+        """
+        Read the header of a WAV file.
+        :param path: The file.
+        """
+        self.path = path
+        self._raw: Union[np.ndarray, None] = None  # The sample data, as (samples, bytes per sample), once mapped
+        size = os.path.getsize(path)
+        with open(path, "rb") as f:
+            riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+            if riff != b"RIFF" or wave != b"WAVE":
+                raise Exception(f"\"{path}\" is not a WAV file")
+
+            # Walk the chunks up to the sample data, which must come after the format
+            fmt = None
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise Exception(f"WAV file \"{path}\" has no sample data")
+                chunk_id, chunk_size = struct.unpack("<4sI", header)
+                if chunk_id == b"fmt ":
+                    fmt = f.read(chunk_size)
+                    f.seek(chunk_size % 2, os.SEEK_CUR)
+                elif chunk_id == b"data":
+                    self.offset = f.tell()
+                    break
+                else:
+                    f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+        if fmt is None or len(fmt) < 16:
+            raise Exception(f"WAV file \"{path}\" has no format before its sample data")
+        tag, self.channels, self.sample_rate, _, block_align, self.bits = struct.unpack("<HHIIHH", fmt[:16])
+        if tag == WavFile.EXTENSIBLE and len(fmt) >= 26:
+            tag = struct.unpack("<H", fmt[24:26])[0]  # The first two bytes of the sub format GUID
+        self.is_float = tag == WavFile.FLOAT
+        if tag not in (WavFile.PCM, WavFile.FLOAT) or (self.bits not in (8, 16, 24, 32) if tag == WavFile.PCM
+                                                       else self.bits not in (32, 64)):
+            raise Exception(f"Unsupported WAV format in \"{path}\" (format {tag}, {self.bits} bits)")
+        if self.channels == 0 or block_align != self.channels * self.bits // 8:
+            raise Exception(f"Unsupported WAV layout in \"{path}\" "
+                            f"({self.channels} channels, {block_align} bytes per frame)")
+
+        # (Recorders that are cut off leave the size of the data unset, so it is whatever is in the file)
+        self.frames = (size - self.offset) // block_align
+        if chunk_size not in (0, 0xFFFFFFFF):
+            self.frames = min(self.frames, chunk_size // block_align)
+
+    def decode(self, start: int, end: int) -> np.ndarray:
+        """
+        :param start: The first frame.
+        :param end: The frame to stop at.
+        :return: The frames, as a (frames, channels) float32 array ranging from -1 to 1.
+        """
+        width = self.bits // 8
+        if self._raw is None:
+            self._raw = np.memmap(self.path, dtype=np.uint8, mode="r", offset=self.offset,
+                                  shape=(self.frames * self.channels, width))
+        raw = self._raw[start * self.channels: end * self.channels]
+        if self.is_float:
+            samples = raw.view("<f4" if self.bits == 32 else "<f8")[:, 0].astype(Signal.DTYPE)
+        elif self.bits == 8:
+            samples = (raw[:, 0].astype(Signal.DTYPE) - 128) / 128
+        elif self.bits == 24:
+            # Shift the three bytes into the top of an int32, keeping the sign
+            joined = (raw[:, 0].astype(np.int32) << 8) | (raw[:, 1].astype(np.int32) << 16) | \
+                     (raw[:, 2].astype(np.int32) << 24)
+            samples = joined.astype(Signal.DTYPE) / 2 ** 31
+        else:
+            samples = raw.view(f"<i{width}")[:, 0].astype(Signal.DTYPE) / 2 ** (self.bits - 1)
+        return samples.astype(Signal.DTYPE, copy=False).reshape(end - start, self.channels)
+
+
+# How to play an audio file at the project sample rate: the file, how
+# many frames it lasts (at the project rate), and the rate of the file
+# itself. The key identifies the audio file, and changes whenever it does.
+class DecodedAudio(NamedTuple):
+    path: str
+    frames: int
+    channels: int
+    file_rate: int
+    sample_rate: int
+    key: str
+
+
+# The audio files that clips play, as seen by this process. Opening a file
+# only reads its header: nothing is decoded up front. The render workers
+# map each file in place, and convert (and resample) only the samples
+# under the chunk that they are rendering (see read_audio), so a clip of
+# any length and format costs nothing to add, and plays straight away.
+# Files are identified by their path, size and modification time.
+class AudioCache:
+
+    def __init__(self, sample_rate: int = PlaybackEngine.SAMPLE_RATE):
+        self._sample_rate = sample_rate
+        self._decoded: Dict[Tuple[str, int, int], Union[DecodedAudio, None]] = dict()
+
+    def decoded(self, path: str) -> Union[DecodedAudio, None]:
+        """
+        :param path: An audio file.
+        :return: How to play the file. None if the file can't be read.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        identity = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if identity not in self._decoded:
+            try:
+                self._decoded[identity] = self._open(identity)
+            except Exception:
+                self._decoded[identity] = None
+        return self._decoded[identity]
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _open(self, identity: Tuple[str, int, int]) -> DecodedAudio:
+        key = hashlib.sha1(repr((identity, self._sample_rate)).encode()).hexdigest()
+        wav = WavFile(identity[0])
+        return DecodedAudio(wav.path, wav.frames * self._sample_rate // wav.sample_rate, wav.channels,
+                            wav.sample_rate, self._sample_rate, key)
+
+
+_opened: Dict[Tuple[str, str], WavFile] = dict()  # Audio files opened by this process
+
+
+def read_audio(audio: DecodedAudio, start: int, end: int) -> np.ndarray:
+    """
+    Decode part of an audio file, resampling it (linearly) to the project rate if need be.
+    :param audio: An audio file.
+    :param start: The first frame to read (at the project rate).
+    :param end: The frame to stop at (no further than the last frame).
+    :return: The frames, as a (channels, frames) float32 array.
+    """
+    if (audio.path, audio.key) not in _opened:
+        _opened[(audio.path, audio.key)] = WavFile(audio.path)
+    wav = _opened[(audio.path, audio.key)]
+    if end <= start:
+        return np.zeros((audio.channels, 0), dtype=Signal.DTYPE)
+    if audio.file_rate == audio.sample_rate:
+        return wav.decode(start, end).T
+
+    # (From the source frames around the ones asked for)
+    positions = np.arange(start, end) * (audio.file_rate / audio.sample_rate)
+    first = int(positions[0])
+    last = min(int(positions[-1]) + 2, wav.frames)
+    source = wav.decode(first, last)
+    resampled = np.empty((audio.channels, end - start), dtype=Signal.DTYPE)
+    for c in range(audio.channels):
+        resampled[c] = np.interp(positions - first, np.arange(last - first), source[:, c])
+    return resampled
+
+
+_cache: Union[AudioCache, None] = None
+
+
+def audio_cache() -> AudioCache:
+    """
+    :return: The audio cache of this process, creating it if need be.
+    """
+    global _cache
+    if _cache is None:
+        _cache = AudioCache()
+    return _cache
@@ -0,0 +1,124 @@
+import time
+import numpy as np
+from typing import Dict, Iterable
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import *
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.RoutingGraph import RoutingGraph
+from jackdaw.Rendering.RendererCache import RendererCache
+from jackdaw.Rendering.RenderPlan import compile_plans
+from jackdaw.Rendering.Scheduler import RenderScheduler
+from jackdaw.Rendering.NoteIndex import note_index
+from jackdaw.Rendering.Playback import AudioSink, PlaybackEngine
+
+
+# Stores only the most recently rendered chunk of each node, in a buffer
+# that is reused from one chunk to the next. Stands in for the ResultStore
+# when chunks are rendered one after another in a single process.
+class LatestChunkStore:
+
+    def __init__(self, chunk_size: int):
+        self._chunk_size = chunk_size
+        self._signals: Dict[Node, Signal] = dict()
+        self._chunks: Dict[Node, Chunk] = dict()
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    def read(self, node: Node, chunk: Chunk) -> Signal:
+        if self._chunks.get(node) != chunk:
+            raise KeyError(f"Chunk {chunk} of node {node} has not been rendered")
+        return self._signals[node]
+
+    def write(self, node: Node, chunk: Chunk, signal: Signal):
+        buffer = self._buffer(node, chunk)
+        for channel in signal:
+            buffer[channel] = signal[channel]
+
+    def mix(self, node: Node, chunk: Chunk, signals: Iterable[Signal]) -> Signal:
+        return Signal.mix_into(self._buffer(node, chunk), signals)
+
+    def _buffer(self, node: Node, chunk: Chunk) -> Signal:
+        # The (emptied) buffer for the given node
+        buffer = self._signals.setdefault(node, Signal(self._chunk_size))
+        for channel in list(buffer):
+            buffer[channel] = None
+        self._chunks[node] = chunk
+        return buffer
+
+
+class BounceStats:
+
+    def __init__(self, samples: int, seconds: float):
+        """
+        How a bounce went.
+        :param samples: The number of samples written.
+        :param seconds: How long (in wall-clock seconds) it took.
+        """
+        self.samples = samples
+        self.seconds = seconds
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.samples / PlaybackEngine.SAMPLE_RATE
+
+    @property
+    def speed(self) -> float:
+        # Render speed, as a multiple of real time
+        return self.audio_seconds / max(self.seconds, 1e-9)
+
+
+def bounce(sink: AudioSink, start: int, end: int) -> BounceStats:
+    """
+    Render the master output of the current project, from sample start up to
+    (but not including) sample end, streaming it to the sink a chunk at a time.
+    Only the latest chunk of each node is kept, so memory use doesn't depend on
+    the length of the bounce. Chunks are rendered in order, in this process.
+    :param sink: Where to send the master output.
+    :param start: The first sample to render.
+    :param end: The sample to stop rendering at.
+    :return: Statistics about the bounce.
+    """
+    note_index().update()  # In case the notes have been edited with no Renderer listening
+    graph = RoutingGraph()
+    graph.update(Renderer.routes_from_data())
+    master_nodes = Renderer.find_master_nodes(graph.routes)
+    full_order = graph.render_order()
+
+    # (Only the nodes that the master output depends on are left to render)
+    order, _, specs = compile_plans(full_order, graph.parents,
+                                    Renderer.node_specs(graph, full_order), master_nodes)
+
+    chunk_size = Renderer.CHUNK_SIZE
+    store = LatestChunkStore(chunk_size)
+    renderers = RendererCache()
+    master = Signal(chunk_size)
+    frames = np.zeros((PlaybackEngine.CHANNELS, chunk_size), dtype=Signal.DTYPE)
+
+    began = time.perf_counter()
+    sink.open(PlaybackEngine.SAMPLE_RATE, PlaybackEngine.CHANNELS)
+    try:
+        for chunk in range(start // chunk_size, (end - 1) // chunk_size + 1):
+            for node in order:
+                if RenderScheduler.keeps_silence(specs[node]) and \
+                        all(store.read(p, chunk).silent for p in specs[node].parents):
+                    store.write(node, chunk, Signal.silence(chunk_size))  # Nothing to render
+                    continue
+                Renderer.render_node(RenderTask(node, chunk, 0, specs[node]), store, renderers)
+
+            for channel in list(master):
+                master[channel] = None
+            Signal.mix_into(master, (store.read(n, chunk) for n in master_nodes))
+            for channel in range(PlaybackEngine.CHANNELS):
+                frames[channel] = master[channel]
+
+            # Trim the first and last chunks to the requested range
+            lo = max(start - chunk * chunk_size, 0)
+            hi = min(end - chunk * chunk_size, chunk_size)
+            sink.write(frames[:, lo: hi])
+    finally:
+        renderers.release_all()
+        sink.close()
+
+    return BounceStats(max(end - start, 0), time.perf_counter() - began)
@@ -1,15 +1,65 @@
 from abc import ABC, abstractmethod
 import numpy
-from typing import Dict
+from typing import Dict, Union
 from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import Routing
 
 
+# Renders the output nodes of a router component. Each worker keeps one
+# live renderer per node, and asks it for the chunks of that node in order,
+# so a renderer can carry state (oscillator phase, filter memory, delay
+# lines, ...) from one chunk to the next. Renderers that don't need this
+# should say so with their purity, so that chunks can be rendered in
+# parallel rather than in sequence. A renderer whose output carries on
+# after its input (reverb, delay, note release, ...) should declare how
+# long for with its tail, so that edits re-render everything they affect.
+# A renderer that does nothing but route channels from its inputs to its
+# outputs should say how with its routing (output node -> Routing), so
+# that its outputs can be folded into whatever they feed, rather than
+# being rendered as tasks of their own.
 class ComponentRenderer(ABC):
 
+    STATEFUL = "stateful"  # Output depends on chunks rendered before
+    STATELESS = "stateless"  # Output is a function of the inputs and the sample range
+    TIME_INVARIANT = "time-invariant"  # Output is a function of the inputs alone
+
+    purity = STATEFUL
+    tail = 0  # How many samples a change to the input keeps affecting the output for
+    routing: Union[Dict[str, Routing], None] = None  # Output node -> how it is routed from the inputs
+
     @abstractmethod
     def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
         raise NotImplementedError()
 
+    #############
+    # LIFECYCLE #
+    #############
+
+    def prepare(self) -> None:
+        """
+        Called once, after the renderer is created and
+        before it is asked to render anything.
+        :return: None
+        """
+        pass
+
+    def reset(self) -> None:
+        """
+        Called when any state carried between chunks is no longer valid,
+        because the node has been invalidated (e.g. the graph or the component
+        changed), or because the next chunk doesn't follow on from the last.
+        :return: None
+        """
+        pass
+
+    def release(self) -> None:
+        """
+        Called when the renderer is no longer needed, because its
+        node has left the graph or the worker is shutting down.
+        :return: None
+        """
+        pass
+
     ################
     # TIME/SAMPLES #
     ################
@@ -0,0 +1,94 @@
+import os
+import threading
+import traceback
+import numpy as np
+from typing import Union
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.ResultStore import ResultStore
+from jackdaw.Rendering.Scheduler import RenderScheduler
+from jackdaw.Rendering.Typedefs import *
+
+
+# A node being frozen (see Renderer.start_freeze). Waiting for the whole
+# output of the node to be rendered, and writing it out to a file, happen
+# on a thread of their own, so that freezing a long project doesn't hold
+# up whoever asked for it (the UI, say), and can be watched (progress)
+# or given up on (cancel) along the way. Once the job is done, the node
+# is switched over to the file by Renderer.finish_freeze, on the thread
+# that owns the project data.
+class FreezeJob:
+
+    POLL = 0.1  # Seconds between updates of the progress
+
+    def __init__(self, node: Node, chunks: range, path: str, scheduler: RenderScheduler, results: ResultStore):
+        """
+        Freeze a node.
+        :param node: The node.
+        :param chunks: The chunks to freeze.
+        :param path: The file to write the chunks into.
+        :param scheduler: The scheduler rendering the chunks.
+        :param results: Where the chunks are rendered into.
+        """
+        self.node = node
+        self.chunks = chunks
+        self.path = path
+        self.channels: Union[int, None] = None  # Rows written to the file, once done
+        self.error: Union[str, None] = None  # What went wrong, if anything did
+        self._scheduler = scheduler
+        self._results = results
+        self._rendered = 0
+        self._cancelled = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=f"Freeze {node}")
+
+    def start(self):
+        # Start waiting for the chunks (once they have been requested from the scheduler)
+        self._thread.start()
+
+    @property
+    def progress(self) -> float:
+        # The fraction of the chunks that have been rendered
+        return self._rendered / max(len(self.chunks), 1)
+
+    @property
+    def done(self) -> bool:
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        # Wait for the job to be done. Returns False if it wasn't within the timeout (in seconds), if one is given.
+        self._thread.join(timeout)
+        return self.done
+
+    def cancel(self):
+        # Give up (the file isn't written, or is deleted if it already was, see Renderer.finish_freeze)
+        self._cancelled.set()
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _run(self):
+        try:
+            while not self._scheduler.wait([self.node], self.chunks, FreezeJob.POLL):
+                if self.cancelled:
+                    return
+                self._rendered = self._scheduler.done_count(self.node, self.chunks)
+            self._rendered = len(self.chunks)
+            if self.cancelled:
+                return
+            samples = len(self.chunks) * self._results.chunk_size
+            result = self._results.read_range(self.node, self.chunks.start * self._results.chunk_size, samples)
+
+            # Write it out, with a row for each channel up to the last one present
+            channels = max(result, default=0) + 1
+            array = np.zeros((channels, samples), dtype=Signal.DTYPE)
+            for c in result:
+                array[c] = result[c]
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            array.tofile(self.path)
+            self.channels = channels
+        except Exception:
+            self.error = traceback.format_exc()
@@ -0,0 +1,206 @@
+import os
+import atexit
+import hashlib
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Iterable, List, Set, Tuple, Union
+from jackdaw.Data import data
+from jackdaw.MusicTheory import note_frequency
+from jackdaw.Rendering.Timeline import NOTE_BEATS, beats_to_samples
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+
+
+# The notes played on one track, in shared memory, indexed by when they
+# start so that the notes sounding in any window of samples can be found
+# with a binary search rather than a scan over every note. Notes are
+# sorted by start, and none sounds for longer than max_length, so a note
+# that starts more than max_length before a window can't reach into it.
+# Notes are allocated to voices (see VoiceEngine.allocate) as they are
+# added, which decides when each one stops sounding. The layout of the
+# shared memory is
+#     header:       int64[2]            (number of notes, max_length)
+#     starts:       int64[notes]        (first sample of each note)
+#     ends:         int64[notes]        (sample each note is released at)
+#     stops:        int64[notes]        (sample each note stops sounding at)
+#     frequencies:  float64[notes]      (in Hz)
+class NoteEvents:
+
+    def __init__(self, name: str, notes: Union[List[Tuple[int, int, float]], None] = None):
+        """
+        Attach to the notes of a track, or create them if notes are given.
+        :param name: The name of the shared memory.
+        :param notes: (start, end, frequency) of each note, for creating them.
+        """
+        if notes is not None:
+            notes = sorted(notes)
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=NoteEvents.size(len(notes)))
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+
+        header = np.ndarray((2,), dtype=np.int64, buffer=self._shm.buf)
+        count = len(notes) if notes is not None else int(header[0])
+        self.starts = np.ndarray((count,), dtype=np.int64, buffer=self._shm.buf, offset=16)
+        self.ends = np.ndarray((count,), dtype=np.int64, buffer=self._shm.buf, offset=16 + 8 * count)
+        self.stops = np.ndarray((count,), dtype=np.int64, buffer=self._shm.buf, offset=16 + 16 * count)
+        self.frequencies = np.ndarray((count,), dtype=np.float64, buffer=self._shm.buf, offset=16 + 24 * count)
+        if notes is not None:
+            for i, array in enumerate([self.starts, self.ends, self.frequencies]):
+                array[:] = [note[i] for note in notes]
+            self.stops[:] = VoiceEngine.allocate(self.starts, self.ends)
+            header[0] = count
+            header[1] = (self.stops - self.starts).max(initial=0)
+        self.max_length = int(header[1])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def query(self, start: int, end: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        :param start: The first sample of a window.
+        :param end: The sample the window stops at.
+        :return: (starts, ends, stops, frequencies) of the notes sounding at some point in the window.
+        """
+        lo = int(np.searchsorted(self.starts, start - self.max_length, side="right"))
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        sounding = self.stops[lo: hi] > start
+        return self.starts[lo: hi][sounding], self.ends[lo: hi][sounding], \
+            self.stops[lo: hi][sounding], self.frequencies[lo: hi][sounding]
+
+    def close(self):
+        del self.starts, self.ends, self.stops, self.frequencies
+        self._shm.close()
+
+    def unlink(self):
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def size(notes: int) -> int:
+        return 16 + 32 * max(notes, 1)
+
+    @staticmethod
+    def block_name(key: str) -> str:
+        # The notes with the given key, as published by the process that owns the index
+        return f"{os.environ[NoteIndex.ENVIRONMENT_VARIABLE]}_{key[:24]}"
+
+
+# The notes of each track, kept up to date by the process that owns the
+# project (and so the playlist), and published to shared memory for the
+# render workers. Notes are identified by a hash of their content, which
+# becomes a render parameter of the tracks that play them, so a track is
+# rendered again whenever its notes change, and not otherwise. Only the
+# tracks that are said to have changed are rebuilt, the rest are kept.
+# Notes that no track plays any more stay published until collect() is
+# called, so that workers still busy with them can finish.
+class NoteIndex:
+
+    ENVIRONMENT_VARIABLE = "JACKDAW_NOTES"
+
+    def __init__(self):
+        self._prefix = f"jdn{os.getpid()}"
+        self._keys: Dict[int, str] = dict()  # Track -> key of its notes ("" if it has none)
+        self._blocks: Dict[str, NoteEvents] = dict()
+        self._users: Dict[str, Set[int]] = dict()  # Key -> tracks with those notes
+        self._retired: Dict[str, NoteEvents] = dict()
+        os.environ[NoteIndex.ENVIRONMENT_VARIABLE] = self._prefix
+        resource_tracker.ensure_running()
+
+    def key(self, track: int) -> str:
+        """
+        :param track: A track.
+        :return: The key of the notes on that track, published for the render workers
+                 to attach to with NoteEvents(NoteEvents.block_name(key)). The empty
+                 key means that the track has no notes.
+        """
+        if track not in self._keys:
+            self._build([track])
+        return self._keys[track]
+
+    def update(self, tracks: Union[Iterable[int], None] = None):
+        """
+        Rebuild the notes of the given tracks (or of every track), after they have changed.
+        """
+        self._build(list(self._keys) if tracks is None else list(tracks))
+
+    def collect(self):
+        """
+        Unpublish notes that no track has played since the last collect.
+        """
+        for block in self._retired.values():
+            block.unlink()
+            block.close()
+        self._retired.clear()
+
+    def close(self):
+        self._retired.update(self._blocks)
+        self.collect()
+        self._blocks.clear()
+        self._keys.clear()
+        self._users.clear()
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _build(self, tracks: List[int]):
+        # Gather the notes of the tracks, in a single pass over the playlist
+        notes: Dict[int, List[Tuple[int, int, float]]] = {t: [] for t in tracks}
+        for clip in data.playlist_clips:
+            if clip.track.value not in notes or clip.type.value != "MIDI" or \
+                    clip.clip.value not in data.midi_clips:
+                continue
+            for note in data.midi_clips[clip.clip.value].notes:
+                beat = clip.beat.value + note.beat.value
+                notes[clip.track.value].append((beats_to_samples(beat), beats_to_samples(beat + NOTE_BEATS),
+                                                note_frequency(note.note.value)))
+
+        for track in tracks:
+            key = NoteIndex.content_key(notes[track])
+            old_key = self._keys.get(track)
+            if key == old_key:
+                continue
+            if key in self._retired:
+                self._blocks[key] = self._retired.pop(key)  # Played again (say, after an undo)
+            elif key != "" and key not in self._blocks:
+                self._blocks[key] = NoteEvents(f"{self._prefix}_{key[:24]}", notes[track])
+            if key != "":
+                self._users.setdefault(key, set()).add(track)
+            self._keys[track] = key
+            if old_key:
+                self._release(old_key, track)
+
+    def _release(self, key: str, track: int):
+        self._users[key].discard(track)
+        if len(self._users[key]) == 0:
+            self._users.pop(key)
+            self._retired[key] = self._blocks.pop(key)
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def content_key(notes: List[Tuple[int, int, float]]) -> str:
+        if len(notes) == 0:
+            return ""
+        return hashlib.sha1(repr(sorted(notes)).encode()).hexdigest()
+
+
+_index: Union[NoteIndex, None] = None
+
+
+def note_index() -> NoteIndex:
+    """
+    :return: The note index of this process, creating it if need be.
+    """
+    global _index
+    if _index is None:
+        _index = NoteIndex()
+        atexit.register(_index.close)
+    return _index
@@ -0,0 +1,283 @@
+import time
+import struct
+import threading
+import traceback
+import numpy as np
+from abc import ABC, abstractmethod
+from typing import Tuple, Union, BinaryIO
+from jackdaw.TimeControl import TimeControl
+
+
+class AudioSink(ABC):
+    """
+    Somewhere for the playback engine to send master output to.
+    """
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        pass
+
+    @abstractmethod
+    def write(self, frames: np.ndarray) -> None:
+        """
+        Send a block of audio to the sink.
+        :param frames: The audio, as a (channels, samples) array.
+        :return: None
+        """
+        raise NotImplementedError()
+
+    def close(self) -> None:
+        pass
+
+
+class NullSink(AudioSink):
+
+    def __init__(self):
+        """
+        A sink that throws audio away, counting how much it was sent.
+        """
+        self.samples = 0
+
+    def write(self, frames: np.ndarray) -> None:
+        self.samples += frames.shape[1]
+
+
+class DeviceSink(AudioSink):
+
+    def __init__(self):
+        """
+        A sink that plays audio on the default output device, through the
+        sounddevice package (see output_sink, for when that isn't installed).
+        """
+        self._stream = None
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        import sounddevice
+        self._stream = sounddevice.OutputStream(samplerate=sample_rate, channels=channels, dtype="float32")
+        self._stream.start()
+
+    def write(self, frames: np.ndarray) -> None:
+        self._stream.write(np.ascontiguousarray(frames.T, dtype=np.float32))
+
+    def close(self) -> None:
+        if self._stream is None:
+            return
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+
+def output_sink() -> AudioSink:
+    """
+    :return: A sink for the default output device, or a NullSink if
+             sounddevice (or the PortAudio library under it) isn't available.
+    """
+    try:
+        import sounddevice
+    except (ImportError, OSError):
+        return NullSink()
+    return DeviceSink()
+
+
+class WavSink(AudioSink):
+
+    # Sample formats, as (WAV format tag, bytes per sample)
+    FORMATS = {
+        "pcm16": (1, 2),
+        "pcm24": (1, 3),
+        "float32": (3, 4),
+    }
+
+    def __init__(self, filename: str, sample_format: str = "pcm16"):
+        """
+        A sink that streams audio to a WAV file. The header is written up
+        front, and the sizes in it are filled in when the sink is closed.
+        :param filename: The file to write to.
+        :param sample_format: One of WavSink.FORMATS.
+        """
+        if sample_format not in WavSink.FORMATS:
+            raise Exception(f"Unknown WAV sample format \"{sample_format}\", "
+                            f"expected one of {', '.join(WavSink.FORMATS)}")
+        self._filename = filename
+        self._format = sample_format
+        self._file: Union[BinaryIO, None] = None
+        self._data_bytes = 0
+
+    def open(self, sample_rate: int, channels: int) -> None:
+        tag, width = WavSink.FORMATS[self._format]
+        self._file = open(self._filename, "wb")
+        self._file.write(b"RIFF" + struct.pack("<I", 0) + b"WAVE")
+        self._file.write(b"fmt " + struct.pack("<IHHIIHH", 16, tag, channels, sample_rate,
+                                               sample_rate * channels * width, channels * width, 8 * width))
+        self._file.write(b"data" + struct.pack("<I", 0))
+        self._data_bytes = 0
+
+    def write(self, frames: np.ndarray) -> None:
+        frames = frames.T  # Samples interleaved by channel
+        if self._format == "float32":
+            raw = frames.astype("<f4").tobytes()
+        elif self._format == "pcm16":
+            raw = np.round(np.clip(frames, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+        else:
+            pcm = np.ascontiguousarray(np.round(np.clip(frames, -1.0, 1.0) * 8388607), dtype="<i4")
+            raw = pcm.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()  # Low three bytes of each
+        self._file.write(raw)
+        self._data_bytes += len(raw)
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        if self._data_bytes % 2 == 1:
+            self._file.write(b"\0")  # Chunks are padded to an even length
+        self._file.seek(4)
+        self._file.write(struct.pack("<I", 36 + self._data_bytes + self._data_bytes % 2))
+        self._file.seek(40)
+        self._file.write(struct.pack("<I", self._data_bytes))
+        self._file.close()
+        self._file = None
+
+
+# Plays master output to a sink, following TimeControl: audio flows
+# while TimeControl is playing, and playback jumps whenever the playhead
+# is moved (or playback is stopped). Master output is requested a bounded
+# window ahead of the playback position, so that it is (hopefully) already
+# rendered when it is due. A block that still isn't rendered when it is
+# due is an underrun, and is played as silence. Only the current window
+# is held on to: whatever falls out of it is released, so that edits only
+# cause what is about to be played to be rendered again, playhead first.
+class PlaybackEngine:
+
+    SAMPLE_RATE = 44100
+    CHANNELS = 2
+    IDLE_INTERVAL = 0.01  # Seconds between checks for playback starting
+
+    def __init__(self, sink: AudioSink, source=None,
+                 block_samples: int = 1024, latency: float = 0.05,
+                 render_ahead: float = 0.5, realtime: bool = True):
+        """
+        :param sink: Where to send the master output.
+        :param source: Where master output comes from, something with request_master,
+                       release_master, render_master and set_playhead methods
+                       (the Renderer, by default).
+        :param block_samples: The number of samples sent to the sink at a time.
+        :param latency: The target latency, in seconds. Blocks are handed to the sink
+                        this long before they are due to be heard.
+        :param render_ahead: How far ahead of the playback position (in seconds)
+                             master output is requested.
+        :param realtime: If False, don't keep pace with the wall clock, just play blocks
+                         as fast as they are rendered (so there are never underruns).
+        """
+        if source is None:
+            from jackdaw.Rendering.Renderer import Renderer
+            source = Renderer.instance()
+
+        self._sink = sink
+        self._source = source
+        self.block_samples = block_samples
+        self.latency = latency
+        self.render_ahead = render_ahead
+        self.realtime = realtime
+
+        # Statistics
+        self.blocks_played = 0
+        self.underruns = 0
+        self.errors = 0  # Blocks that failed (and were logged, and played as silence)
+
+        # Playback position (in samples), None when not playing
+        self._position: Union[int, None] = None
+        self._seeks = TimeControl.get_seek_count()
+        self._anchor: Tuple[float, int] = (0.0, 0)  # (Wall-clock time, sample) pair
+        self._window: Union[Tuple[int, int], None] = None  # (start, samples) requested from the source
+
+        self._running = False
+        self._thread: Union[threading.Thread, None] = None
+
+    @property
+    def position(self) -> Union[int, None]:
+        return self._position
+
+    def start(self) -> None:
+        self._sink.open(PlaybackEngine.SAMPLE_RATE, PlaybackEngine.CHANNELS)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True, name="Playback")
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._hold(None)
+        self._sink.close()
+
+    def step(self) -> bool:
+        """
+        Play the next block, if TimeControl is playing.
+        :return: True if a block was played.
+        """
+        if not TimeControl.is_playing():
+            self._position = None
+            self._hold(None)
+            return False
+
+        if self._position is None or TimeControl.get_seek_count() != self._seeks:
+            # (Re)start from wherever TimeControl says we are
+            self._seeks = TimeControl.get_seek_count()
+            self._position = int(round(TimeControl.get_time() * PlaybackEngine.SAMPLE_RATE))
+            self._anchor = (time.perf_counter(), self._position)
+
+        # Keep the render-ahead window full
+        start = self._position
+        ahead = int(self.render_ahead * PlaybackEngine.SAMPLE_RATE)
+        self._source.set_playhead(start)
+        self._hold((start, self.block_samples + ahead))
+
+        timeout = None
+        if self.realtime:
+            # Don't get further ahead of the wall clock than the
+            # target latency, then wait for the block until it is due
+            due = self._anchor[0] + (start - self._anchor[1]) / PlaybackEngine.SAMPLE_RATE
+            early = due - self.latency - time.perf_counter()
+            if early > 0:
+                time.sleep(early)
+            timeout = max(0.0, due - time.perf_counter())
+
+        result = self._source.render_master(start, self.block_samples, timeout)
+        if result is None:
+            self.underruns += 1
+            frames = np.zeros((PlaybackEngine.CHANNELS, self.block_samples), dtype=np.float32)
+        else:
+            frames = np.vstack(result)
+
+        self._sink.write(frames)
+        self.blocks_played += 1
+        self._position = start + self.block_samples
+        return True
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _hold(self, window: Union[Tuple[int, int], None]):
+        # Request the new window before releasing the old one, so what they share is never let go of
+        if window == self._window:
+            return
+        if window is not None:
+            self._source.request_master(*window)
+        if self._window is not None:
+            self._source.release_master(*self._window)
+        self._window = window
+
+    def _run(self):
+        # Keep going whatever goes wrong: a block that fails is logged, and
+        # played as silence (and the block after it is asked for again)
+        while self._running:
+            try:
+                played = self.step()
+            except Exception:
+                traceback.print_exc()
+                self.errors += 1
+                self._sink.write(np.zeros((PlaybackEngine.CHANNELS, self.block_samples), dtype=np.float32))
+                self._position = None
+                played = False
+            if not played:
+                time.sleep(PlaybackEngine.IDLE_INTERVAL)
@@ -1,5 +1,8 @@
+import numpy as np
+from typing import List
 import matplotlib.pyplot as plt
 from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Typedefs import *
 
 
 def plot_left_right(left, right):
@@ -10,5 +13,19 @@ def plot_left_right(left, right):
     plt.show()
 
 
-def plot_render(start: int, samples: int):
-    plot_left_right(*Renderer.instance().render_master(start, samples))
+def plot_waveforms(start: int, end: int, waveforms: List[Waveform]):
+    # The left and right channels of each waveform, one above the other, filled in between their mins and maxs
+    for channel in range(2):
+        plt.subplot(211 + channel)
+        for waveform in waveforms:
+            x = start + (np.arange(waveform.mins.shape[1]) + 0.5) * (end - start) / waveform.mins.shape[1]
+            plt.fill_between(x, waveform.mins[channel], waveform.maxs[channel], linewidth=0)
+    plt.show()
+
+
+def plot_render(start: int, samples: int, pixels: int = 1000):
+    # Render the master output, then draw what feeds it, a pixel at a time
+    renderer = Renderer.instance()
+    renderer.render_master(start, samples)
+    plot_waveforms(start, start + samples, [renderer.waveform(node, SampleRange(start, start + samples), pixels)
+                                            for node in sorted(renderer.master_nodes())])
@@ -0,0 +1,200 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import numpy as np
+from typing import Dict, List, Set, Tuple, Union
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Typedefs import *
+
+
+# Bump this whenever what a renderer produces, or the way chunks are stored,
+# changes, so that chunks cached by earlier versions are no longer found
+CACHE_VERSION = 1
+
+
+def content_keys(order: List[Node], parents: Dict[Node, Set[Node]], inout: Dict[Node, str],
+                 datatypes: Dict[Node, str], parameters: Dict[Node, dict],
+                 purities: Dict[Node, str], chunk_size: int,
+                 frozen: Dict[Node, Frozen] = None) -> Dict[Node, str]:
+    """
+    Work out a content key for each node, identifying what the node renders: a
+    hash of the component type, its render parameters and the keys of the nodes
+    upstream of it (so, a Merkle hash of everything the node depends on). Nodes
+    that render the same thing get the same key, wherever they are in the graph.
+    Nodes that depend on a stateful renderer (whose output depends on where
+    rendering started) get the empty key, meaning that they can't be cached.
+    Frozen nodes are identified by the file they were frozen into instead, as
+    what they render no longer depends on anything upstream. Every key is salted
+    with CACHE_VERSION.
+    :param order: The nodes, with every node after its parents.
+    :param parents: Dictionary of node -> parents of that node.
+    :param inout: Dictionary of node -> "input" or "output".
+    :param datatypes: Dictionary of node -> component datatype.
+    :param parameters: Dictionary of node -> serialized render parameters of its component.
+    :param purities: Dictionary of node -> purity of its renderer.
+    :param chunk_size: The number of samples in a chunk.
+    :param frozen: Dictionary of node -> the file it has been frozen into, for the nodes that are frozen.
+    :return: Dictionary of node -> content key.
+    """
+    frozen = frozen or dict()
+    keys: Dict[Node, str] = dict()
+    for n in order:
+        if n in frozen:
+            keys[n] = hashlib.sha1(json.dumps(["frozen", CACHE_VERSION, chunk_size, frozen[n].path]).encode()).hexdigest()
+            continue
+
+        if purities[n] == ComponentRenderer.STATEFUL or any(keys[p] == "" for p in parents[n]):
+            keys[n] = ""
+            continue
+
+        if inout[n] == "input":
+            # An input node is just the sum of its parents
+            content = ["input", CACHE_VERSION, chunk_size, sorted(keys[p] for p in parents[n])]
+        else:
+            content = ["output", CACHE_VERSION, chunk_size, datatypes[n], n.node, parameters[n],
+                       sorted((p.node, keys[p]) for p in parents[n])]
+
+        keys[n] = hashlib.sha1(json.dumps(content, sort_keys=True).encode()).hexdigest()
+    return keys
+
+
+# A persistent, on-disk cache of rendered chunks, keyed by (content key,
+# chunk). Because content keys identify what was rendered, rather than
+# where, results survive edits that are later undone, subgraphs being
+# reconnected, and the project being closed and reopened. The least
+# recently used chunks are evicted once the cache grows past its size
+# limit. The cache is shared between processes (each process opens its
+# own connection) and errors using it are never fatal, it is just skipped.
+# A lookup has to cost less than rendering for the cache to be any use, so
+# nothing is written on the way: puts, and the times at which chunks were
+# last used, are kept in memory and written in one transaction every
+# FLUSH_INTERVAL seconds (or FLUSH_PUTS puts), and when the cache is closed.
+# Chunks that were quicker to render than MIN_RENDER_TIME aren't worth
+# putting at all.
+class RenderCache:
+
+    MAX_BYTES = 1 << 30  # Size limit of the cached sample data
+    EVICT_INTERVAL = 256  # Number of puts between checks of the size limit
+    FLUSH_INTERVAL = 2.0  # Seconds between writes of pending puts and uses
+    FLUSH_PUTS = 64  # Number of pending puts that are written straight away
+    MIN_RENDER_TIME = 1e-4  # Seconds a chunk must have taken to render to be put
+
+    def __init__(self, path: str, max_bytes: int = None):
+        self._path = path
+        self._max_bytes = max_bytes or RenderCache.MAX_BYTES
+        self._connection: Union[sqlite3.Connection, None] = None
+        self._puts = 0
+        self._pending: Dict[Tuple[str, Chunk], Tuple[int, bytes, float]] = dict()  # Puts not yet written
+        self._used: Dict[Tuple[str, Chunk], float] = dict()  # Uses not yet written
+        self._flushed = time.time()
+
+    def __getstate__(self):
+        # Connections (and anything not yet written) are local to a process
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        state["_pending"] = dict()
+        state["_used"] = dict()
+        return state
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def get(self, key: str, chunk: Chunk) -> Union[Signal, None]:
+        row = self._pending.get((key, chunk))
+        if row is not None:
+            self._pending[(key, chunk)] = (row[0], row[1], time.time())
+        else:
+            try:
+                row = self._db().execute("SELECT mask, data FROM chunks WHERE key = ? AND chunk = ?",
+                                         (key, chunk)).fetchone()
+            except sqlite3.Error:
+                return None
+            if row is None:
+                return None
+            self._used[(key, chunk)] = time.time()
+            self._maybe_flush()
+
+        mask, blob = row[0], row[1]
+        rows = np.frombuffer(blob, dtype=Signal.DTYPE)
+        rows = rows.reshape(max(mask.bit_length(), 1), -1)
+        return Signal.wrap(rows, [c for c in range(mask.bit_length()) if mask & (1 << c)])
+
+    def put(self, key: str, chunk: Chunk, signal: Signal):
+        # Store the rows of the signal up to its last channel
+        channels = list(signal)
+        mask = 0
+        for c in channels:
+            mask |= 1 << c
+        rows = np.zeros((max(mask.bit_length(), 1), signal.samples), dtype=Signal.DTYPE)
+        for c in channels:
+            rows[c] = signal[c]
+
+        self._pending[(key, chunk)] = (mask, rows.tobytes(), time.time())
+        self._used.pop((key, chunk), None)
+        self._maybe_flush()
+
+    def flush(self):
+        # Write pending puts and uses, in one transaction
+        pending, used = self._pending, self._used
+        self._pending, self._used = dict(), dict()
+        self._flushed = time.time()
+        if len(pending) == 0 and len(used) == 0:
+            return
+        try:
+            db = self._db()
+            with db:
+                db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?, ?, ?, ?)",
+                               [(key, chunk, mask, blob, t) for (key, chunk), (mask, blob, t) in pending.items()])
+                db.executemany("UPDATE chunks SET used = ? WHERE key = ? AND chunk = ?",
+                               [(t, key, chunk) for (key, chunk), t in used.items()])
+
+            puts = self._puts
+            self._puts += len(pending)
+            if self._puts // RenderCache.EVICT_INTERVAL != puts // RenderCache.EVICT_INTERVAL:
+                self.evict()
+        except sqlite3.Error:
+            pass
+
+    def evict(self):
+        # Throw away least recently used chunks until we're within the size limit
+        self.flush()
+        db = self._db()
+        total, count = db.execute("SELECT COALESCE(SUM(LENGTH(data)), 0), COUNT(*) FROM chunks").fetchone()
+        if total <= self._max_bytes:
+            return
+        excess = int(np.ceil((total - self._max_bytes) / (total / count)))
+        db.execute("DELETE FROM chunks WHERE rowid IN "
+                   "(SELECT rowid FROM chunks ORDER BY used LIMIT ?)", (excess,))
+        db.commit()
+
+    def close(self):
+        self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _maybe_flush(self):
+        if len(self._pending) >= RenderCache.FLUSH_PUTS or \
+                time.time() - self._flushed >= RenderCache.FLUSH_INTERVAL:
+            self.flush()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self._path)
+            if directory != "":
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self._path, timeout=30)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS chunks ("
+                                     "key TEXT, chunk INTEGER, mask INTEGER, data BLOB, used REAL, "
+                                     "PRIMARY KEY (key, chunk))")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS chunks_used ON chunks (used)")
+        return self._connection
@@ -0,0 +1,180 @@
+import os
+import numpy as np
+from typing import Dict, List, Set, Tuple, Union
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import *
+
+
+# Compiles the routing graph into the tasks that are actually rendered.
+# Input nodes (which just sum their parents) and the outputs of components
+# that only route channels (pass throughs, splitting and joining stereo)
+# aren't worth a task each: they are folded into every node that they
+# feed, as a flat list of steps that gathers that node's inputs straight
+# from the results of the nodes that are rendered. Single inputs are
+# passed on without being summed, pass throughs disappear altogether, and
+# picking channels out of a signal is a view onto it rather than a copy,
+# so glue costs next to nothing however much of it there is. Only the
+# nodes that render something, and the nodes whose results are read from
+# outside (the sinks, such as the inputs of the master output), are left.
+#
+# Frozen nodes are folded in the same way: they are read straight from
+# the file they were frozen into (mapped into memory, so reading a chunk
+# is a view onto the file rather than a copy). Nothing upstream of a
+# frozen node is walked, so nodes that only feed frozen nodes, like any
+# others that don't feed a sink, aren't rendered at all.
+
+
+def compile_plans(order: List[Node], parents: Dict[Node, Set[Node]], specs: Dict[Node, NodeSpec],
+                  sinks: Set[Node]) -> Tuple[List[Node], Dict[Node, Set[Node]], Dict[Node, NodeSpec]]:
+    """
+    :param order: The nodes of the graph, with every node after its parents.
+    :param parents: Dictionary of node -> parents of that node.
+    :param specs: Dictionary of node -> spec of that node.
+    :param sinks: Nodes whose results are needed on their own, so are always rendered.
+    :return: (order, parents, specs) of the nodes that are still rendered as tasks,
+             each spec holding the plan that gathers the node's inputs.
+    """
+    folded = {n for n in order if n not in sinks and
+              (specs[n].inout == "input" or specs[n].routing is not None or specs[n].frozen is not None)}
+    rank = {n: i for i, n in enumerate(order)}
+
+    plan_order = [n for n in order if n not in folded]
+    plan_parents: Dict[Node, Set[Node]] = dict()
+    plan_specs: Dict[Node, NodeSpec] = dict()
+    for n in plan_order:
+
+        # Everything upstream of the node, up to and including the nodes that are rendered
+        needed: Set[Node] = set()
+        stack = list(parents[n]) if specs[n].frozen is None else []
+        while len(stack) > 0:
+            m = stack.pop()
+            if m not in needed:
+                needed.add(m)
+                if m in folded and specs[m].frozen is None:
+                    stack.extend(parents[m])
+
+        # Work out each of them in turn (parents first). Results that are
+        # passed on unchanged are just another name for an earlier step.
+        steps: List[PlanStep] = []
+        step_of: Dict[Node, int] = dict()
+        for m in sorted(needed, key=rank.get):
+            if m not in folded:
+                step_of[m] = len(steps)
+                steps.append(PlanStep("read", m))
+                continue
+
+            if specs[m].frozen is not None:
+                step_of[m] = len(steps)
+                steps.append(PlanStep("frozen", m, frozen=specs[m].frozen))
+                continue
+
+            sources = tuple((p.node, step_of[p]) for p in sorted(parents[m]))
+            if specs[m].inout == "input":
+                if len(sources) == 1:
+                    step_of[m] = sources[0][1]
+                    continue
+                step = PlanStep("mix", m, sources)
+            elif isinstance(specs[m].routing, str):
+                passed = [s for name, s in sources if name == specs[m].routing]
+                if len(passed) > 0:
+                    step_of[m] = passed[0]
+                    continue
+                step = PlanStep("silence", m)
+            else:
+                step = PlanStep("route", m, sources, specs[m].routing)
+            step_of[m] = len(steps)
+            steps.append(step)
+
+        plan_parents[n] = {m for m in needed if m not in folded}
+        plan_specs[n] = specs[n]._replace(parents=tuple(sorted(plan_parents[n])), plan=tuple(steps),
+                                          inputs=tuple((p.node, step_of[p]) for p in sorted(parents[n])
+                                                       if p in step_of))
+
+    # Leave out the nodes that no sink depends on
+    kept: Set[Node] = set()
+    stack = [n for n in sinks if n in plan_parents]
+    while len(stack) > 0:
+        n = stack.pop()
+        if n not in kept:
+            kept.add(n)
+            stack.extend(plan_parents[n])
+    plan_order = [n for n in plan_order if n in kept]
+    return plan_order, {n: plan_parents[n] for n in plan_order}, {n: plan_specs[n] for n in plan_order}
+
+
+def run_plan(spec: NodeSpec, parent_results: Dict[Node, Signal], start: int, samples: int) \
+        -> List[Tuple[str, Signal]]:
+    """
+    :param spec: The spec of a node.
+    :param parent_results: Dictionary of parent -> result of that parent.
+    :param start: The first sample of the chunk.
+    :param samples: The number of samples in a chunk.
+    :return: (name, signal) of each input of the node.
+    """
+    if len(spec.plan) == 0:
+        return [(p.node, parent_results[p]) for p in parent_results]  # Nothing folded in
+
+    results: List[Signal] = []
+    for step in spec.plan:
+        if step.op == "read":
+            results.append(parent_results[step.node])
+        elif step.op == "silence":
+            results.append(Signal.silence(samples))
+        elif step.op == "mix":
+            sources = [results[s] for _, s in step.sources if not results[s].silent]
+            results.append(Signal.mix_into(Signal(samples), sources) if len(sources) > 0 else Signal.silence(samples))
+        elif step.op == "route":
+            results.append(route({name: results[s] for name, s in step.sources}, step.routing, samples))
+        elif step.op == "frozen":
+            results.append(read_frozen(step.frozen, start, samples))
+        else:
+            raise Exception(f"Unknown plan step \"{step.op}\" for node {step.node}")
+    return [(name, results[s]) for name, s in spec.inputs]
+
+
+def route(inputs: Dict[str, Signal], routing: Routing, samples: int) -> Signal:
+    """
+    :param inputs: Dictionary of input name -> input.
+    :param routing: Where each channel of the output comes from.
+    :param samples: The number of samples in a chunk.
+    :return: The routed output (a view onto an input, if the channels allow it).
+    """
+    sources: List[Tuple[Union[Signal, None], int]] = [(inputs.get(name), c) for name, c in routing]
+    if all(s is None or c not in s for s, c in sources):
+        return Signal.silence(samples)
+
+    # A run of channels of a single input, all present, is just a view onto that input
+    first, channel = sources[0]
+    if first is not None and all(s is first and c == channel + k and c in first
+                                 for k, (s, c) in enumerate(sources)):
+        return first.channel_view(channel, len(sources))
+
+    result = Signal(samples)
+    for k, (s, c) in enumerate(sources):
+        result[k] = s[c] if s is not None else Signal.zeros(samples)[0]
+    return result
+
+
+_mapped: Dict[str, np.ndarray] = dict()  # Frozen files mapped into this process, by path
+
+
+def read_frozen(frozen: Frozen, start: int, samples: int) -> Signal:
+    """
+    :param frozen: The file a node has been frozen into.
+    :param start: The first sample to read.
+    :param samples: The number of samples to read.
+    :return: The samples (a view onto the file, unless they run past its end).
+    """
+    if frozen.path not in _mapped:
+        # Let go of files that have been unfrozen since, before mapping another
+        for path in [p for p in _mapped if not os.path.isfile(p)]:
+            del _mapped[path]
+        _mapped[frozen.path] = np.memmap(frozen.path, dtype=Signal.DTYPE, mode="r").reshape(frozen.channels, -1)
+    array = _mapped[frozen.path]
+
+    if start + samples <= array.shape[1]:
+        return Signal.wrap(array[:, start: start + samples], range(frozen.channels))
+    result = np.zeros((frozen.channels, samples), dtype=Signal.DTYPE)
+    if start < array.shape[1]:
+        result[:, 0: array.shape[1] - start] = array[:, start:]
+    return Signal.wrap(result, range(frozen.channels))
@@ -0,0 +1,187 @@
+import os
+import uuid
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, List, NamedTuple, Union
+from jackdaw.Rendering.Typedefs import *
+
+
+# What happened to one (node, chunk) render task. Times are in seconds.
+class ChunkStats(NamedTuple):
+    node: Node
+    chunk: Chunk
+    worker: int
+    cached: bool  # Whether the chunk came from the render cache
+    started: float  # When the worker started on the task (on the time.perf_counter clock)
+    parent_wait: float  # From being asked for, until the parents were all rendered
+    queued: float  # From being ready, until a worker started on it (waiting for a free worker)
+    compute: float  # Time the worker spent on it
+    bytes: int  # Size of the rendered sample data
+
+
+# Totals of the ChunkStats of a node
+class NodeStats(NamedTuple):
+    chunks: int
+    parent_wait: float
+    queued: float
+    compute: float
+    bytes: int
+
+
+# Per-task render metrics, kept in a shared-memory ring buffer that every
+# worker writes to (each to its own part, so no locking is needed) and that
+# any process can read. Only the most recent CAPACITY records of each worker
+# are kept. The layout of the shared memory is
+#     counts:   int64[workers]                  (records ever written by each worker)
+#     records:  RECORD[workers, CAPACITY]
+class RenderStats:
+
+    CAPACITY = 1 << 14  # Records kept per worker
+    NODE_NAME_BYTES = 48
+    RECORD = np.dtype([
+        ("node_id", np.int64),
+        ("node", f"S{NODE_NAME_BYTES}"),
+        ("chunk", np.int64),
+        ("cached", np.bool_),
+        ("requested", np.float64),
+        ("ready", np.float64),
+        ("started", np.float64),
+        ("finished", np.float64),
+        ("bytes", np.int64),
+    ])
+
+    def __init__(self, workers: int):
+        self._workers = workers
+        self._name = f"jds{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self._owner = os.getpid()
+        self._shm: Union[shared_memory.SharedMemory, None] = None
+        self._counts: Union[np.ndarray, None] = None
+        self._records: Union[np.ndarray, None] = None
+
+        resource_tracker.ensure_running()
+        self._attach(create=True)
+
+    def __getstate__(self):
+        # The mapping is local to a process
+        state = self.__dict__.copy()
+        state["_shm"] = state["_counts"] = state["_records"] = None
+        return state
+
+    def record(self, worker: int, task: RenderTask, started: float, finished: float,
+               produced_bytes: int, cached: bool) -> None:
+        """
+        Record a finished render task (called by the worker that rendered it).
+        """
+        self._attach()
+        slot = self._records[worker, self._counts[worker] % RenderStats.CAPACITY]
+        requested, ready = task.times
+        slot["node_id"] = task.node.id
+        slot["node"] = task.node.node.encode()[:RenderStats.NODE_NAME_BYTES]
+        slot["chunk"] = task.chunk
+        slot["cached"] = cached
+        slot["requested"] = requested
+        slot["ready"] = ready
+        slot["started"] = started
+        slot["finished"] = finished
+        slot["bytes"] = produced_bytes
+
+        # Count last, so the record only appears once it is complete
+        self._counts[worker] += 1
+
+    def records(self) -> List[ChunkStats]:
+        """
+        :return: The recorded tasks that are still in the ring buffer, in the order they were started.
+        """
+        self._attach()
+        stats: List[ChunkStats] = []
+        for worker in range(self._workers):
+            count = int(self._counts[worker])
+            kept = min(count, RenderStats.CAPACITY)
+            for i in range(count - kept, count):
+                r = self._records[worker, i % RenderStats.CAPACITY].copy()
+                stats.append(ChunkStats(
+                    node=Node(int(r["node_id"]), r["node"].decode()),
+                    chunk=int(r["chunk"]),
+                    worker=worker,
+                    cached=bool(r["cached"]),
+                    started=float(r["started"]),
+                    parent_wait=max(0.0, float(r["ready"] - r["requested"])),
+                    queued=max(0.0, float(r["started"] - r["ready"])),
+                    compute=float(r["finished"] - r["started"]),
+                    bytes=int(r["bytes"]),
+                ))
+        stats.sort(key=lambda s: s.started)
+        return stats
+
+    def clear(self) -> None:
+        self._attach()
+        self._counts[:] = 0
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._counts = self._records = None
+        self._shm.close()
+        if os.getpid() == self._owner:
+            try:
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+        self._shm = None
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _attach(self, create: bool = False) -> None:
+        if self._shm is not None:
+            return
+        if create:
+            size = 8 * self._workers + RenderStats.RECORD.itemsize * self._workers * RenderStats.CAPACITY
+            self._shm = shared_memory.SharedMemory(name=self._name, create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=self._name)
+        self._counts = np.ndarray((self._workers,), dtype=np.int64, buffer=self._shm.buf)
+        self._records = np.ndarray((self._workers, RenderStats.CAPACITY), dtype=RenderStats.RECORD,
+                                   buffer=self._shm.buf, offset=8 * self._workers)
+
+
+def summarize(stats: List[ChunkStats]) -> Dict[Node, NodeStats]:
+    """
+    :param stats: Recorded render tasks.
+    :return: Dictionary of node -> totals for that node.
+    """
+    totals: Dict[Node, NodeStats] = dict()
+    for s in stats:
+        t = totals.get(s.node, NodeStats(0, 0.0, 0.0, 0.0, 0))
+        totals[s.node] = NodeStats(t.chunks + 1, t.parent_wait + s.parent_wait, t.queued + s.queued,
+                                   t.compute + s.compute, t.bytes + s.bytes)
+    return totals
+
+
+def chrome_trace(stats: List[ChunkStats]) -> dict:
+    """
+    Convert recorded render tasks to the Chrome trace event format (load the
+    JSON into chrome://tracing or Perfetto), with a row per worker.
+    :param stats: Recorded render tasks.
+    :return: The trace, ready to be written out with json.dump.
+    """
+    origin = min((s.started for s in stats), default=0.0)
+    events = []
+    for s in stats:
+        events.append({
+            "name": f"{s.node.id}.{s.node.node}",
+            "cat": "cache" if s.cached else "render",
+            "ph": "X",
+            "ts": (s.started - origin) * 1e6,
+            "dur": s.compute * 1e6,
+            "pid": 0,
+            "tid": s.worker,
+            "args": {
+                "chunk": s.chunk,
+                "bytes": s.bytes,
+                "parent_wait_ms": s.parent_wait * 1e3,
+                "queued_ms": s.queued * 1e3,
+            },
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
@@ -1,17 +1,36 @@
+import os
 import time
+import json
+import threading
+import traceback
+import uuid
 import numpy as np
 import multiprocessing as mp
-from functools import cmp_to_key
-from typing import Set, List, Tuple, Dict, Union
+from typing import Set, List, Tuple, Dict, Union, Callable
 
 from jackdaw.Data import data
+from jackdaw.Data.DataObjects import HasOnChangeListeners
+from jackdaw.Data.ProjectData import ProjectData, RouterComponentData, RouterRouteData, FrozenNodeData
 from jackdaw.Utils.Singleton import Singleton
-from jackdaw.Data.ProjectData import RouterComponentData
 from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
-from jackdaw.UI.RouterComponents.MasterOutput import MasterOutputData
+from jackdaw.Rendering.RendererCache import RendererCache, renderer_purity, renderer_tail, renderer_routing
+from jackdaw.Components.MasterOutput import MasterOutputData
+from jackdaw.Components.TrackSignal import TrackSignalData
 from jackdaw.Rendering.Signal import Signal
 from jackdaw.Rendering.Typedefs import *
 from jackdaw.Rendering.RenderQueue import RenderQueue
+from jackdaw.Rendering.ResultStore import ResultStore
+from jackdaw.Rendering.WaveformPyramid import WaveformPyramid
+from jackdaw.Rendering.RenderCache import RenderCache, content_keys
+from jackdaw.Rendering.Scheduler import RenderScheduler
+from jackdaw.Rendering.FreezeJob import FreezeJob
+from jackdaw.Rendering.RenderPlan import compile_plans, run_plan, read_frozen
+from jackdaw.Rendering.RenderStats import RenderStats, ChunkStats, chrome_trace
+from jackdaw.Rendering.Wavetable import wavetables
+from jackdaw.Rendering.NoteIndex import note_index
+from jackdaw.Rendering.RoutingGraph import RoutingGraph, RoutingCycleException
+from jackdaw.Rendering.Timeline import clip_spans, changed_ranges, timeline_objects, \
+    merge_ranges, extend_range, chunk_range
 
 
 class Renderer(Singleton):
@@ -19,43 +38,80 @@ class Renderer(Singleton):
     def __init__(self):
         Singleton.__init__(self)
 
-        # Initialize the set of routes amd the render queue
-        self._routes: Set[Route] = set()
+        # Initialize the routing graph, the render queue, the result store and the scheduler
+        self._graph = RoutingGraph()
         self._queue = RenderQueue.instance()
+        self._results = ResultStore(Renderer.CHUNK_SIZE)
+        self._cache = RenderCache(Renderer.CACHE_PATH)
+        self._stats = RenderStats(self._queue.workers)
+        wavetables()  # Computed once, here, and shared with the render processes
+        note_index().update()  # Published from here, for the render processes
+        self._scheduler = RenderScheduler(self._queue.workers,
+                                          lambda worker, task: self._queue.tasks[worker].put(task),
+                                          lambda node, chunk: self._results.write(node, chunk, Signal.silence(0)),
+                                          lambda node, chunk: self._waveform_changed(node, chunk, chunk + 1))
+
+        # The waveform pyramids of the nodes that have been drawn (kept up to date from the
+        # scheduler's thread as chunks are rendered, and read from whichever thread draws)
+        self._waveforms: Dict[Node, WaveformPyramid] = dict()
+        self._waveforms_lock = threading.Lock()
+
+        # The render order and specs of the graph, the specs of the nodes that are
+        # rendered as tasks (with everything else folded into them), and the component
+        # data (and the listeners added to its render parameters) that we are watching
+        self._order: List[Node] = []
+        self._specs: Dict[Node, NodeSpec] = dict()
+        self._plan: Dict[Node, NodeSpec] = dict()
+        self._master_nodes: Set[Node] = set()
+        self._frozen: Dict[Node, Frozen] = Renderer.frozen_from_data()
+        self._freeze_jobs: Dict[FreezeJob, str] = dict()  # Jobs freezing nodes -> file (relative to the project)
+        self._watched_data: Dict[int, RouterComponentData] = dict()
+        self._watched: Dict[int, List[Tuple[HasOnChangeListeners, Callable[[], None]]]] = dict()
+        self._cyclic_routes: Set[Route] = set()  # Routes left out of the graph, as they close a cycle
 
-        # Create render processes
+        data.routes.add_on_change_listener(self.recalculate_routes)
+        data.router_components.add_on_change_listener(self.on_components_change)
+        data.frozen_nodes.add_on_change_listener(self.on_frozen_change)
+        self.on_components_change()
+        self.recalculate_routes()
+
+        # The spans of the clips in the timeline, and the data objects we listen to for edits of them
+        self._spans = clip_spans()
+        self._timeline_watched: List[HasOnChangeListeners] = []
+        self._watch_timeline()
+
+        # Create render processes (last, so nothing above can fail with them left running;
+        # tasks dispatched in the meantime wait in their queues)
         self._render_processes: List[mp.Process] = []
-        for n in range(mp.cpu_count()):
+        for n in range(self._queue.workers):
             p = mp.Process(target=Renderer.render_loop,
-                           args=(self._queue,),
+                           args=(n, self._queue, self._results, self._cache, self._stats),
                            name=f"Renderer {len(self._render_processes)}")
             p.start()
             self._render_processes.append(p)
 
-        data.routes.add_on_change_listener(self.recalculate_routes)
-        self.recalculate_routes()
-
-    def render_master(self, start: int, samples: int) -> Tuple[np.ndarray, np.ndarray]:
-
-        # Wait for render queue
-        while not self._queue.done:
-            time.sleep(0.01)
-
-        master_ids: Set[int] = set()
-        for comp_id in data.router_components:
-            comp_data = data.router_components[comp_id].component_data
-            if isinstance(comp_data, MasterOutputData):
-                master_ids.add(comp_id)
-
-        master_nodes: Set[Node] = set()
-        for route in self._routes:
-            if route.to_node.id in master_ids:
-                master_nodes.add(route.to_node)
-
-        all_results: Dict[Node, Signal] = self._queue.results.get()
-        self._queue.results.put(all_results)
-
-        result = Signal.sum(all_results[n] for n in master_nodes if n in all_results)
+        # Pass completed tasks from the render processes to the scheduler
+        self._completion_thread = threading.Thread(target=self.completion_loop, daemon=True)
+        self._completion_thread.start()
+
+    def render_master(self, start: int, samples: int, timeout: float = None) -> \
+            Union[Tuple[np.ndarray, np.ndarray], None]:
+        # Render the master output, waiting for it to be rendered. If a timeout
+        # (in seconds) is given, returns None if rendering takes longer than that.
+        master_nodes = self.master_nodes()
+
+        # Request the chunks we need, and wait for them to be rendered (reading them before anything
+        # can forget them; nodes that have gone from the graph in the meantime are left out)
+        chunks = self.request_master(start, samples)
+        try:
+            result = self._scheduler.read(
+                master_nodes, chunks, lambda: Signal.mix_into(Signal(samples), (
+                    self._results.read_range(n, start, samples) for n in master_nodes
+                    if self._scheduler.has_node(n))), timeout)
+            if result is None:
+                return None
+        finally:
+            self._scheduler.release(chunks)
 
         if result.samples != samples:
 
@@ -63,280 +119,581 @@ class Renderer(Singleton):
             for node in master_nodes:
                 master_nodes_info += f"    Master node {node}\n"
 
-            results_info = ""
-            for node in all_results:
-                results_info += f"    Node {node}\n"
-
             raise Exception(f"Unexpected number of samples in master result\n"
-                            f"Master nodes:\n{master_nodes_info}"
-                            f"Rendered nodes:\n{results_info}")
+                            f"Master nodes:\n{master_nodes_info}")
 
         return result[0], result[1]
 
+    def request_master(self, start: int, samples: int) -> range:
+        # Ask for the master output to be rendered, without waiting for it
+        chunks = Renderer.chunks_of(start, samples)
+        self._scheduler.request(chunks)
+        return chunks
+
+    def release_master(self, start: int, samples: int):
+        # Let go of master output requested with request_master (with the same arguments)
+        self._scheduler.release(Renderer.chunks_of(start, samples))
+
+    def set_playhead(self, sample: int):
+        # Render what is about to be played first
+        self._scheduler.set_playhead(sample // Renderer.CHUNK_SIZE)
+
+    def meter(self, node: Node, sample_range: SampleRange) -> Levels:
+        """
+        Read the levels of a node, as measured when it was rendered, without touching
+        its samples (so this is cheap enough to poll for every frame of a level meter).
+        :param node: A node that is rendered on its own (nodes folded into the nodes
+                     they feed, see RenderPlan, have no results, so no levels, of their own).
+        :param sample_range: The samples to measure, rounded out to whole chunks.
+        :return: The levels over the chunks of the range that have been rendered.
+        """
+        first, end = chunk_range(sample_range, Renderer.CHUNK_SIZE)
+        return self._results.levels(node, first, end)
+
+    def waveform(self, node: Node, sample_range: SampleRange, pixels: int) -> Waveform:
+        """
+        Draw the waveform of a node, from a min/max pyramid over its results, reading
+        a few bins per pixel whatever the zoom (see WaveformPyramid), or the samples
+        themselves when zoomed in to less than a chunk per pixel.
+        :param node: A node that is rendered on its own (see meter).
+        :param sample_range: The samples to draw (with an end).
+        :param pixels: The number of pixels to draw the samples across.
+        :return: The waveform, NaN wherever nothing has been rendered yet.
+        """
+        start, end = sample_range
+        if end - start < pixels * Renderer.CHUNK_SIZE:
+            first, last = chunk_range(sample_range, Renderer.CHUNK_SIZE)
+            mins = np.full(((last - first) * Renderer.CHUNK_SIZE, ResultStore.CHANNELS), np.inf, dtype=np.float32)
+            maxs = np.full_like(mins, -np.inf)
+            for chunk in range(first, last):
+                if self._results.has(node, chunk):
+                    rows = slice((chunk - first) * Renderer.CHUNK_SIZE, (chunk - first + 1) * Renderer.CHUNK_SIZE)
+                    signal = self._results.read(node, chunk)
+                    for c in range(ResultStore.CHANNELS):
+                        mins[rows, c] = maxs[rows, c] = signal[c] if c in signal else 0
+            return WaveformPyramid.reduce(mins, maxs, first * Renderer.CHUNK_SIZE, 1, start, end, pixels)
+
+        with self._waveforms_lock:
+            if node not in self._waveforms:
+                self._waveforms[node] = WaveformPyramid(Renderer.CHUNK_SIZE, ResultStore.CHANNELS,
+                                                        lambda f, e: self._results.extremes(node, f, e))
+            return self._waveforms[node].waveform(start, end, pixels)
+
+    def stats(self) -> List[ChunkStats]:
+        """
+        :return: Metrics of the most recently rendered chunks, in the order they were started.
+        """
+        return self._stats.records()
+
+    def write_trace(self, filename: str):
+        # Write the metrics out in the Chrome trace event format
+        with open(filename, "w") as f:
+            json.dump(chrome_trace(self.stats()), f)
+
+    def freeze(self, node: Node, samples: int = None, timeout: float = None) -> bool:
+        """
+        Freeze a node (see start_freeze), waiting for it to be frozen.
+        :param node: A node of the routing graph.
+        :param samples: How many samples to render (see start_freeze).
+        :param timeout: How long (in seconds) to wait, if there is a limit. The node
+                        is left as it was if it takes longer than that.
+        :return: Whether the node was frozen.
+        """
+        job = self.start_freeze(node, samples)
+        if not job.wait(timeout):
+            job.cancel()
+            job.wait()
+        return self.finish_freeze(job)
+
+    def start_freeze(self, node: Node, samples: int = None) -> FreezeJob:
+        """
+        Start rendering the whole output of a node once, into a raw float32 file next to the
+        project file, in the background. Once it is done (see FreezeJob), finish_freeze reads
+        the node from that file from then on, rather than rendering it (or anything upstream
+        of it that nothing else needs). Edits upstream of a frozen node don't affect it until
+        it is unfrozen.
+        :param node: A node of the routing graph.
+        :param samples: How many samples to render (by default, up to the end of the last
+                        clip, rounded up to whole chunks). Past that, the node is silent.
+        :return: The job freezing the node.
+        """
+        if node not in self._graph.parents:
+            raise Exception(f"Tried to freeze node {node}, which isn't in the routing graph")
+        self.unfreeze(node)
+        if samples is None:
+            samples = max((span.end for spans in self._spans.values() for span in spans), default=0)
+        chunks = range(0, max(samples - 1, 0) // Renderer.CHUNK_SIZE + 1)
+
+        # (Any job that was already freezing the node is given up on)
+        for job in self._freeze_jobs:
+            if job.node == node:
+                job.cancel()
+
+        # Render the node on its own (rather than folded into what it feeds, while it is being frozen)
+        file = os.path.join(Renderer.FROZEN_DIRECTORY, f"{node.id}_{uuid.uuid4().hex}.f32")
+        job = FreezeJob(node, chunks, ProjectData.path(file), self._scheduler, self._results)
+        self._freeze_jobs[job] = file
+        self._apply_invalidation(set(), set())
+        self._scheduler.request(chunks)
+        job.start()
+        return job
+
+    def finish_freeze(self, job: FreezeJob) -> bool:
+        """
+        Read a node from the file it has been frozen into, once its job is done (or throw the
+        file away, if the job was cancelled). Call this from the thread that owns the project data.
+        :param job: A job started by start_freeze, that is done.
+        :return: Whether the node was frozen.
+        """
+        if not job.done:
+            raise Exception(f"Tried to finish freezing node {job.node} before it was rendered")
+        file = self._freeze_jobs.pop(job)
+        self._scheduler.release(job.chunks)
+        if job.error is not None:
+            self._apply_invalidation(set(), set())
+            raise Exception(f"Freezing node {job.node} failed:\n{job.error}")
+        if job.cancelled:
+            if os.path.isfile(job.path):
+                os.remove(job.path)
+            self._apply_invalidation(set(), set())
+            return False
+
+        frozen = FrozenNodeData()
+        frozen.component.value = job.node.id
+        frozen.node.value = job.node.node
+        frozen.file.value = file
+        frozen.channels.value = job.channels
+        data.frozen_nodes.add(frozen)
+        return True
+
+    def unfreeze(self, node: Node):
+        """
+        Go back to rendering a frozen node, and delete the file it was frozen into.
+        :param node: A node (nothing happens if it isn't frozen).
+        """
+        unfrozen = [f for f in data.frozen_nodes if Node(f.component.value, f.node.value) == node]
+        if len(unfrozen) == 0:
+            return
+        data.frozen_nodes.remove(unfrozen)
+        for f in unfrozen:
+            if os.path.isfile(ProjectData.path(f.file.value)):
+                os.remove(ProjectData.path(f.file.value))
+
+    def is_frozen(self, node: Node) -> bool:
+        return node in self._frozen
+
+    def master_nodes(self) -> Set[Node]:
+        # (As of the last change to the graph, so that they can be read from any thread)
+        return set(self._master_nodes)
+
     def recalculate_routes(self):
 
         # Get the new set of routes from data
-        routes: Set[Route] = {Route(
-            Node(r.from_component.value, r.from_node.value),
-            Node(r.to_component.value, r.to_node.value)
-        ) for r in data.routes}
-
-        # Get the new set of nodes from data
-        output_nodes: Set[Node] = {r.from_node for r in routes}
-        input_nodes: Set[Node] = {r.to_node for r in routes}
-        nodes: Set[Node] = output_nodes.union(input_nodes)
-        old_nodes = {r.from_node for r in self._routes}.union({r.to_node for r in self._routes})
-
-        # Work out the parent/child structure
-        parents, children = Renderer.get_parent_dictionary(routes)
-        old_parents, old_children = Renderer.get_parent_dictionary(self._routes)
-
-        # Work out nodes that have been added/removed
-        added_nodes = nodes - old_nodes
-        removed_nodes = old_nodes - nodes
-        added_routes = routes - self._routes
-        removed_routes = self._routes - routes
-
-        # Work out nodes that have been invalidated by this change
-        invalidated_nodes: Set[Node] = removed_nodes.union(added_nodes)
-
-        # Nodes that are downstream of new routes are invalidated
-        for route in added_routes:
-            invalidated_nodes = invalidated_nodes.union(
-                Renderer.downstream_nodes(route.to_node, children))
-
-        # Nodes that were downstream of deleted routes are invalidated
-        for route in removed_routes:
-            invalidated_nodes = invalidated_nodes.union(
-                Renderer.downstream_nodes(route.to_node, old_children))
-
-        # Nodes that are downstream of new nodes are invalidated
-        for node in added_nodes:
-            invalidated_nodes = invalidated_nodes.union(
-                Renderer.downstream_nodes(node, children))
-
-        # Nodes that were downstream of deleted nodes are invalidated
-        for node in removed_nodes:
-            invalidated_nodes = invalidated_nodes.union(
-                Renderer.downstream_nodes(node, old_children))
-
-        # Nodes that are currently in the render queue are invalidated
-        # (so that previously-queued render jobs are not forgotten about)
-        invalidated_nodes = invalidated_nodes.union(self._queue.remaining)
-        self._queue.node_order = []  # Clear the queue
-
-        # Remove any invalid results
-        results = self._queue.results.get()
-        for n in invalidated_nodes:
-            if n in results:
-                results.pop(n)
-        self._queue.results.put(results)
-
-        # Get component types
-        dtypes: Dict[int, str] = dict()
+        old_routes = set(self._graph.routes)
+        old_nodes = set(self._graph.parents)
+        routes = Renderer.routes_from_data()
+
+        # Apply the changes to the routing graph, and work out the render order. Routes
+        # that close a cycle can't be rendered: they are left out (a route of each cycle,
+        # preferably a new one), and reported through cyclic_routes, rather than raised
+        # (this is called from data listeners, which have no one to raise to).
+        cyclic: Set[Route] = set()
+        invalidated_nodes: Set[Node] = set()
+        while True:
+            invalidated_nodes |= self._graph.update(routes - cyclic)[2]
+            try:
+                order = self._graph.render_order()
+                break
+            except RoutingCycleException as e:
+                cyclic.add(Renderer.cycle_route(e.cycle, self._graph.routes, old_routes))
+
+        self._cyclic_routes = cyclic
+        self._order = order
+        nodes = set(self._graph.parents)
+        self._apply_invalidation(invalidated_nodes & nodes, old_nodes - nodes)
+
+    def cyclic_routes(self) -> Set[Route]:
+        """
+        :return: The routes that are left out of rendering, as they would close a cycle.
+        """
+        return set(self._cyclic_routes)
+
+    def invalidate(self, ranges: Dict[Node, List[SampleRange]]):
+        """
+        Forget the results of the given ranges of samples of the given nodes, and of
+        everything downstream that they affect, so that they are rendered again.
+        Results for all other samples are kept. Changes stop at frozen nodes.
+        :param ranges: Dictionary of node -> ranges of samples of the node that have changed.
+        """
+        children = {n: self._graph.children[n] if n not in self._frozen else set() for n in self._order}
+        affected = Renderer.propagate_ranges(ranges, self._order, children,
+                                             {n: self._specs[n].tail for n in self._specs})
+        chunk_ranges = {n: [chunk_range(r, Renderer.CHUNK_SIZE) for r in affected[n]] for n in affected}
+        with self._scheduler.batch():
+            self._scheduler.invalidate_chunks(chunk_ranges)
+            for n in chunk_ranges:
+                for first, end in chunk_ranges[n]:
+                    self._results.invalidate(n, first, end)
+                    self._waveform_changed(n, first, end)
+
+    def on_timeline_change(self):
+        # Clips or notes have been edited, only re-render the tracks
+        # where they have changed, over the samples that have changed
+        self._unwatch_timeline()
+        self._watch_timeline()
+        spans = clip_spans()
+        track_ranges = changed_ranges(self._spans, spans)
+        self._spans = spans
+        if len(track_ranges) == 0:
+            return
+
+        # Republish the notes of those tracks (which changes the render parameters of the
+        # track signals that play them), keeping the results of everything else
+        note_index().update(track_ranges)
+        self._apply_invalidation(set(), set())
+
+        ranges: Dict[Node, List[SampleRange]] = dict()
         for comp_id in data.router_components:
-            dtypes[comp_id] = data.router_components[comp_id].datatype.value
-
-        # Update node types
-        ntypes = self._queue.node_types.get()
-        for n in output_nodes:
-            ntypes[n] = f"{dtypes[n.id]}.output"
-        for n in input_nodes:
-            ntypes[n] = f"{dtypes[n.id]}.input"
-
-        # Update render order
-        order = [n for n in Renderer.render_order(parents) if n in invalidated_nodes]
-
-        self._queue.parents = parents
-        self._queue.node_types.put(ntypes)
-        self._queue.invalidate_after(0)
-        self._queue.node_order = order
-
-        # Update self
-        self._routes = routes
+            comp_data = data.router_components[comp_id].component_data
+            if isinstance(comp_data, TrackSignalData) and comp_data.track.value in track_ranges:
+                for n in self._graph.component_outputs(comp_id):
+                    ranges[n] = track_ranges[comp_data.track.value]
+        if len(ranges) > 0:
+            self.invalidate(ranges)
+
+        # Tasks still using the old notes are out of date now
+        note_index().collect()
+
+    def on_components_change(self):
+        # Watch the render parameters of new components (and of components whose
+        # data has been replaced), and stop watching components that are gone
+        for comp_id in list(self._watched):
+            if comp_id not in data.router_components or \
+                    data.router_components[comp_id].component_data is not self._watched_data[comp_id]:
+                self._unwatch_component(comp_id)
+        for comp_id in data.router_components:
+            if comp_id not in self._watched:
+                self._watch_component(comp_id)
+
+    def on_component_change(self, comp_id: int):
+        # A render parameter (or the type) of a component has changed, so everything that
+        # the component's outputs feed into needs to be rendered again. Position, and any
+        # other parameters that don't affect rendering, aren't watched, so never get here.
+        if data.router_components[comp_id].component_data is not self._watched_data[comp_id]:
+            self._unwatch_component(comp_id)
+            self._watch_component(comp_id)
+
+        invalidated: Set[Node] = set()
+        for n in self._graph.component_outputs(comp_id):
+            invalidated.update(self._live_downstream(n))
+        if len(invalidated) > 0:
+            self._apply_invalidation(invalidated, set())
+
+    def on_frozen_change(self):
+        # Nodes have been frozen or unfrozen: what they feed has to be
+        # rendered again (from the file they were frozen into, or live)
+        frozen = Renderer.frozen_from_data()
+        changed = {n for n in set(frozen) | set(self._frozen) if frozen.get(n) != self._frozen.get(n)}
+        self._frozen = frozen
+
+        invalidated: Set[Node] = set()
+        for n in changed:
+            if n in self._graph.parents:
+                invalidated.update(self._graph.downstream(n))
+        self._apply_invalidation(invalidated, set())
+
+    def completion_loop(self):
+        while True:
+            completed = self._queue.completed.get()
+            if completed is None:
+                break
+            self._scheduler.complete(*completed)
 
     def on_clear_singleton_instance(self):
-        self._queue.killed = True
+        for job in self._freeze_jobs:
+            job.cancel()
+            job.wait()
+            if os.path.isfile(job.path):
+                os.remove(job.path)
+        data.routes.remove_on_change_listener(self.recalculate_routes)
+        data.router_components.remove_on_change_listener(self.on_components_change)
+        data.frozen_nodes.remove_on_change_listener(self.on_frozen_change)
+        for comp_id in list(self._watched):
+            self._unwatch_component(comp_id)
+        self._unwatch_timeline()
+
+        self._queue.kill()
         for p in self._render_processes:
             p.join()
+        self._queue.completed.put(None)
+        self._completion_thread.join()
+        RenderQueue.clear_instance()
+
+        for node in self._graph.parents:
+            self._results.release(node)
+        self._results.close()
+        self._stats.close()
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _apply_invalidation(self, invalidated_nodes: Set[Node], removed_nodes: Set[Node]):
+
+        # Compile the tasks to render (the specs have changed if parameters have)
+        self._specs = Renderer.node_specs(self._graph, self._order)
+        self._master_nodes = Renderer.find_master_nodes(self._graph.routes)
+        order, parents, plan = compile_plans(self._order, self._graph.parents, self._specs,
+                                             self._master_nodes | {job.node for job in self._freeze_jobs})
+        folded = set(self._plan) - set(plan) - removed_nodes
+        self._plan = plan
+
+        # Update the scheduler, then (in the same batch, so before anything is rendered again)
+        # remove any invalid results, and free the memory used by nodes that are gone, or that
+        # are now folded into others
+        with self._scheduler.batch():
+            self._scheduler.set_graph(parents, order, plan)
+            self._scheduler.invalidate(invalidated_nodes)
+            for n in invalidated_nodes:
+                self._results.invalidate(n)
+                self._waveform_changed(n, 0)
+            for n in removed_nodes | folded:
+                self._results.release(n)
+                self._drop_waveform(n)
+
+    def _waveform_changed(self, node: Node, first: Chunk, end: Union[Chunk, None] = None):
+        # Chunks of a node have been rendered or forgotten
+        with self._waveforms_lock:
+            if node in self._waveforms:
+                self._waveforms[node].changed(first, end)
+
+    def _drop_waveform(self, node: Node):
+        with self._waveforms_lock:
+            self._waveforms.pop(node, None)
+
+    def _live_downstream(self, node: Node) -> Set[Node]:
+        # The node, and the nodes downstream of it that changes to it reach
+        # (which is all of them, except past a frozen node)
+        result: Set[Node] = set()
+        stack = [node] if node in self._graph.parents else []
+        while len(stack) > 0:
+            n = stack.pop()
+            if n not in result:
+                result.add(n)
+                if n not in self._frozen:
+                    stack.extend(self._graph.children[n])
+        return result
+
+    def _watch_component(self, comp_id: int):
+        wrapper = data.router_components[comp_id]
+        listener = lambda: self.on_component_change(comp_id)
+        watched = [wrapper.datatype] + wrapper.component_data.render_parameter_objects()
+        for obj in watched:
+            obj.add_on_change_listener(listener)
+        self._watched_data[comp_id] = wrapper.component_data
+        self._watched[comp_id] = [(obj, listener) for obj in watched]
+
+    def _unwatch_component(self, comp_id: int):
+        for obj, listener in self._watched.pop(comp_id):
+            obj.remove_on_change_listener(listener)
+        self._watched_data.pop(comp_id)
+
+    def _watch_timeline(self):
+        self._timeline_watched = timeline_objects()
+        for obj in self._timeline_watched:
+            obj.add_on_change_listener(self.on_timeline_change)
+
+    def _unwatch_timeline(self):
+        for obj in self._timeline_watched:
+            obj.remove_on_change_listener(self.on_timeline_change)
+        self._timeline_watched = []
 
     ################
     # STATIC STUFF #
     ################
 
     @staticmethod
-    def get_parent_dictionary(routes: Set[Route]) -> \
-            Tuple[Dict[Node, Set[Node]], Dict[Node, Set[Node]]]:
-        # Get the new set of nodes from data
-        output_nodes: Set[Node] = {r.from_node for r in routes}
-        input_nodes: Set[Node] = {r.to_node for r in routes}
-        nodes: Set[Node] = output_nodes.union(input_nodes)
-
-        # Work out the parent structure
-        parents: Dict[Node, Set[Node]] = {n: set() for n in nodes}
-
-        # Inter-component parenting
-        for r in routes:
-            parents[r.to_node].add(r.from_node)
-
-        # Intra-component parenting
-        for input_node in input_nodes:
-            for output_node in output_nodes:
-                if input_node.id == output_node.id:
-                    parents[output_node].add(input_node)
-
-        # Get children dictionary
-        children: Dict[Node, Set[Node]] = {n: set() for n in nodes}
-        for n in nodes:
-            for p in parents[n]:
-                children[p].add(n)
-
-        return parents, children
+    def chunks_of(start: int, samples: int) -> range:
+        # The chunks holding the given samples
+        return range(start // Renderer.CHUNK_SIZE, (start + samples - 1) // Renderer.CHUNK_SIZE + 1)
 
     @staticmethod
-    def render_order(parents: Dict[Node, Set[Node]]) -> List[Node]:
+    def routes_from_data() -> Set[Route]:
+        return {Renderer.route_from_data(r) for r in data.routes}
 
-        # Initially sort by number of parents
-        order = list(parents)
-        order.sort(key=lambda n: len(parents[n]))
+    @staticmethod
+    def route_from_data(r: RouterRouteData) -> Route:
+        return Route(Node(r.from_component.value, r.from_node.value), Node(r.to_component.value, r.to_node.value))
 
-        def dependence_compare(node_left, node_right):
-            if node_left in Renderer.upstream_nodes(node_right, parents):
-                return -1
-            if node_right in Renderer.upstream_nodes(node_left, parents):
-                return 1
-            return 0
+    @staticmethod
+    def cycle_route(cycle: List[Node], routes: Set[Route], old_routes: Set[Route]) -> Route:
+        # A route along the given cycle (each node a parent of the next), to break it
+        # by leaving out. A route that was just added is preferred, so what was being
+        # rendered before an edit that closes a cycle carries on being rendered.
+        edges = [Route(a, b) for a, b in zip(cycle, cycle[1:] + cycle[:1])]
+        return max((r for r in edges if r in routes), key=lambda r: (r not in old_routes, r))
 
-        # Sort by dependence, so that nodes appear
-        # after all other nodes that they depend upon
-        order.sort(key=cmp_to_key(dependence_compare))
-        return order
+    @staticmethod
+    def frozen_from_data() -> Dict[Node, Frozen]:
+        # (Nodes whose file has gone missing are rendered live)
+        frozen = {Node(f.component.value, f.node.value): Frozen(ProjectData.path(f.file.value), f.channels.value)
+                  for f in data.frozen_nodes}
+        return {n: frozen[n] for n in frozen if os.path.isfile(frozen[n].path)}
 
     @staticmethod
-    def upstream_nodes(node: Node, parents: Dict[Node, Set[Node]]) -> Set[Node]:
+    def find_master_nodes(routes: Set[Route]) -> Set[Node]:
 
-        upstream_nodes = set(parents[node])
-        upstream_nodes.add(node)
-        while True:
-            length_before = len(upstream_nodes)
-            for p in list(upstream_nodes):
-                upstream_nodes = upstream_nodes.union(parents[p])
-            if len(upstream_nodes) == length_before:
-                break
+        master_ids: Set[int] = set()
+        for comp_id in data.router_components:
+            comp_data = data.router_components[comp_id].component_data
+            if isinstance(comp_data, MasterOutputData):
+                master_ids.add(comp_id)
 
-        return upstream_nodes
+        master_nodes: Set[Node] = set()
+        for route in routes:
+            if route.to_node.id in master_ids:
+                master_nodes.add(route.to_node)
+
+        return master_nodes
 
     @staticmethod
-    def downstream_nodes(node: Node, children: Dict[Node, Set[Node]]) -> Set[Node]:
+    def propagate_ranges(ranges: Dict[Node, List[SampleRange]], order: List[Node],
+                         children: Dict[Node, Set[Node]],
+                         tails: Dict[Node, Union[int, None]]) -> Dict[Node, List[SampleRange]]:
+        # Work out which samples of which nodes are affected by changes to the given
+        # samples of the given nodes: changes flow downstream, carrying on for the
+        # tail of each node that they pass through (forever, for stateful nodes)
+        affected: Dict[Node, List[SampleRange]] = {n: list(ranges[n]) for n in ranges}
+        for n in order:
+            if n not in affected:
+                continue
+            affected[n] = merge_ranges([extend_range(r, tails.get(n)) for r in affected[n]])
+            for c in children[n]:
+                affected.setdefault(c, []).extend(affected[n])
+        return {n: affected[n] for n in order if n in affected}
 
-        downstream_nodes = children[node]
-        downstream_nodes.add(node)
-        while True:
-            len_before = len(downstream_nodes)
-            for dn in downstream_nodes:
-                downstream_nodes = downstream_nodes.union(children[dn])
-            if len(downstream_nodes) == len_before:
-                break
+    @staticmethod
+    def node_specs(graph: RoutingGraph, order: List[Node]) -> Dict[Node, NodeSpec]:
 
-        return downstream_nodes
+        # Get component types and render parameters
+        dtypes: Dict[int, str] = dict()
+        params: Dict[int, dict] = dict()
+        for comp_id in data.router_components:
+            dtypes[comp_id] = data.router_components[comp_id].datatype.value
+            params[comp_id] = data.router_components[comp_id].component_data.render_parameters()
+
+        inout: Dict[Node, str] = dict()
+        purities: Dict[Node, str] = dict()
+        tails: Dict[Node, Union[int, None]] = dict()
+        routings: Dict[Node, Union[Routing, None]] = dict()
+        for n in graph.output_nodes:
+            inout[n] = "output"
+            purities[n] = renderer_purity(dtypes[n.id])
+            tails[n] = renderer_tail(dtypes[n.id])
+            routings[n] = renderer_routing(dtypes[n.id], n.node)
+        for n in graph.input_nodes:
+            inout[n] = "input"
+            purities[n] = ComponentRenderer.TIME_INVARIANT
+            tails[n] = 0
+            routings[n] = None
+
+        # Work out what the workers need to know about each node
+        parents = graph.parents
+        frozen = Renderer.frozen_from_data()
+        keys = content_keys(order, parents, inout, {n: dtypes[n.id] for n in order},
+                            {n: params[n.id] for n in order}, purities, Renderer.CHUNK_SIZE, frozen)
+        return {n: NodeSpec(dtypes[n.id], inout[n], tuple(parents[n]), purities[n], keys[n],
+                            params[n.id] if inout[n] == "output" else None, tails[n], routings[n],
+                            frozen=frozen.get(n))
+                for n in order}
 
     #####################
     # RENDERING PROCESS #
     #####################
 
     CHUNK_SIZE = 256  # How many samples for a chunk
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "jackdaw", "render_cache.sqlite")
+    FROZEN_DIRECTORY = "frozen"  # Where frozen nodes are kept, next to the project file
 
     @staticmethod
-    def render_loop(queue: RenderQueue):
-
-        while not queue.killed:
+    def render_loop(worker: int, queue: RenderQueue, results: ResultStore, cache: RenderCache,
+                    stats: RenderStats):
 
-            time.sleep(0.01)
-
-            # Get the next node to render
-            next = queue.next()
-            if next is None:
-                continue
-
-            chunk, node = next
-            Renderer.node_render_loop(chunk, node, queue)
-
-        print("Render process finished")
-
-    @staticmethod
-    def node_render_loop(chunk: Chunk, node: Node, queue: RenderQueue):
+        # The renderers kept alive by this worker
+        renderers = RendererCache()
 
-        print(f"Started rendering {node.id}.{node.node} (chunk {chunk})")
-
-        while not queue.killed:
-
-            # Get parents of the node to render
-            parents = queue.parents
+        while True:
 
-            if node not in parents:
-                return  # This node no longer exists, so no need to render
+            # Wait for the next task
+            task: Union[RenderTask, ReleaseTask] = queue.tasks[worker].get()
+            if task is None:
+                break
 
-            # Query the results queue
-            all_results = queue.results.get()
-            queue.results.put(all_results)
+            if isinstance(task, ReleaseTask):
+                renderers.release(task.node)
+                continue
 
-            # Get results for the parents
-            parent_results: Dict[Node, Union[Signal, None]] = dict()
-            for p in parents[node]:
-                if p in all_results:
-                    parent_results[p] = all_results[p]
-                else:
-                    parent_results[p] = None
+            error = None
+            silent = False
+            started = time.perf_counter()
+            try:
+                result, cached = Renderer.render_node(task, results, renderers, cache)
+                stats.record(worker, task, started, time.perf_counter(), result.nbytes, cached)
+                silent = result.silent
+            except Exception:
+                error = traceback.format_exc()
 
-            if any(parent_results[p] is None for p in parent_results):
-                # Some parents are un-rendered,
-                # wait for a bit, then try again.
-                time.sleep(0.01)
-                continue
+            queue.completed.put((worker, task.node, task.chunk, task.version, error, silent))
 
-            # Render the node
-            Renderer.render_node(chunk, node, parent_results, queue)
-            break
+        renderers.release_all()
+        results.close()
+        cache.close()
+        stats.close()
 
     @staticmethod
-    def render_node(chunk: Chunk,
-                    node: Node,
-                    parent_results: Dict[Node, Signal],
-                    queue: RenderQueue):
+    def render_node(task: RenderTask, results: ResultStore, renderers: RendererCache,
+                    cache: RenderCache = None) -> Tuple[Signal, bool]:
+        # Render a chunk of a node into the results. Returns
+        # the result, and whether it came from the cache
 
-        # Ensure parents are properly rendered
-        assert all(parent_results[p] is not None for p in parent_results)
+        # Get (shared-memory views of) results for the parents
+        # (the scheduler guarantees that these have been rendered)
+        node, chunk = task.node, task.chunk
+        start = chunk * Renderer.CHUNK_SIZE
+        parent_results: Dict[Node, Signal] = {p: results.read(p, chunk) for p in task.spec.parents}
 
-        # Get node type
-        ntypes: Dict[Node, str] = queue.node_types.get()
-        queue.node_types.put(ntypes)
-        if node not in ntypes:
-            return  # Node has been deleted, no need to render
+        if task.spec.frozen is not None:
 
-        dtype, inout = ntypes[node].split(".")
+            # Read frozen nodes from the file they were frozen into
+            result = read_frozen(task.spec.frozen, start, Renderer.CHUNK_SIZE)
+            results.write(node, chunk, result)
+            return result, False
 
-        if inout == "input":
+        elif task.spec.inout == "input":
 
-            # Simply sum contributions to input nodes
-            result = Signal.sum(parent_results[p] for p in parent_results)
-            results = queue.results.get()
-            results[node] = result
-            queue.results.put(results)
+            # Simply sum contributions to input nodes (straight into the result store)
+            inputs = run_plan(task.spec, parent_results, start, Renderer.CHUNK_SIZE)
+            return results.mix(node, chunk, (signal for _, signal in inputs)), False
 
         else:
 
-            # Create the renderer
-            renderer: Union[ComponentRenderer, None] = None
-            for c in RouterComponentData.__subclasses__():
-                if c.__name__ == dtype:
-                    renderer = c().create_component_renderer()
-            assert renderer is not None
+            # See if we've rendered exactly this before
+            if cache is not None and task.spec.key != "":
+                cached = cache.get(task.spec.key, chunk)
+                if cached is not None:
+                    results.write(node, chunk, cached)
+                    return cached, True
 
-            # Render
-            input_results: Dict[str, Signal] = {p.node: parent_results[p] for p in parent_results}
+            # Get the (live) renderer for this node
+            renderer = renderers.get(task)
 
-            result = renderer.render(node.node, chunk * Renderer.CHUNK_SIZE,
-                                     Renderer.CHUNK_SIZE, input_results)
+            # Render (gathering the inputs, and working out the nodes folded into this one)
+            input_results: Dict[str, Signal] = dict(run_plan(task.spec, parent_results, start,
+                                                                   Renderer.CHUNK_SIZE))
+
+            rendering = time.perf_counter()
+            result = renderer.render(node.node, start, Renderer.CHUNK_SIZE, input_results)
+            render_time = time.perf_counter() - rendering
 
             if result.samples != Renderer.CHUNK_SIZE:
 
@@ -350,12 +707,8 @@ class Renderer(Singleton):
                                 f"{Renderer.CHUNK_SIZE}\n"
                                 f"{input_info}")
 
-            results = queue.results.get()
-            if node not in results:
-                assert chunk == 0
-                results[node] = result
-            else:
-                results[node].insert(result, chunk * Renderer.CHUNK_SIZE)
-            queue.results.put(results)
-
-        print(f"Rendered {node.id}.{node.node} ({dtype}.{inout}, chunk {chunk})")
+            results.write(node, chunk, result)
+            # (Chunks that are quicker to render again than to look up aren't worth keeping)
+            if cache is not None and task.spec.key != "" and render_time >= RenderCache.MIN_RENDER_TIME:
+                cache.put(task.spec.key, chunk, result)
+            return result, False
@@ -0,0 +1,135 @@
+import jackdaw.Components  # Registers the component data types
+from typing import Dict, Type, Union
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Typedefs import *
+
+
+class LiveRenderer:
+
+    def __init__(self, renderer: ComponentRenderer, datatype: str, parameters: Union[dict, None] = None):
+        """
+        A renderer kept alive by a worker, along with what it needs
+        to know to decide if the renderer's state is still valid.
+        :param renderer: The component renderer.
+        :param datatype: The component datatype that the renderer was created for.
+        :param parameters: The render parameters that the renderer was created with.
+        """
+        self.renderer = renderer
+        self.datatype = datatype
+        self.parameters = parameters
+        self.version: Union[int, None] = None
+        self.next_chunk: Union[Chunk, None] = None
+
+
+# The renderers that a worker process keeps alive, one per
+# node, so they can carry state from one chunk to the next.
+class RendererCache:
+
+    def __init__(self):
+        self._live: Dict[Node, LiveRenderer] = dict()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def get(self, task: RenderTask) -> ComponentRenderer:
+        """
+        Get the renderer for the node of the given task, creating
+        it if need be, and resetting it if its state is stale.
+        :param task: The task about to be rendered.
+        :return: A renderer, ready to render the task.
+        """
+        live = self._live.get(task.node)
+        if live is not None and (live.datatype != task.spec.datatype or
+                                 live.parameters != task.spec.parameters):
+            self.release(task.node)  # The component has changed type or parameters
+            live = None
+
+        if live is None:
+            component_data = component_data_type(task.spec.datatype)()
+            if task.spec.parameters is not None:
+                component_data.deserialize(task.spec.parameters)
+            renderer = component_data.create_component_renderer()
+            live = LiveRenderer(renderer, task.spec.datatype, task.spec.parameters)
+            live.renderer.prepare()
+            self._live[task.node] = live
+        elif live.version != task.version:
+            live.renderer.reset()
+        elif live.next_chunk != task.chunk and live.renderer.purity == ComponentRenderer.STATEFUL:
+            live.renderer.reset()
+
+        live.version = task.version
+        live.next_chunk = task.chunk + 1
+        return live.renderer
+
+    def release(self, node: Node) -> None:
+        live = self._live.pop(node, None)
+        if live is not None:
+            live.renderer.release()
+
+    def release_all(self) -> None:
+        for node in list(self._live):
+            self.release(node)
+
+
+_component_data_types: Dict[str, Type[RouterComponentData]] = dict()
+_purities: Dict[str, str] = dict()
+_tails: Dict[str, Union[int, None]] = dict()
+_routings: Dict[str, Union[Dict[str, Routing], None]] = dict()
+
+
+def component_data_type(datatype: str) -> Type[RouterComponentData]:
+    """
+    :param datatype: The name of a component data type.
+    :return: The component data type with that name.
+    """
+    if datatype not in _component_data_types:
+        for c in RouterComponentData.__subclasses__():
+            if c.__name__ == datatype:
+                _component_data_types[datatype] = c
+
+    if datatype not in _component_data_types:
+        raise Exception(f"Unknown component datatype \"{datatype}\"")
+
+    return _component_data_types[datatype]
+
+
+def renderer_purity(datatype: str) -> str:
+    """
+    :param datatype: The name of a component data type.
+    :return: The purity of the renderer for that type of component. This is
+             ComponentRenderer.STATEFUL (the safe choice) if the renderer can't
+             be created, in which case the worker will report why when it tries.
+    """
+    if datatype not in _purities:
+        try:
+            renderer = component_data_type(datatype)().create_component_renderer()
+            _purities[datatype] = renderer.purity
+            _tails[datatype] = None if renderer.purity == ComponentRenderer.STATEFUL else renderer.tail
+            _routings[datatype] = renderer.routing
+        except Exception:
+            return ComponentRenderer.STATEFUL
+    return _purities[datatype]
+
+
+def renderer_tail(datatype: str) -> Union[int, None]:
+    """
+    :param datatype: The name of a component data type.
+    :return: How many samples a change to the input of that type of component
+             keeps affecting its output for. None (meaning forever) for stateful
+             renderers, whose state carries changes on indefinitely.
+    """
+    renderer_purity(datatype)
+    return _tails.get(datatype)
+
+
+def renderer_routing(datatype: str, output_node: str) -> Union[Routing, None]:
+    """
+    :param datatype: The name of a component data type.
+    :param output_node: The name of an output node of that type of component.
+    :return: How the renderer for that type of component routes the output node
+             from its inputs, or None if it renders the node (or can't be created).
+    """
+    renderer_purity(datatype)
+    routing = _routings.get(datatype)
+    return None if routing is None else routing.get(output_node)
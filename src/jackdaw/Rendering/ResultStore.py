@@ -0,0 +1,363 @@
+import os
+import math
+import zlib
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Tuple, Union, Iterable, Set
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import *
+
+
+class ResultBlock:
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int, chunk_size: int):
+        """
+        A view onto a shared-memory block holding a contiguous run of chunks
+        for a single node. The layout of the block is
+            flags:  int64[1]                            (non-zero once released)
+            tags:   int64[capacity]                     (chunk index + 1, or 0 if empty)
+            masks:  int64[capacity]                     (bit mask of channels present)
+            levels: float32[capacity, 3, CHANNELS]      (min, max and RMS of each channel of each chunk)
+            data:   Signal.DTYPE[CHANNELS, capacity * chunk_size]
+        Freshly created shared memory is zeroed, so a new block is empty.
+        :param shm: The shared memory backing this block.
+        :param capacity: The number of chunks the block holds.
+        :param chunk_size: The number of samples in a chunk.
+        """
+        self.shm = shm
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+
+        self.flags = np.ndarray((1,), dtype=np.int64, buffer=shm.buf, offset=0)
+        self.tags = np.ndarray((capacity,), dtype=np.int64, buffer=shm.buf, offset=8)
+        self.masks = np.ndarray((capacity,), dtype=np.int64, buffer=shm.buf, offset=8 + 8 * capacity)
+        self.levels = np.ndarray((capacity, 3, ResultStore.CHANNELS), dtype=np.float32,
+                                 buffer=shm.buf, offset=8 + 16 * capacity)
+        self.data = np.ndarray((ResultStore.CHANNELS, capacity * chunk_size), dtype=Signal.DTYPE,
+                               buffer=shm.buf, offset=8 + 16 * capacity + ResultBlock.levels_size(capacity))
+
+    @property
+    def released(self) -> bool:
+        return self.flags[0] != 0
+
+    def close(self):
+        del self.flags, self.tags, self.masks, self.levels, self.data
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # Views are still held elsewhere, the mapping goes when they do
+
+    @staticmethod
+    def size(capacity: int, chunk_size: int) -> int:
+        return 8 + 16 * capacity + ResultBlock.levels_size(capacity) + \
+            np.dtype(Signal.DTYPE).itemsize * ResultStore.CHANNELS * capacity * chunk_size
+
+    @staticmethod
+    def levels_size(capacity: int) -> int:
+        return 4 * 3 * ResultStore.CHANNELS * capacity
+
+
+# Process-safe storage of rendered chunks, backed by shared memory.
+# Each node's results live in a sequence of blocks, block b holding
+# BLOCK_CHUNKS * 2^b chunks, so the number of blocks only grows
+# logarithmically with the length of the project. Blocks are found
+# by name, so any process can attach to them without talking to
+# the process that created them; workers write chunks in place and
+# readers get views straight onto the shared buffers. The levels of each
+# chunk are measured as it is written, and kept beside it, so levels
+# over any range can be read without touching the samples.
+class ResultStore:
+
+    CHANNELS = 2  # Maximum number of channels in a stored signal
+    BLOCK_CHUNKS = 64  # Number of chunks in the first block of a node
+    MAX_BLOCKS = 24  # Enough for many hours of audio
+
+    def __init__(self, chunk_size: int):
+        self._chunk_size = chunk_size
+        self._prefix = f"jd{os.getpid()}"
+        self._blocks: Dict[Tuple[Node, int], ResultBlock] = dict()
+
+        # Make sure that processes started from here share our resource
+        # tracker, rather than each starting their own (which would
+        # try to clean up blocks that they created when they exit)
+        resource_tracker.ensure_running()
+
+    def __getstate__(self):
+        # Attached blocks are local to a process
+        state = self.__dict__.copy()
+        state["_blocks"] = dict()
+        return state
+
+    @property
+    def chunk_size(self) -> int:
+        return self._chunk_size
+
+    #########
+    # CHUNK #
+    #########
+
+    def has(self, node: Node, chunk: Chunk) -> bool:
+        b, slot = ResultStore.locate(chunk)
+        block = self._block(node, b, create=False)
+        return block is not None and block.tags[slot] == chunk + 1
+
+    def read(self, node: Node, chunk: Chunk) -> Signal:
+        # Returns views onto the shared buffer, so
+        # the result should be treated as read-only
+        b, slot = ResultStore.locate(chunk)
+        block = self._block(node, b, create=False)
+        if block is None or block.tags[slot] != chunk + 1:
+            raise KeyError(f"Chunk {chunk} of node {node} has not been rendered")
+
+        start = slot * self._chunk_size
+        return ResultStore.wrap(block.data[:, start: start + self._chunk_size], block.masks[slot])
+
+    def write(self, node: Node, chunk: Chunk, signal: Signal):
+        b, slot = ResultStore.locate(chunk)
+        block = self._block(node, b, create=True)
+        if block is None:
+            return  # Node was released while we were rendering it
+
+        mask = 0
+        start = slot * self._chunk_size
+        for channel in signal:
+            if channel >= ResultStore.CHANNELS:
+                raise Exception(f"Tried to store channel {channel} of node {node}, "
+                                f"but only {ResultStore.CHANNELS} channels are supported")
+            block.data[channel, start: start + self._chunk_size] = signal[channel]
+            mask |= 1 << channel
+
+        # Tag last, so the chunk only appears once it is complete
+        ResultStore.measure(block, slot, mask)
+        block.masks[slot] = mask
+        block.tags[slot] = chunk + 1
+
+    def mix(self, node: Node, chunk: Chunk, signals: Iterable[Signal]) -> Signal:
+        # Write the sum of the given signals, accumulating
+        # them straight into the shared buffer
+        b, slot = ResultStore.locate(chunk)
+        block = self._block(node, b, create=True)
+        if block is None:
+            return Signal()  # Node was released while we were rendering it
+
+        signals = list(signals)
+        for signal in signals:
+            for channel in signal:
+                if channel >= ResultStore.CHANNELS:
+                    raise Exception(f"Tried to store channel {channel} of node {node}, "
+                                    f"but only {ResultStore.CHANNELS} channels are supported")
+
+        start = slot * self._chunk_size
+        result = Signal.wrap(block.data[:, start: start + self._chunk_size], ())
+        Signal.mix_into(result, signals)
+
+        mask = 0
+        for channel in result:
+            mask |= 1 << channel
+        ResultStore.measure(block, slot, mask)
+        block.masks[slot] = mask
+        block.tags[slot] = chunk + 1
+        return result
+
+    def levels(self, node: Node, first_chunk: Chunk, end_chunk: Union[Chunk, None] = None) -> Levels:
+        # The levels over chunks from first_chunk up to (but not including)
+        # end_chunk, or over all chunks from first_chunk onwards, counting
+        # only the chunks that have been rendered. Costs O(chunks), reading
+        # nothing but the levels measured when the chunks were written.
+        peak = np.zeros(ResultStore.CHANNELS, dtype=np.float32)
+        squares = np.zeros(ResultStore.CHANNELS, dtype=np.float64)
+        chunks = 0
+        for b in range(ResultStore.MAX_BLOCKS):
+            block_start = ResultStore.block_start(b)
+            if block_start + ResultStore.block_capacity(b) <= first_chunk:
+                continue
+            if end_chunk is not None and end_chunk <= block_start:
+                break
+            block = self._block(node, b, create=False)
+            if block is None:
+                continue
+
+            lo = max(0, first_chunk - block_start)
+            hi = block.capacity if end_chunk is None else min(block.capacity, end_chunk - block_start)
+            rendered = block.tags[lo: hi] == np.arange(block_start + lo, block_start + hi) + 1
+            levels = block.levels[lo: hi][rendered]
+            if len(levels) > 0:
+                np.maximum(peak, -levels[:, 0].min(axis=0), out=peak)
+                np.maximum(peak, levels[:, 1].max(axis=0), out=peak)
+                squares += np.square(levels[:, 2], dtype=np.float64).sum(axis=0)
+                chunks += len(levels)
+        return Levels(peak, np.sqrt(squares / max(chunks, 1)).astype(np.float32), chunks)
+
+    def extremes(self, node: Node, first_chunk: Chunk, end_chunk: Chunk) -> Tuple[np.ndarray, np.ndarray]:
+        # The minimum and maximum of each channel of each chunk from first_chunk
+        # up to (but not including) end_chunk, as (chunks, CHANNELS) arrays.
+        # Chunks that have not been rendered have a minimum of +inf and a
+        # maximum of -inf, so that they drop out of any further min or max.
+        mins = np.full((end_chunk - first_chunk, ResultStore.CHANNELS), np.inf, dtype=np.float32)
+        maxs = np.full((end_chunk - first_chunk, ResultStore.CHANNELS), -np.inf, dtype=np.float32)
+        for b in range(ResultStore.MAX_BLOCKS):
+            block_start = ResultStore.block_start(b)
+            if block_start + ResultStore.block_capacity(b) <= first_chunk:
+                continue
+            if end_chunk <= block_start:
+                break
+            block = self._block(node, b, create=False)
+            if block is None:
+                continue
+
+            lo = max(0, first_chunk - block_start)
+            hi = min(block.capacity, end_chunk - block_start)
+            rendered = block.tags[lo: hi] == np.arange(block_start + lo, block_start + hi) + 1
+            offset = block_start + lo - first_chunk
+            levels = block.levels[lo: hi]
+            np.copyto(mins[offset: offset + hi - lo], levels[:, 0], where=rendered[:, None])
+            np.copyto(maxs[offset: offset + hi - lo], levels[:, 1], where=rendered[:, None])
+        return mins, maxs
+
+    def read_range(self, node: Node, start: int, samples: int) -> Signal:
+        # Read an arbitrary sample range. This is a view onto the
+        # shared buffer if the range lies within a single block and
+        # every chunk in it has the same channels, otherwise a copy.
+        first = start // self._chunk_size
+        last = (start + samples - 1) // self._chunk_size
+
+        b, first_slot = ResultStore.locate(first)
+        if b == ResultStore.locate(last)[0]:
+            block = self._block(node, b, create=False)
+            if block is not None:
+                slots = slice(first_slot, first_slot + last - first + 1)
+                chunks = np.arange(first, last + 1)
+                masks = block.masks[slots]
+                if np.all(block.tags[slots] == chunks + 1) and np.all(masks == masks[0]):
+                    offset = start - (first - first_slot) * self._chunk_size
+                    return ResultStore.wrap(block.data[:, offset: offset + samples], masks[0])
+
+        result = np.zeros((ResultStore.CHANNELS, samples), dtype=Signal.DTYPE)
+        channels: Set[int] = set()
+        for chunk in range(first, last + 1):
+            chunk_signal = self.read(node, chunk)
+            lo = max(start, chunk * self._chunk_size) - chunk * self._chunk_size
+            hi = min(start + samples, (chunk + 1) * self._chunk_size) - chunk * self._chunk_size
+            offset = chunk * self._chunk_size + lo - start
+            for channel in chunk_signal:
+                result[channel, offset: offset + hi - lo] = chunk_signal[channel][lo: hi]
+                channels.add(channel)
+        return Signal.wrap(result, channels)
+
+    ########
+    # NODE #
+    ########
+
+    def invalidate(self, node: Node, first_chunk: Chunk = 0, end_chunk: Union[Chunk, None] = None):
+        # Forget chunks from first_chunk up to (but not including)
+        # end_chunk, or all chunks from first_chunk onwards
+        for b in range(ResultStore.MAX_BLOCKS):
+            block_start = ResultStore.block_start(b)
+            if block_start + ResultStore.block_capacity(b) <= first_chunk:
+                continue
+            if end_chunk is not None and end_chunk <= block_start:
+                break
+            block = self._block(node, b, create=False)
+            if block is not None:
+                end = None if end_chunk is None else end_chunk - block_start
+                block.tags[max(0, first_chunk - block_start): end] = 0
+
+    def release(self, node: Node):
+        # Free all of the shared memory belonging to a node
+        for b in range(ResultStore.MAX_BLOCKS):
+            block = self._block(node, b, create=False)
+            if block is None:
+                continue
+            block.flags[0] = 1
+            self._blocks.pop((node, b))
+            try:
+                block.shm.unlink()
+            except FileNotFoundError:
+                pass
+            block.close()
+
+    def close(self):
+        # Detach from all blocks in this process
+        for key in list(self._blocks):
+            self._blocks.pop(key).close()
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _block_name(self, node: Node, b: int) -> str:
+        return f"{self._prefix}_{node.id}_{zlib.crc32(node.node.encode()):08x}_{b}"
+
+    def _block(self, node: Node, b: int, create: bool) -> Union[ResultBlock, None]:
+
+        block = self._blocks.get((node, b))
+        if block is not None:
+            if not block.released:
+                return block
+            # The node was released (and possibly re-created) since we attached
+            self._blocks.pop((node, b)).close()
+
+        name = self._block_name(node, b)
+        capacity = ResultStore.block_capacity(b)
+        shm = None
+        while shm is None:
+            try:
+                shm = shared_memory.SharedMemory(name=name)
+            except FileNotFoundError:
+                if not create:
+                    return None
+                try:
+                    shm = shared_memory.SharedMemory(
+                        name=name, create=True, size=ResultBlock.size(capacity, self._chunk_size))
+                except FileExistsError:
+                    continue  # Created by another process in the meantime
+            except ValueError:
+                continue  # Attached before the creating process set the size
+
+        block = ResultBlock(shm, capacity, self._chunk_size)
+        if block.released:
+            block.close()
+            return None
+
+        self._blocks[(node, b)] = block
+        return block
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def wrap(data: np.ndarray, mask: int) -> Signal:
+        # A read-only signal viewing the given part of a block
+        view = data[:, :]
+        view.flags.writeable = False
+        return Signal.wrap(view, [c for c in range(ResultStore.CHANNELS) if mask & (1 << c)])
+
+    @staticmethod
+    def measure(block: ResultBlock, slot: int, mask: int):
+        # Measure the levels of the channels in the mask, of the chunk in the given slot
+        # (A channel at a time: on arrays this small, reductions along an axis cost more than a loop)
+        start = slot * block.chunk_size
+        levels = block.levels[slot]
+        for channel in range(ResultStore.CHANNELS):
+            if mask & (1 << channel):
+                row = block.data[channel, start: start + block.chunk_size]
+                levels[0, channel] = row.min()
+                levels[1, channel] = row.max()
+                levels[2, channel] = math.sqrt(np.dot(row, row) / block.chunk_size)
+            else:
+                levels[:, channel] = 0
+
+    @staticmethod
+    def locate(chunk: Chunk) -> Tuple[int, int]:
+        # Returns the (block, slot) that the given chunk is stored in
+        b = (chunk // ResultStore.BLOCK_CHUNKS + 1).bit_length() - 1
+        return b, chunk - ResultStore.block_start(b)
+
+    @staticmethod
+    def block_start(b: int) -> Chunk:
+        return ResultStore.BLOCK_CHUNKS * ((1 << b) - 1)
+
+    @staticmethod
+    def block_capacity(b: int) -> int:
+        return ResultStore.BLOCK_CHUNKS << b
@@ -0,0 +1,326 @@
+from collections import deque
+from typing import Dict, Set, List, Tuple, Union
+from jackdaw.Rendering.Typedefs import *
+
+
+class RoutingCycleException(Exception):
+
+    def __init__(self, cycle: List[Node]):
+        """
+        Thrown when the routing graph contains a cycle, and so cannot be rendered.
+        :param cycle: The nodes making up the cycle, in order.
+        """
+        self.cycle = cycle
+        path = " -> ".join(f"{n.id}.{n.node}" for n in cycle + cycle[:1])
+        super().__init__(f"Routing contains a cycle: {path}")
+
+
+def topological_order(parents: Dict[Node, Set[Node]]) -> List[Node]:
+    """
+    Order nodes so that every node appears after all of its parents, using
+    Kahn's algorithm. Runs in O(nodes + edges).
+    :param parents: Dictionary of node -> parents of that node.
+    :return: The nodes, in an order that they can be rendered in.
+    :raise RoutingCycleException if the graph contains a cycle.
+    """
+    children: Dict[Node, List[Node]] = {n: [] for n in parents}
+    remaining: Dict[Node, int] = dict()
+    for n in parents:
+        remaining[n] = len(parents[n])
+        for p in parents[n]:
+            children[p].append(n)
+
+    ready = deque(n for n in parents if remaining[n] == 0)
+    order: List[Node] = []
+    while len(ready) > 0:
+        n = ready.popleft()
+        order.append(n)
+        for c in children[n]:
+            remaining[c] -= 1
+            if remaining[c] == 0:
+                ready.append(c)
+
+    if len(order) != len(parents):
+        raise RoutingCycleException(find_cycle({n for n in parents if remaining[n] > 0}, parents))
+
+    return order
+
+
+def find_cycle(nodes: Set[Node], parents: Dict[Node, Set[Node]]) -> List[Node]:
+    """
+    Find a cycle amongst nodes that Kahn's algorithm could not order. Every
+    such node has a parent that also could not be ordered, so walking up
+    through those parents must eventually revisit a node.
+    :param nodes: Nodes that are part of, or downstream of, a cycle.
+    :param parents: Dictionary of node -> parents of that node.
+    :return: The nodes making up a cycle, each a parent of the next.
+    """
+    path: List[Node] = []
+    index: Dict[Node, int] = dict()
+    node = next(iter(nodes))
+    while node not in index:
+        index[node] = len(path)
+        path.append(node)
+        node = next(p for p in parents[node] if p in nodes)
+    return path[index[node]:][::-1]
+
+
+class RoutingGraph:
+
+    def __init__(self):
+        """
+        A persistent index of the routing graph. Routes are added and removed
+        as deltas in O(degree), rather than rebuilding the parent/child
+        structure from scratch. The set of nodes downstream of each node is
+        cached as a bitset (over node indices), and only the cached sets that
+        an edit can affect (those upstream of it) are thrown away.
+        """
+        self._routes: Set[Route] = set()
+        self._parents: Dict[Node, Set[Node]] = dict()
+        self._children: Dict[Node, Set[Node]] = dict()
+
+        # Number of routes leaving/arriving at each node, and the nodes
+        # of each component that are outputs (routed from)/inputs (routed to)
+        self._out_routes: Dict[Node, int] = dict()
+        self._in_routes: Dict[Node, int] = dict()
+        self._outputs: Dict[int, Set[Node]] = dict()
+        self._inputs: Dict[int, Set[Node]] = dict()
+
+        # Number of reasons for each parent -> child edge to exist
+        # (a route, and/or parenting within a component)
+        self._edges: Dict[Tuple[Node, Node], int] = dict()
+
+        # Bit index of each node, and the cached downstream bitsets
+        self._index: Dict[Node, int] = dict()
+        self._by_index: List[Union[Node, None]] = []
+        self._free_indices: List[int] = []
+        self._downstream: Dict[Node, int] = dict()
+
+    @property
+    def routes(self) -> Set[Route]:
+        return self._routes
+
+    @property
+    def parents(self) -> Dict[Node, Set[Node]]:
+        return self._parents
+
+    @property
+    def children(self) -> Dict[Node, Set[Node]]:
+        return self._children
+
+    @property
+    def output_nodes(self) -> Set[Node]:
+        return {n for n in self._out_routes}
+
+    @property
+    def input_nodes(self) -> Set[Node]:
+        return {n for n in self._in_routes}
+
+    def component_outputs(self, comp_id: int) -> Set[Node]:
+        """
+        :param comp_id: A component id.
+        :return: The output nodes of that component that are in the graph.
+        """
+        return set(self._outputs.get(comp_id, ()))
+
+    def update(self, routes: Set[Route]) -> Tuple[Set[Node], Set[Node], Set[Node]]:
+        """
+        Apply the difference between the current routes and the given routes.
+        :param routes: The new set of routes.
+        :return: (added nodes, removed nodes, nodes invalidated by the change).
+        """
+        added_routes = routes - self._routes
+        removed_routes = self._routes - routes
+        old_nodes = set(self._parents)
+
+        # Nodes that were downstream of deleted routes are invalidated
+        invalidated: Set[Node] = set()
+        for route in removed_routes:
+            invalidated.update(self.downstream(route.to_node))
+
+        for route in removed_routes:
+            self.remove_route(route)
+        for route in added_routes:
+            self.add_route(route)
+
+        # Nodes that are downstream of new routes are invalidated
+        for route in added_routes:
+            invalidated.update(self.downstream(route.to_node))
+
+        # (Nodes downstream of added/removed nodes are downstream
+        # of an added/removed route, so are already included)
+        added_nodes = {n for r in added_routes for n in r if n not in old_nodes}
+        removed_nodes = {n for r in removed_routes for n in r if n not in self._parents}
+        invalidated.update(added_nodes)
+        invalidated.update(removed_nodes)
+        return added_nodes, removed_nodes, invalidated
+
+    def add_route(self, route: Route) -> None:
+        """
+        Add a route to the graph, in O(degree).
+        :param route: The route to add.
+        :return: None
+        """
+        if route in self._routes:
+            return
+        self._routes.add(route)
+        from_node, to_node = route
+
+        self._add_node(from_node)
+        self._add_node(to_node)
+
+        # A new output is parented to every input of its component
+        self._out_routes[from_node] = self._out_routes.get(from_node, 0) + 1
+        if self._out_routes[from_node] == 1:
+            self._outputs.setdefault(from_node.id, set()).add(from_node)
+            for i in self._inputs.get(from_node.id, ()):
+                self._add_edge(i, from_node)
+
+        # A new input is a parent of every output of its component
+        self._in_routes[to_node] = self._in_routes.get(to_node, 0) + 1
+        if self._in_routes[to_node] == 1:
+            self._inputs.setdefault(to_node.id, set()).add(to_node)
+            for o in self._outputs.get(to_node.id, ()):
+                self._add_edge(to_node, o)
+
+        self._add_edge(from_node, to_node)
+
+    def remove_route(self, route: Route) -> None:
+        """
+        Remove a route from the graph, in O(degree). Nodes
+        that are no longer part of any route are removed.
+        :param route: The route to remove.
+        :return: None
+        """
+        if route not in self._routes:
+            return
+        self._routes.remove(route)
+        from_node, to_node = route
+
+        self._remove_edge(from_node, to_node)
+
+        self._out_routes[from_node] -= 1
+        if self._out_routes[from_node] == 0:
+            self._out_routes.pop(from_node)
+            self._remove_from(self._outputs, from_node)
+            for i in self._inputs.get(from_node.id, ()):
+                self._remove_edge(i, from_node)
+
+        self._in_routes[to_node] -= 1
+        if self._in_routes[to_node] == 0:
+            self._in_routes.pop(to_node)
+            self._remove_from(self._inputs, to_node)
+            for o in self._outputs.get(to_node.id, ()):
+                self._remove_edge(to_node, o)
+
+        self._remove_node(from_node)
+        self._remove_node(to_node)
+
+    def downstream(self, node: Node) -> Set[Node]:
+        """
+        :param node: The node to start from.
+        :return: The node, along with all nodes downstream of it.
+        """
+        if node not in self._parents:
+            return set()
+        bits = self._downstream_bits(node)
+        result: Set[Node] = set()
+        while bits:
+            low = bits & -bits
+            result.add(self._by_index[low.bit_length() - 1])
+            bits ^= low
+        return result
+
+    def render_order(self) -> List[Node]:
+        """
+        :return: The nodes, in an order that they can be rendered in.
+        :raise RoutingCycleException if the graph contains a cycle.
+        """
+        return topological_order(self._parents)
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _downstream_bits(self, node: Node) -> int:
+        # Fill in the cache by an iterative post-order walk over
+        # the children of node (so long chains don't overflow the stack)
+        if node in self._downstream:
+            return self._downstream[node]
+
+        stack = [node]
+        on_stack = {node}
+        while len(stack) > 0:
+            n = stack[-1]
+            pending = [c for c in self._children[n] if c not in self._downstream and c not in on_stack]
+            if len(pending) > 0:
+                stack.extend(pending)
+                on_stack.update(pending)
+                continue
+
+            stack.pop()
+            on_stack.discard(n)
+            if n in self._downstream:
+                continue
+            bits = 1 << self._index[n]
+            for c in self._children[n]:
+                bits |= self._downstream.get(c, 0)  # (Absent only if part of a cycle)
+            self._downstream[n] = bits
+
+        return self._downstream[node]
+
+    def _forget_downstream(self, node: Node) -> None:
+        # Forget the cached downstream sets that could include a changed edge
+        # leaving node. If a node is cached, so is everything below it, so the
+        # walk up can stop as soon as it reaches a node that isn't cached.
+        stack = [node]
+        while len(stack) > 0:
+            n = stack.pop()
+            if self._downstream.pop(n, None) is not None:
+                stack.extend(self._parents[n])
+
+    def _add_node(self, node: Node) -> None:
+        if node in self._parents:
+            return
+        self._parents[node] = set()
+        self._children[node] = set()
+        if len(self._free_indices) > 0:
+            self._index[node] = self._free_indices.pop()
+            self._by_index[self._index[node]] = node
+        else:
+            self._index[node] = len(self._by_index)
+            self._by_index.append(node)
+
+    def _remove_node(self, node: Node) -> None:
+        if node not in self._parents or node in self._out_routes or node in self._in_routes:
+            return
+        assert len(self._parents[node]) == 0 and len(self._children[node]) == 0
+        self._parents.pop(node)
+        self._children.pop(node)
+        self._downstream.pop(node, None)
+        index = self._index.pop(node)
+        self._by_index[index] = None
+        self._free_indices.append(index)
+
+    def _add_edge(self, parent: Node, child: Node) -> None:
+        edge = (parent, child)
+        self._edges[edge] = self._edges.get(edge, 0) + 1
+        if self._edges[edge] == 1:
+            self._parents[child].add(parent)
+            self._children[parent].add(child)
+            self._forget_downstream(parent)
+
+    def _remove_edge(self, parent: Node, child: Node) -> None:
+        edge = (parent, child)
+        self._edges[edge] -= 1
+        if self._edges[edge] == 0:
+            self._edges.pop(edge)
+            self._forget_downstream(parent)
+            self._parents[child].remove(parent)
+            self._children[parent].remove(child)
+
+    @staticmethod
+    def _remove_from(nodes: Dict[int, Set[Node]], node: Node) -> None:
+        nodes[node.id].remove(node)
+        if len(nodes[node.id]) == 0:
+            nodes.pop(node.id)
@@ -0,0 +1,370 @@
+import time
+import heapq
+import threading
+import contextlib
+from typing import Dict, Set, List, Tuple, Iterable, Callable, Union, TypeVar
+from jackdaw.Rendering.Typedefs import *
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+
+T = TypeVar("T")
+
+
+class RenderFailedException(Exception):
+    pass
+
+
+# Tracks the dependencies between individual (node, chunk) render
+# tasks. A task becomes ready as soon as the same chunk of each of its
+# parents has been rendered. Ready tasks are handed to workers via the
+# dispatch callback, and completions are reported back through
+# complete(). Everything is event driven, nothing here polls.
+#
+# Stateful nodes are rendered in order (a chunk waits for the previous
+# chunk of the same node), always by the same worker, so that worker's
+# renderer can carry state between chunks. Chunks of stateless nodes
+# go to whichever worker is least loaded, all at once.
+#
+# Workers report which chunks came out silent. A chunk of a node whose
+# output is a function of its inputs alone is silent whenever all of
+# its inputs are, so once every parent has a silent chunk, the node's
+# chunk is never handed to a worker at all: it is marked silent, through
+# the skip callback (which stores it as such), and done.
+#
+# Chunks are wanted for as long as anyone who requested them holds on to
+# them (each request is matched by a release). Ready tasks are handed out
+# in order of how far their chunk is from the playhead, chunks ahead of
+# it first, so that after an edit during playback the chunks about to be
+# heard are rendered again before anything else.
+#
+# Every chunk that gets done, rendered or skipped, is reported through
+# the finished callback (called with the lock held, so it must be quick).
+#
+# Results are read with the lock held (see read), and changes to the graph
+# and to what is done are made in a batch (see batch) along with the
+# changes to the results, so that a reader never sees a chunk as done
+# that has been forgotten, and nothing is rendered into (or marked silent
+# in) the results between the scheduler being told and them being changed.
+class RenderScheduler:
+
+    MAX_IN_FLIGHT = 2  # Tasks handed to a worker before it reports back
+
+    def __init__(self, workers: int, dispatch: Callable[[int, Union[RenderTask, ReleaseTask]], None],
+                 skip: Callable[[Node, Chunk], None] = None, finished: Callable[[Node, Chunk], None] = None):
+        self._dispatch_task = dispatch
+        self._skip_task = skip
+        self._finished = finished
+        self._load: List[int] = [0] * workers
+
+        self._lock = threading.Condition()
+        self._parents: Dict[Node, Set[Node]] = dict()
+        self._children: Dict[Node, Set[Node]] = dict()
+        self._specs: Dict[Node, NodeSpec] = dict()
+        self._rank: Dict[Node, int] = dict()
+        self._versions: Dict[Node, int] = dict()
+        self._done: Dict[Node, Set[Chunk]] = dict()
+        self._silent: Dict[Node, Set[Chunk]] = dict()  # Chunks that are done, and silent
+        self._failures: Dict[Node, str] = dict()
+        self._in_flight: Dict[Tuple[Node, Chunk], int] = dict()
+        self._holders: Dict[Node, Set[int]] = dict()
+        self._wanted: Dict[Chunk, float] = dict()  # Chunk -> when it was requested
+        self._holds: Dict[Chunk, int] = dict()  # Chunk -> number of requests not yet released
+        self._playhead: Chunk = 0
+        self._invalidated_at: Dict[Node, float] = dict()
+        self._ready: List[Tuple[Tuple[bool, int], int, Node, Chunk, int, float]] = []
+        self._batches = 0  # Batches of changes being made (nothing is dispatched until they are all made)
+
+    #########
+    # GRAPH #
+    #########
+
+    def set_graph(self, parents: Dict[Node, Set[Node]], order: List[Node], specs: Dict[Node, NodeSpec]):
+        # Replace the render graph. Nodes that are new start out with nothing
+        # rendered, results of nodes that remain are kept (unless invalidated).
+        with self._lock:
+            for node in set(self._parents) - set(parents):
+                self._versions[node] += 1
+                self._done.pop(node)
+                self._silent.pop(node)
+                self._failures.pop(node, None)
+                self._invalidated_at.pop(node, None)
+                for worker in sorted(self._holders.pop(node, ())):
+                    self._dispatch_task(worker, ReleaseTask(node))
+
+            # (Only nodes that are new, or whose parents or specs have changed, can have become ready)
+            changed = [n for n in parents if n not in self._done or self._specs.get(n) != specs[n] or
+                       self._parents.get(n) != set(parents[n])]
+            self._parents = {n: set(parents[n]) for n in parents}
+            self._children = {n: set() for n in parents}
+            for n in parents:
+                for p in parents[n]:
+                    self._children[p].add(n)
+
+            self._specs = dict(specs)
+            self._rank = {n: i for i, n in enumerate(order)}
+            for node in changed:
+                if node not in self._done:
+                    self._versions[node] = self._versions.get(node, 0) + 1
+                    self._done[node] = set()
+                    self._silent[node] = set()
+                    self._invalidated_at[node] = time.perf_counter()
+
+            for node in changed:
+                self._consider_chunks(node, self._wanted.keys())
+            self._dispatch()
+
+    @contextlib.contextmanager
+    def batch(self):
+        # Hold the lock over several changes, handing out (or skipping) no tasks until they have all been made
+        with self._lock:
+            self._batches += 1
+            try:
+                yield
+            finally:
+                self._batches -= 1
+                if self._batches == 0:
+                    self._dispatch()
+
+    def invalidate(self, nodes: Iterable[Node]):
+        # Forget results of the given nodes, so they are rendered again
+        self.invalidate_chunks({n: [(0, None)] for n in nodes})
+
+    def invalidate_chunks(self, ranges: Dict[Node, List[Tuple[Chunk, Union[Chunk, None]]]]):
+        # Forget results of some chunks of the given nodes. Each node has a list of
+        # (first, end) ranges of chunks to forget, with end None meaning no end.
+        with self._lock:
+            nodes = [n for n in ranges if n in self._parents]
+            for node in nodes:
+                self._versions[node] += 1
+                self._done[node] -= RenderScheduler.chunks_in_ranges(self._done[node], ranges[node])
+                self._silent[node] &= self._done[node]
+                self._failures.pop(node, None)
+                self._invalidated_at[node] = time.perf_counter()
+
+            for node in nodes:
+                self._consider_chunks(node, RenderScheduler.chunks_in_ranges(self._wanted.keys(), ranges[node]))
+            self._dispatch()
+
+    ##########
+    # CHUNKS #
+    ##########
+
+    def request(self, chunks: Iterable[Chunk]):
+        # Ask for the given chunks to be rendered, for every node (until they are released)
+        with self._lock:
+            chunks = set(chunks)
+            new_chunks = chunks - self._wanted.keys()
+            now = time.perf_counter()
+            for chunk in chunks:
+                self._holds[chunk] = self._holds.get(chunk, 0) + 1
+            for chunk in new_chunks:
+                self._wanted[chunk] = now
+            for node in self._parents:
+                self._consider_chunks(node, new_chunks)
+            self._dispatch()
+
+    def release(self, chunks: Iterable[Chunk]):
+        # Let go of chunks that were requested. Chunks that nobody holds on to any
+        # more aren't rendered again when they are invalidated (until requested again).
+        with self._lock:
+            for chunk in set(chunks):
+                if chunk not in self._holds:
+                    continue
+                self._holds[chunk] -= 1
+                if self._holds[chunk] == 0:
+                    self._holds.pop(chunk)
+                    self._wanted.pop(chunk)
+
+    def set_playhead(self, chunk: Chunk):
+        # Render the chunks nearest to (and ahead of) the given chunk first
+        with self._lock:
+            if chunk == self._playhead:
+                return
+            self._playhead = chunk
+            self._ready = [(self._priority(entry[3]),) + entry[1:] for entry in self._ready]
+            heapq.heapify(self._ready)
+
+    def has_node(self, node: Node) -> bool:
+        # Whether the node is rendered as a task (so has results of its own)
+        with self._lock:
+            return node in self._parents
+
+    def is_done(self, node: Node, chunk: Chunk) -> bool:
+        with self._lock:
+            return chunk in self._done.get(node, ())
+
+    def done_count(self, node: Node, chunks: Iterable[Chunk]) -> int:
+        # How many of the given chunks of the given node have been rendered
+        with self._lock:
+            return len(self._done.get(node, set()).intersection(chunks))
+
+    def is_silent(self, node: Node, chunk: Chunk) -> bool:
+        with self._lock:
+            return chunk in self._silent.get(node, ())
+
+    def wait(self, nodes: Iterable[Node], chunks: Iterable[Chunk], timeout: float = None) -> bool:
+        # Block until the given chunks of the given nodes have been rendered. Returns
+        # False if that didn't happen within the timeout (in seconds), if one is given.
+        nodes = list(nodes)
+        chunks = list(chunks)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            while True:
+                if len(self._failures) > 0:
+                    node, error = next(iter(self._failures.items()))
+                    raise RenderFailedException(f"Rendering node {node} failed:\n{error}")
+                if all(n not in self._done or self._done[n].issuperset(chunks) for n in nodes):
+                    return True
+                if deadline is None:
+                    self._lock.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._lock.wait(remaining)
+
+    def read(self, nodes: Iterable[Node], chunks: Iterable[Chunk], read: Callable[[], T],
+             timeout: float = None) -> Union[T, None]:
+        # Wait as wait does, then read the results with the lock held, so that none of them can be
+        # forgotten until read returns. Returns what read does, or None if the wait timed out.
+        with self._lock:
+            if not self.wait(nodes, chunks, timeout):
+                return None
+            return read()
+
+    def complete(self, worker: int, node: Node, chunk: Chunk, version: int, error: str = None,
+                 silent: bool = False):
+        # Called when a worker has finished a task (and found the result to be silent, or not)
+        with self._lock:
+            self._load[worker] -= 1
+            if self._in_flight.get((node, chunk)) == version:
+                self._in_flight.pop((node, chunk))
+
+            if node in self._versions and self._versions[node] == version:
+                if error is not None:
+                    self._failures[node] = error
+                else:
+                    self._finish(node, chunk, silent)
+                self._lock.notify_all()
+            else:
+                # Stale result, render the chunk again now that the old task is out of the way
+                self._consider(node, chunk)
+
+            self._dispatch()
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _finish(self, node: Node, chunk: Chunk, silent: bool):
+        self._done[node].add(chunk)
+        if silent:
+            self._silent[node].add(chunk)
+        if self._finished is not None:
+            self._finished(node, chunk)
+        for child in self._children[node]:
+            self._consider(child, chunk)
+        self._consider(node, chunk + 1)
+
+    def _consider_chunks(self, node: Node, chunks: Iterable[Chunk]):
+        # Consider some wanted chunks of a node, first narrowed down (with set operations,
+        # so without looking at the chunks one by one) to those whose parents are all done
+        candidates = set(chunks) - self._done[node]
+        for p in self._parents[node]:
+            candidates &= self._done[p]
+        for chunk in sorted(candidates):
+            self._consider(node, chunk)
+
+    def _is_ready(self, node: Node, chunk: Chunk) -> bool:
+        if node not in self._parents or chunk not in self._wanted:
+            return False
+        if chunk in self._done[node] or (node, chunk) in self._in_flight:
+            return False
+        if self._is_stateful(node) and chunk - 1 in self._wanted and chunk - 1 not in self._done[node]:
+            return False  # Chunks of a stateful node are rendered in order
+        return all(chunk in self._done[p] for p in self._parents[node])
+
+    def _is_stateful(self, node: Node) -> bool:
+        return self._specs[node].purity == ComponentRenderer.STATEFUL
+
+    def _consider(self, node: Node, chunk: Chunk):
+        if self._is_ready(node, chunk):
+            heapq.heappush(self._ready, (self._priority(chunk), self._rank.get(node, 0), node, chunk,
+                                         self._versions[node], time.perf_counter()))
+
+    def _priority(self, chunk: Chunk) -> Tuple[bool, int]:
+        # Chunks from the playhead onwards first, nearest first, then those behind it
+        return chunk < self._playhead, abs(chunk - self._playhead)
+
+    def _skips(self, node: Node, chunk: Chunk) -> bool:
+        # Whether the chunk is silent without rendering it
+        return self._skip_task is not None and node in self._parents and \
+            RenderScheduler.keeps_silence(self._specs[node]) and \
+            all(chunk in self._silent[p] for p in self._parents[node])
+
+    def _dispatch(self):
+        # Tasks whose worker is busy wait for that worker to report back
+        if self._batches > 0:
+            return  # (Until the batch is over)
+        waiting = []
+        skipped = False
+        while len(self._ready) > 0:
+            least_loaded = min(range(len(self._load)), key=lambda w: self._load[w])
+            if self._load[least_loaded] >= RenderScheduler.MAX_IN_FLIGHT and \
+                    not self._skips(self._ready[0][2], self._ready[0][3]):
+                break  # All workers are busy
+
+            entry = heapq.heappop(self._ready)
+            priority, rank, node, chunk, version, ready_at = entry
+            if self._versions.get(node) != version or not self._is_ready(node, chunk):
+                continue  # Out of date, or already dispatched
+
+            # Silence in, silence out (finishing it makes its children ready, to be skipped in turn)
+            if self._skips(node, chunk):
+                self._skip_task(node, chunk)
+                self._finish(node, chunk, True)
+                skipped = True
+                continue
+
+            # Stateful nodes stay with the worker that has their renderer
+            holders = self._holders.setdefault(node, set())
+            worker = min(holders) if self._is_stateful(node) and len(holders) > 0 else least_loaded
+            if self._load[worker] >= RenderScheduler.MAX_IN_FLIGHT:
+                waiting.append(entry)
+                continue
+
+            holders.add(worker)
+            self._load[worker] += 1
+            self._in_flight[(node, chunk)] = version
+            requested_at = max(self._wanted[chunk], self._invalidated_at.get(node, 0.0))
+            self._dispatch_task(worker, RenderTask(node, chunk, version, self._specs[node],
+                                                   (requested_at, ready_at)))
+
+        for entry in waiting:
+            heapq.heappush(self._ready, entry)
+        if skipped:
+            self._lock.notify_all()
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def chunks_in_ranges(chunks: Iterable[Chunk], ranges: List[Tuple[Chunk, Union[Chunk, None]]]) -> Set[Chunk]:
+        # The chunks that are in any of the given (first, end) ranges (end None meaning no end)
+        chunks = set(chunks)
+        result: Set[Chunk] = set()
+        for first, end in ranges:
+            if end is None and first <= 0:
+                return chunks
+            if end is not None and end - first < len(chunks):
+                result |= chunks.intersection(range(first, end))
+            else:
+                result |= {c for c in chunks if first <= c and (end is None or c < end)}
+        return result
+
+    @staticmethod
+    def keeps_silence(spec: NodeSpec) -> bool:
+        # Whether the node is silent whenever all of its parents are: its output
+        # depends on its inputs alone, and all of its inputs come from its parents
+        return spec.purity == ComponentRenderer.TIME_INVARIANT and len(spec.parents) > 0 and \
+            spec.frozen is None and all(step.op != "frozen" for step in spec.plan)
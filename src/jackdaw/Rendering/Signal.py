@@ -1,77 +1,191 @@
 import numpy as np
-from typing import Dict, Union, Iterable
+from typing import Dict, Union, Iterable, Set, Tuple
 
 
+# A multichannel signal, stored as a single contiguous (channels, samples)
+# array. Channel k lives in row k of the array, and only the channels that
+# have been set are present (absent channels read as silence). A signal
+# with no channels present at all is silent: that is how silence is
+# passed around, so it costs nothing to make, store, mix or route.
 class Signal:
 
-    def __init__(self):
-        self._data: Dict[int, np.ndarray] = dict()
+    DTYPE = np.float32  # Default sample type
+    CHANNELS = 2  # Rows allocated up front, more are added as needed
+    ZEROS_KEPT = 8  # Lengths of shared silence kept at once
+    _ZEROS: Dict[Tuple[int, np.dtype], Tuple[np.ndarray, np.ndarray]] = dict()  # Silence (and a row of it)
+
+    def __init__(self, samples: int = 0, dtype: np.dtype = None):
+        self._array: np.ndarray = np.zeros((Signal.CHANNELS, samples), dtype=dtype or Signal.DTYPE)
+        self._samples: int = samples
+        self._channels: Set[int] = set()
 
     def __getitem__(self, item) -> Union[np.ndarray]:
         assert isinstance(item, int)
-        if item in self._data:
-            return self._data[item]
-        return np.zeros(self.samples)
+        if item in self._channels:
+            return self._array[item, 0: self._samples]
+
+        # Absent channels all share a read-only buffer of zeros
+        return Signal._shared_zeros(self._samples, self.dtype)[1]
 
     def __setitem__(self, key, value):
         assert isinstance(key, int)
         assert isinstance(value, np.ndarray) or value is None
         if value is None:
-            if key in self._data:
-                self._data.pop(key)
+            self._channels.discard(key)
             return
-        self._data[key] = value
+
+        if len(self._channels) == 0 and len(value) != self._samples:
+            # The first channel decides the length of the signal
+            self._reallocate(max(key + 1, len(self._array)), len(value), len(value))
+
+        assert len(value) == self._samples, "All channels of a signal must have the same length"
+        self._writable_row(key)[:] = value
 
     def __iter__(self):
-        return self._data.__iter__()
+        return iter(sorted(self._channels))
 
     def __contains__(self, item):
         assert isinstance(item, int)
-        return item in self._data
+        return item in self._channels
 
     def __add__(self, other: 'Signal') -> 'Signal':
         assert isinstance(other, Signal)
-        result = Signal()
-        for k in self:
-            result[k] = self[k].copy()
-        for k in other:
-            if k in result:
-                result[k] += other[k]
-            else:
-                result[k] = other[k].copy()
-        return result
+        return Signal.mix_into(self.copy(), [other])
 
     def __radd__(self, other: 'Signal'):
         assert isinstance(other, Signal)
         return self + other
 
+    def copy(self) -> 'Signal':
+        return Signal.wrap(self._array[:, 0: self._samples].copy(), self._channels)
+
     def insert(self, other: 'Signal', start: int):
-        assert set(self._data) == set(other._data)
+        assert set(self._channels) == set(other._channels)
 
         length = max(self.samples, start + other.samples)
+        if self._array.shape[1] < length or not self._array.flags.writeable:
+            # Out of space (or the array isn't ours to write to), reallocate. Capacity
+            # doubles, so that appending chunk after chunk costs amortized O(chunk)
+            # rather than copying the whole history every time.
+            self._reallocate(len(self._array), max(length, 2 * self._samples), self._samples)
+
+        # Samples past the end of the signal are never
+        # written to, so any gap before start is still zero
+        self._samples = length
+        for i in self._channels:
+            self._array[i, start: start + other.samples] = other[i]
+
+    def view(self, start: int, samples: int) -> 'Signal':
+        # Returns views onto the given range of samples (so,
+        # unlike insert, writing to the result writes to self)
+        assert 0 <= start and start + samples <= self.samples
+        return Signal.wrap(self._array[:, start: start + samples], self._channels)
 
-        for i in self._data:
-            tmp = self._data[i]
-            self._data[i] = np.zeros(length)
-            self._data[i][0: len(tmp)] = tmp
-            self._data[i][start: start + other.samples] = other._data[i]
+    def channel_view(self, first: int, channels: int) -> 'Signal':
+        # Returns views onto channels first up to first + channels, as
+        # channels 0 up to channels (all of which must be present)
+        assert all(c in self._channels for c in range(first, first + channels))
+        return Signal.wrap(self._array[first: first + channels, 0: self._samples], range(channels))
 
     def info(self) -> str:
         ret = ""
-        for key in self._data:
-            ret += f"Channel {key} has {len(self._data[key])} samples\n"
+        for key in self:
+            ret += f"Channel {key} has {self._samples} samples\n"
         return ret
 
     @property
     def samples(self) -> int:
-        for channel in self._data:
-            return len(self._data[channel])
-        return 0
+        return self._samples
+
+    @property
+    def silent(self) -> bool:
+        return len(self._channels) == 0
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self._array.dtype
+
+    @property
+    def nbytes(self) -> int:
+        # Size of the sample data of the channels present
+        return len(list(self)) * self._samples * self._array.dtype.itemsize
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _reallocate(self, rows: int, capacity: int, samples: int):
+        array = np.zeros((rows, capacity), dtype=self.dtype)
+        keep = min(samples, self._samples)
+        for i in self._channels:
+            array[i, 0: keep] = self._array[i, 0: keep]
+        self._array = array
+        self._samples = samples
+
+    def _writable_row(self, channel: int) -> np.ndarray:
+        # Returns the row for the given channel, ready to be written
+        # to. A channel that wasn't present before starts out silent.
+        if channel >= len(self._array) or not self._array.flags.writeable:
+            self._reallocate(max(channel + 1, len(self._array)), self._samples, self._samples)
+
+        row = self._array[channel, 0: self._samples]
+        if channel not in self._channels:
+            row[:] = 0
+            self._channels.add(channel)
+        return row
+
+    ################
+    # STATIC STUFF #
+    ################
 
     @staticmethod
-    def sum(signals: Iterable['Signal']) -> 'Signal':
-        result = Signal()
-        for s in signals:
-            if s is not None:
-                result += s
+    def wrap(array: np.ndarray, channels: Iterable[int]) -> 'Signal':
+        # Create a signal backed by the given (channels, samples) array, without
+        # copying it. Rows of channels that aren't listed are ignored. If the
+        # array is read-only, it is copied the first time the signal is modified.
+        assert array.ndim == 2
+        result = Signal.__new__(Signal)
+        result._array = array
+        result._samples = array.shape[1]
+        result._channels = set(channels)
+        assert all(c < len(array) for c in result._channels)
         return result
+
+    @staticmethod
+    def silence(samples: int) -> 'Signal':
+        # A silent signal, backed by shared zeros (copied the first time it is modified)
+        return Signal.wrap(Signal.zeros(samples), ())
+
+    @staticmethod
+    def zeros(samples: int, dtype: np.dtype = None) -> np.ndarray:
+        # A read-only (CHANNELS, samples) array of zeros, shared by every caller
+        return Signal._shared_zeros(samples, dtype)[0]
+
+    @staticmethod
+    def _shared_zeros(samples: int, dtype: np.dtype = None) -> Tuple[np.ndarray, np.ndarray]:
+        key = (samples, np.dtype(dtype or Signal.DTYPE))
+        if key not in Signal._ZEROS:
+            if len(Signal._ZEROS) >= Signal.ZEROS_KEPT:
+                Signal._ZEROS.clear()  # (Lengths other than the chunk size are rare)
+            zeros = np.zeros((Signal.CHANNELS, samples), dtype=key[1])
+            zeros.flags.writeable = False
+            Signal._ZEROS[key] = (zeros, zeros[0])
+        return Signal._ZEROS[key]
+
+    @staticmethod
+    def mix_into(out: 'Signal', inputs: Iterable['Signal']) -> 'Signal':
+        # Accumulate the inputs into out in place, without allocating
+        # intermediate signals. An empty out takes on the length of the inputs.
+        for s in inputs:
+            if s is None or len(s._channels) == 0:
+                continue
+            if len(out._channels) == 0 and out.samples != s.samples:
+                out._reallocate(len(out._array), s.samples, s.samples)
+            for c in s._channels:
+                row = out._writable_row(c)
+                np.add(row, s._array[c, 0: s._samples], out=row)
+        return out
+
+    @staticmethod
+    def sum(signals: Iterable['Signal']) -> 'Signal':
+        return Signal.mix_into(Signal(), signals)
@@ -0,0 +1,145 @@
+import json
+from collections import Counter
+from typing import Dict, List, NamedTuple, Tuple, Union
+from jackdaw.Data import data
+from jackdaw.Data.ProjectData import ProjectData, PlaylistClipData
+from jackdaw.Data.DataObjects import HasOnChangeListeners
+from jackdaw.TimeControl import TimeControl
+from jackdaw.Rendering.Playback import PlaybackEngine
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+from jackdaw.Rendering.AudioFiles import DecodedAudio, audio_cache
+from jackdaw.Rendering.Typedefs import *
+
+
+NOTE_BEATS = 1.0  # The length of a MIDI note, in beats (as drawn by the MIDI editor)
+
+
+# Where a clip sits in the timeline of a track (in samples), along with
+# what is in it, so that edits to a clip show up as a changed span
+class ClipSpan(NamedTuple):
+    start: int
+    end: int
+    content: str
+
+
+def beats_to_samples(beats: float) -> int:
+    return int(round(TimeControl.beats_to_time(beats) * PlaybackEngine.SAMPLE_RATE))
+
+
+def clip_spans() -> Dict[int, Counter]:
+    """
+    :return: Dictionary of track -> (multi)set of the spans of the clips placed on that track.
+    """
+    spans: Dict[int, Counter] = dict()
+    for clip in data.playlist_clips:
+        if clip.type.value == "Audio":
+            audio = clip_audio(clip)
+            if audio is not None:
+                start = beats_to_samples(clip.beat.value)
+                span = ClipSpan(start, start + audio.frames, json.dumps(["Audio", audio.key]))
+                spans.setdefault(clip.track.value, Counter())[span] += 1
+            continue
+        if clip.type.value != "MIDI" or clip.clip.value not in data.midi_clips:
+            continue
+        notes = sorted((n.beat.value, n.note.value) for n in data.midi_clips[clip.clip.value].notes)
+        if len(notes) == 0:
+            continue  # Silent
+
+        # (Notes carry on sounding for the release of the voice playing them)
+        start = clip.beat.value + notes[0][0]
+        end = clip.beat.value + notes[-1][0] + NOTE_BEATS
+        span = ClipSpan(beats_to_samples(start), beats_to_samples(end) + VoiceEngine.RELEASE, json.dumps(notes))
+        spans.setdefault(clip.track.value, Counter())[span] += 1
+    return spans
+
+
+def track_audio(track: int) -> List[Tuple[int, DecodedAudio]]:
+    """
+    :param track: A track.
+    :return: (first sample, decoded audio) of each audio clip on the track, in order.
+    """
+    clips = [(beats_to_samples(clip.beat.value), clip_audio(clip)) for clip in data.playlist_clips
+             if clip.track.value == track and clip.type.value == "Audio"]
+    return sorted((start, audio) for start, audio in clips if audio is not None)
+
+
+def clip_audio(clip: PlaylistClipData) -> Union[DecodedAudio, None]:
+    # The decoded audio of an audio clip (None if there is nothing to play)
+    if clip.clip.value not in data.audio_clips:
+        return None
+    audio = audio_cache().decoded(ProjectData.path(data.audio_clips[clip.clip.value].file.value))
+    return audio if audio is not None and audio.frames > 0 else None
+
+
+def changed_ranges(old: Dict[int, Counter], new: Dict[int, Counter]) -> Dict[int, List[SampleRange]]:
+    """
+    Compare two sets of clip spans (from clip_spans).
+    :return: Dictionary of track -> ranges of samples where that track has changed.
+    """
+    ranges: Dict[int, List[SampleRange]] = dict()
+    for track in set(old) | set(new):
+        old_spans, new_spans = old.get(track, Counter()), new.get(track, Counter())
+        changed = (old_spans - new_spans) + (new_spans - old_spans)
+        if len(changed) > 0:
+            ranges[track] = merge_ranges([SampleRange(s.start, s.end) for s in changed])
+    return ranges
+
+
+def timeline_objects() -> List[HasOnChangeListeners]:
+    """
+    :return: The data objects whose changes can change clip_spans.
+    """
+    objects: List[HasOnChangeListeners] = [data.playlist_clips, data.midi_clips, data.audio_clips]
+    for clip in data.playlist_clips:
+        objects.extend([clip.clip, clip.track, clip.beat, clip.type])
+    for clip_id in data.midi_clips:
+        notes = data.midi_clips[clip_id].notes
+        objects.append(notes)
+        for note in notes:
+            objects.extend([note.note, note.beat])
+    for clip_id in data.audio_clips:
+        objects.append(data.audio_clips[clip_id].file)
+    return objects
+
+
+##########
+# RANGES #
+##########
+
+def merge_ranges(ranges: List[SampleRange]) -> List[SampleRange]:
+    """
+    :param ranges: Some sample ranges.
+    :return: The same samples, as a sorted list of ranges that don't overlap or touch.
+    """
+    merged: List[SampleRange] = []
+    for r in sorted(ranges, key=lambda r: r.start):
+        if len(merged) > 0 and (merged[-1].end is None or r.start <= merged[-1].end):
+            last = merged.pop()
+            end = None if last.end is None or r.end is None else max(last.end, r.end)
+            merged.append(SampleRange(last.start, end))
+        else:
+            merged.append(r)
+    return merged
+
+
+def extend_range(r: SampleRange, tail: Union[int, None]) -> SampleRange:
+    """
+    :param r: A sample range.
+    :param tail: A number of samples, or None for forever.
+    :return: The range, carried on for tail more samples.
+    """
+    if r.end is None or tail is None:
+        return SampleRange(r.start, None)
+    return SampleRange(r.start, r.end + tail)
+
+
+def chunk_range(r: SampleRange, chunk_size: int) -> Tuple[Chunk, Union[Chunk, None]]:
+    """
+    :param r: A sample range.
+    :param chunk_size: The number of samples in a chunk.
+    :return: (first, end) range of the chunks overlapping the samples (end None if there is no end).
+    """
+    first = max(r.start, 0) // chunk_size
+    if r.end is None:
+        return first, None
+    return first, max(first, -(-r.end // chunk_size))
@@ -1,4 +1,5 @@
-from typing import NamedTuple
+import numpy as np
+from typing import NamedTuple, Tuple, Union
 
 #  A chunk is just an integer chunk index
 Chunk = int
@@ -14,3 +15,88 @@ class Node(NamedTuple):
 class Route(NamedTuple):
     from_node: Node
     to_node: Node
+
+
+# A range of samples, from start up to (but not including)
+# end, or to the end of time if end is None
+class SampleRange(NamedTuple):
+    start: int
+    end: Union[int, None] = None
+
+
+# How a component that only routes channels (with no processing) gets
+# an output node from its input nodes: either the name of an input node
+# that is passed through unchanged, or the (input node name, channel)
+# that each channel of the output comes from
+Routing = Union[str, Tuple[Tuple[str, int], ...]]
+
+
+# Where the output of a frozen node is read from: a raw float32 file
+# holding a (channels, samples) array, past the end of which it is silent
+class Frozen(NamedTuple):
+    path: str
+    channels: int
+
+
+# One step of the plan that gathers the inputs of a node, from the
+# results of its parents, working out the result of one node that is
+# folded into it. Steps refer to the results of earlier steps by index.
+#     "read":     the result of a parent (rendered on its own)
+#     "silence":  nothing
+#     "mix":      the sum of the sources (an input node)
+#     "route":    channels of the sources (a component that only routes)
+#     "frozen":   the file that the node has been frozen into
+class PlanStep(NamedTuple):
+    op: str
+    node: Node  # The node whose result the step works out
+    sources: Tuple[Tuple[str, int], ...] = ()  # (name, step) of the results it is worked out from
+    routing: Union[Routing, None] = None
+    frozen: Union[Frozen, None] = None
+
+
+# The levels of each channel of a node over a range of chunks, as measured
+# when the chunks were rendered. Channels that are absent have level 0.
+class Levels(NamedTuple):
+    peak: np.ndarray  # Largest absolute sample of each channel
+    rms: np.ndarray  # Root mean square of each channel
+    chunks: int  # How many of the chunks had been rendered (the rest don't count)
+
+
+# The waveform of a node over a range of samples, as drawn across a number
+# of pixels: the smallest and largest sample of each channel under each
+# pixel, as (channels, pixels) arrays. Pixels over samples that have not
+# been rendered are NaN.
+class Waveform(NamedTuple):
+    mins: np.ndarray
+    maxs: np.ndarray
+
+
+# Everything a worker needs to know to render a node
+class NodeSpec(NamedTuple):
+    datatype: str
+    inout: str
+    parents: Tuple[Node, ...]
+    purity: str = "stateful"  # The purity of the component renderer
+    key: str = ""  # Content key of what the node renders ("" if it can't be cached)
+    parameters: Union[dict, None] = None  # Render parameters of the component
+    tail: Union[int, None] = None  # How long changes upstream affect the node for (None if forever)
+    routing: Union[Routing, None] = None  # Set if the node only routes channels of its inputs
+    plan: Tuple[PlanStep, ...] = ()  # How to gather the inputs of the node from its parents
+    inputs: Tuple[Tuple[str, int], ...] = ()  # (name, step) of each input, once the plan has run
+    frozen: Union[Frozen, None] = None  # Set if the node is read from a file rather than rendered
+
+
+# A request to render one chunk of a node. The version
+# identifies which state of the graph the task belongs to.
+class RenderTask(NamedTuple):
+    node: Node
+    chunk: Chunk
+    version: int
+    spec: NodeSpec
+    times: Tuple[float, float] = (0.0, 0.0)  # When it was (requested, ready to be rendered)
+
+
+# Tells a worker that a node has left the graph, so
+# that it can let go of the renderer it keeps for it
+class ReleaseTask(NamedTuple):
+    node: Node
@@ -0,0 +1,139 @@
+import numpy as np
+from typing import Tuple
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Wavetable import WavetableBank, wavetables
+
+
+# Plays notes on a fixed pool of voices. Every voice sounding in a block
+# is rendered at once, as rows of a (voices, samples) array: the table
+# positions of all voices, the wavetable lookups, the envelopes and the
+# final sum over voices are each a single whole-array operation, so the
+# cost of a block grows with the number of voices by a few vector
+# operations per voice rather than a Python loop per note.
+#
+# Each note gets an envelope that ramps up over ATTACK samples from its
+# start, and dies away over RELEASE samples from its end. When more than
+# VOICES notes would sound at once, the voice that has been playing the
+# longest is stolen: its note fades out over STEAL_FADE samples, ending
+# exactly where the new note starts. Which notes get stolen is worked out
+# once, up front, for a whole track (see allocate), so that any block can
+# be rendered on its own, in any order.
+#
+# A block can still hold more than VOICES notes, as notes that stop
+# during the block (say, a stolen note and the note that steals it) are
+# in it along with those that start. So the buffers have a row per note
+# of the block, growing (beyond VOICES) to the most any block has held.
+class VoiceEngine:
+
+    VOICES = 32  # Size of the voice pool
+    ATTACK = 64  # Samples
+    RELEASE = 2205  # Samples (50 ms)
+    STEAL_FADE = 64  # Samples
+    START_PHASE = 0.25  # Where in its cycle a note starts (where the sine table crosses zero, going up)
+
+    def __init__(self, waveform: str = "sine", sample_rate: int = 44100, gain: float = 0.25):
+        """
+        :param waveform: One of WavetableBank.WAVEFORMS.
+        :param sample_rate: The sample rate to play at.
+        :param gain: Amplitude of each voice.
+        """
+        tables = wavetables().tables(waveform)
+        self._table = tables.reshape(-1)  # Flattened, so voices can read different levels at once
+        self._slope = np.diff(tables, axis=1, append=tables[:, :1]).reshape(-1)
+        self._sample_rate = sample_rate
+        self._gain = gain
+
+        # Buffers of a row per note, reused from one block to the next
+        self._samples = 0
+        self._rows = VoiceEngine.VOICES
+        self._position = self._index = self._envelope = self._ramp = np.zeros((0, 0))
+        self._ramp_up = np.zeros(0)
+
+    def render(self, start: int, samples: int, notes: Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]) \
+            -> np.ndarray:
+        """
+        :param start: The first sample of the block.
+        :param samples: The number of samples in the block.
+        :param notes: (starts, ends, stops, frequencies) of the notes sounding in the block,
+                      as allocated to voices by allocate.
+        :return: The block (the sum of all voices).
+        """
+        starts, ends, stops, frequencies = notes
+        voices = len(starts)
+        if samples != self._samples or voices > self._rows:
+            self._resize(samples, max(voices, self._rows))
+        if voices == 0:
+            return np.zeros(samples, dtype=Signal.DTYPE)
+
+        size = WavetableBank.TABLE_SIZE
+        position, index = self._position[:voices], self._index[:voices]
+        envelope, ramp = self._envelope[:voices], self._ramp[:voices]
+
+        # Table position of each sample of each voice
+        increments = frequencies / self._sample_rate
+        phases = (increments * (start - starts) + VoiceEngine.START_PHASE) % 1.0
+        np.multiply(self._ramp_up, increments[:, None] * size, out=position)
+        position += (phases * size)[:, None]
+
+        # Split into index and fraction, with the index offset to the table of the right level
+        np.copyto(index, position, casting="unsafe")
+        position -= index
+        np.bitwise_and(index, size - 1, out=index)
+        levels = [WavetableBank.level(f, self._sample_rate) for f in frequencies]
+        index += (np.array(levels) * (size + 1))[:, None]
+
+        # Attack, release and (if stolen) the fade out, each a ramp clipped to [0, 1]
+        np.subtract(self._ramp_up, (starts - start)[:, None], out=envelope)
+        envelope *= 1.0 / VoiceEngine.ATTACK
+        np.subtract((ends - start)[:, None] + VoiceEngine.RELEASE, self._ramp_up, out=ramp)
+        ramp *= 1.0 / VoiceEngine.RELEASE
+        np.minimum(envelope, ramp, out=envelope)
+        np.subtract((stops - start)[:, None], self._ramp_up, out=ramp)
+        ramp *= 1.0 / VoiceEngine.STEAL_FADE
+        np.minimum(envelope, ramp, out=envelope)
+        np.clip(envelope, 0.0, 1.0, out=envelope)
+
+        # Interpolate the tables, centre on zero, apply the envelopes and mix
+        tone = self._slope[index]
+        tone *= position
+        tone += self._table[index]
+        tone -= 0.5
+        tone *= envelope
+        return (tone.sum(axis=0) * (2 * self._gain)).astype(Signal.DTYPE)
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _resize(self, samples: int, rows: int):
+        shape = (rows, samples)
+        self._samples = samples
+        self._rows = rows
+        self._ramp_up = np.arange(samples, dtype=np.float64)
+        self._position = np.empty(shape)
+        self._index = np.empty(shape, dtype=np.intp)
+        self._envelope = np.empty(shape)
+        self._ramp = np.empty(shape)
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def allocate(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Play notes on the voice pool, stealing the longest playing voice whenever a
+        note starts with every voice busy.
+        :param starts: The first sample of each note, in order.
+        :param ends: The sample each note is released at.
+        :return: The sample each note stops sounding at (after its release, or when stolen).
+        """
+        stops = ends + VoiceEngine.RELEASE
+        playing = []  # Notes holding a voice, longest playing first
+        for i, start in enumerate(starts):
+            playing = [j for j in playing if stops[j] > start]
+            if len(playing) == VoiceEngine.VOICES:
+                stolen = playing.pop(0)
+                stops[stolen] = start
+            playing.append(i)
+        return stops
@@ -0,0 +1,135 @@
+import numpy as np
+from typing import Callable, List, Tuple, Union
+from jackdaw.Rendering.Typedefs import *
+
+
+# A min/max pyramid over the output of a node, so that its waveform can be
+# drawn at any zoom for a cost that grows with the number of pixels drawn,
+# not with the number of samples. Level 0 holds the smallest and largest
+# sample of each channel of each chunk, as measured when the chunk was
+# rendered (see ResultStore.extremes), and bin i of level k covers chunks
+# i * 2^k up to (i + 1) * 2^k. The levels above 0 are kept here, and are
+# brought up to date lazily: a chunk that is rendered (or forgotten) only
+# marks the bins above it as stale, and stale bins are worked out again
+# from the level below the next time they are read. Anything that hasn't
+# been rendered has a minimum of +inf and a maximum of -inf, so it drops
+# out of every bin above it.
+class WaveformPyramid:
+
+    LEVELS = 24  # Enough for a pixel to cover hours of audio
+
+    def __init__(self, chunk_size: int, channels: int,
+                 extremes: Callable[[Chunk, Chunk], Tuple[np.ndarray, np.ndarray]]):
+        """
+        :param chunk_size: The number of samples in a chunk.
+        :param channels: The number of channels.
+        :param extremes: (first, end) -> (mins, maxs) of the chunks from first up
+                         to (but not including) end, as (chunks, channels) arrays.
+        """
+        self._chunk_size = chunk_size
+        self._channels = channels
+        self._extremes = extremes
+        self._mins: List[np.ndarray] = []  # Of levels 1 and up, as (bins, channels) arrays
+        self._maxs: List[np.ndarray] = []
+        self._fresh: List[np.ndarray] = []  # Whether each bin is up to date
+
+    def changed(self, first_chunk: Chunk, end_chunk: Union[Chunk, None] = None):
+        """
+        Mark the bins over the given chunks as stale, after the chunks were rendered or forgotten.
+        :param first_chunk: The first chunk that changed.
+        :param end_chunk: The chunk to stop at (None for all chunks from first_chunk onwards).
+        """
+        for k, fresh in enumerate(self._fresh, 1):
+            fresh[first_chunk >> k: None if end_chunk is None else -(-end_chunk >> k)] = False
+
+    def bins(self, level: int, first: int, end: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param level: A level of the pyramid, each bin covering 2^level chunks.
+        :param first: The first bin.
+        :param end: The bin to stop at.
+        :return: (mins, maxs) of the bins, as read-only (bins, channels) arrays.
+        """
+        if level == 0:
+            return self._extremes(first, end)
+
+        self._grow(level, end)
+        mins, maxs, fresh = self._mins[level - 1], self._maxs[level - 1], self._fresh[level - 1]
+        stale = np.flatnonzero(~fresh[first: end])
+        if len(stale) > 0:
+            lo, hi = first + int(stale[0]), first + int(stale[-1]) + 1
+            below_mins, below_maxs = self.bins(level - 1, 2 * lo, 2 * hi)
+            np.minimum(below_mins[0::2], below_mins[1::2], out=mins[lo: hi])
+            np.maximum(below_maxs[0::2], below_maxs[1::2], out=maxs[lo: hi])
+            fresh[lo: hi] = True
+        return mins[first: end], maxs[first: end]
+
+    def waveform(self, start: int, end: int, pixels: int) -> Waveform:
+        """
+        Draw the waveform from the coarsest level whose bins are no wider than a
+        pixel, so reading at most a few bins per pixel whatever the zoom. (Zoomed in
+        to less than a chunk per pixel, each pixel gets the chunk that it is in.)
+        :param start: The first sample.
+        :param end: The sample to stop at.
+        :param pixels: The number of pixels to draw the samples across.
+        :return: The waveform.
+        """
+        chunks_per_pixel = (end - start) / (pixels * self._chunk_size)
+        level = 0 if chunks_per_pixel < 1 else min(int(np.log2(chunks_per_pixel)), WaveformPyramid.LEVELS)
+        bin_size = self._chunk_size << level
+        first = start // bin_size
+        mins, maxs = self.bins(level, first, max(-(-end // bin_size), first + 1))
+        return WaveformPyramid.reduce(mins, maxs, first * bin_size, bin_size, start, end, pixels)
+
+    ###########
+    # PRIVATE #
+    ###########
+
+    def _grow(self, level: int, end: int):
+        # Make room for bins up to end in the given level (and add the levels up to it)
+        while len(self._mins) < level:
+            self._mins.append(np.zeros((0, self._channels), dtype=np.float32))
+            self._maxs.append(np.zeros((0, self._channels), dtype=np.float32))
+            self._fresh.append(np.zeros(0, dtype=bool))
+        k = level - 1
+        size = len(self._fresh[k])
+        if end > size:
+            size = max(end, 2 * size)
+            self._mins[k] = np.resize(self._mins[k], (size, self._channels))
+            self._maxs[k] = np.resize(self._maxs[k], (size, self._channels))
+            self._fresh[k] = np.concatenate([self._fresh[k], np.zeros(size - len(self._fresh[k]), dtype=bool)])
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def reduce(mins: np.ndarray, maxs: np.ndarray, offset: int, bin_size: int,
+               start: int, end: int, pixels: int) -> Waveform:
+        """
+        Reduce bins to pixels, each pixel getting the min and max of the bins that it overlaps.
+        :param mins: The minimum of each channel in each bin, as a (bins, channels) array.
+        :param maxs: Likewise, the maximum.
+        :param offset: The sample that the first bin starts at.
+        :param bin_size: The number of samples in each bin.
+        :param start: The first sample to draw (in the first bin).
+        :param end: The sample to stop at (in, or at the end of, the last bin).
+        :param pixels: The number of pixels to draw the samples across.
+        :return: The waveform.
+        """
+        edges = start + (end - start) * np.arange(pixels) // pixels
+        indices = (edges - offset) // bin_size
+        last = (end - 1 - offset) // bin_size
+        mins, maxs = mins[: last + 1], maxs[: last + 1]
+        pixel_mins = np.minimum.reduceat(mins, indices, axis=0)
+        pixel_maxs = np.maximum.reduceat(maxs, indices, axis=0)
+
+        # A pixel that ends part of the way into a bin overlaps that bin too
+        shared = np.flatnonzero((edges[1:] - offset) % bin_size != 0)
+        pixel_mins[shared] = np.minimum(pixel_mins[shared], mins[indices[shared + 1]])
+        pixel_maxs[shared] = np.maximum(pixel_maxs[shared], maxs[indices[shared + 1]])
+
+        pixel_mins, pixel_maxs = pixel_mins.T, pixel_maxs.T
+        empty = pixel_mins > pixel_maxs  # (Nothing rendered under the pixel)
+        pixel_mins[empty] = np.nan
+        pixel_maxs[empty] = np.nan
+        return Waveform(pixel_mins, pixel_maxs)
@@ -0,0 +1,178 @@
+import os
+import math
+import atexit
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Union
+from jackdaw.Rendering.Signal import Signal
+
+
+# Precomputed, band-limited single-cycle waveforms. Each waveform has a
+# "mipmap" of tables, table k holding only the first HARMONICS >> k
+# harmonics, so a waveform can be played at any frequency without
+# aliasing by reading the table with the most harmonics that all stay
+# below the Nyquist frequency. The tables are computed once, by the
+# first process that needs them, into shared memory that any process
+# started from it attaches to (found through an environment variable,
+# so this works however the processes are started). The layout of the
+# shared memory is
+#     tables:   Signal.DTYPE[WAVEFORMS, LEVELS, TABLE_SIZE + 1]
+# with the first sample of each table repeated at the end, so that
+# interpolating between neighbouring samples never has to wrap around.
+class WavetableBank:
+
+    WAVEFORMS = ("sine", "sawtooth")
+    TABLE_SIZE = 4096  # Samples per cycle
+    HARMONICS = 1024  # Harmonics in the first (lowest frequency) table
+    LEVELS = 11  # Down to a table with a single harmonic
+    ENVIRONMENT_VARIABLE = "JACKDAW_WAVETABLES"
+
+    def __init__(self, name: str, create: bool):
+        shape = (len(WavetableBank.WAVEFORMS), WavetableBank.LEVELS, WavetableBank.TABLE_SIZE + 1)
+        size = int(np.prod(shape)) * np.dtype(Signal.DTYPE).itemsize
+        if create:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self._tables = np.ndarray(shape, dtype=Signal.DTYPE, buffer=self._shm.buf)
+
+        if create:
+            for w, waveform in enumerate(WavetableBank.WAVEFORMS):
+                for level in range(WavetableBank.LEVELS):
+                    self._tables[w, level, :-1] = WavetableBank.generate(
+                        waveform, WavetableBank.HARMONICS >> level)
+                self._tables[w, :, -1] = self._tables[w, :, 0]
+        self._tables.flags.writeable = False
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def tables(self, waveform: str) -> np.ndarray:
+        """
+        :param waveform: One of WavetableBank.WAVEFORMS.
+        :return: The (read-only) mipmap of tables for that waveform, as a (LEVELS, TABLE_SIZE + 1) array.
+        """
+        if waveform not in WavetableBank.WAVEFORMS:
+            raise Exception(f"Unknown waveform \"{waveform}\", expected one "
+                            f"of {', '.join(WavetableBank.WAVEFORMS)}")
+        return self._tables[WavetableBank.WAVEFORMS.index(waveform)]
+
+    ################
+    # STATIC STUFF #
+    ################
+
+    @staticmethod
+    def level(frequency: float, sample_rate: int) -> int:
+        # The table with the most harmonics that all stay below Nyquist
+        allowed = sample_rate / (2.0 * max(abs(frequency), 1e-9))
+        if allowed >= WavetableBank.HARMONICS:
+            return 0
+        return min(math.ceil(math.log2(WavetableBank.HARMONICS / allowed)), WavetableBank.LEVELS - 1)
+
+    @staticmethod
+    def generate(waveform: str, harmonics: int) -> np.ndarray:
+        # A single cycle of the waveform, with the given number of
+        # harmonics, built from its spectrum (ranging from 0 to 1)
+        n = WavetableBank.TABLE_SIZE
+        spectrum = np.zeros(n // 2 + 1, dtype=np.complex128)
+        if waveform == "sine":
+            spectrum[1] = -0.25 * n  # 0.5 - 0.5 cos(x)
+        elif waveform == "sawtooth":
+            h = np.arange(1, min(harmonics, n // 2 - 1) + 1)
+            spectrum[h] = 0.5j * n / (np.pi * h)  # x - floor(x) = 0.5 - sum(sin(hx) / (pi h))
+        spectrum[0] = 0.5 * n
+        return np.fft.irfft(spectrum, n)
+
+
+_bank: Union[WavetableBank, None] = None
+
+
+def wavetables() -> WavetableBank:
+    """
+    :return: The wavetables of this process, creating them
+             (or attaching to those of a parent process) if need be.
+    """
+    global _bank
+    if _bank is None:
+        name = os.environ.get(WavetableBank.ENVIRONMENT_VARIABLE)
+        if name is not None:
+            try:
+                _bank = WavetableBank(name, create=False)
+            except FileNotFoundError:
+                pass  # The process that made them has gone
+
+        if _bank is None:
+            resource_tracker.ensure_running()
+            _bank = WavetableBank(f"jdwt{os.getpid()}", create=True)
+            os.environ[WavetableBank.ENVIRONMENT_VARIABLE] = _bank.name
+            atexit.register(_unlink, _bank)
+    return _bank
+
+
+def _unlink(bank: WavetableBank):
+    try:
+        bank._shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+# Plays a waveform from the wavetables, keeping track of its phase (in
+# cycles) from one block of samples to the next, so that the frequency
+# can change between blocks without the waveform jumping. Samples are
+# linearly interpolated between the two nearest table samples. Lookups
+# are a handful of whole-block array operations on buffers that are
+# reused from one block to the next, rather than evaluating the waveform.
+class Oscillator:
+
+    def __init__(self, waveform: str, sample_rate: int = 44100):
+        self._tables = wavetables().tables(waveform)
+        self._slopes = np.diff(self._tables, axis=1)  # Difference to the next table sample
+        self._sample_rate = sample_rate
+        self.phase = 0.0
+
+        # Table offset of each sample of a block from the first, and the
+        # tables to use, for the frequency of the last block
+        self._frequency: Union[float, None] = None
+        self._steps = np.zeros(0)
+        self._table = self._slope = self._tables[0]
+        self._position = np.zeros(0)
+        self._index = np.zeros(0, dtype=np.intp)
+
+    def seek(self, frequency: float, sample: int) -> None:
+        """
+        Set the phase to where it would be at the given sample, had
+        the oscillator been playing at the given frequency from sample 0.
+        """
+        self.phase = (frequency * sample / self._sample_rate) % 1.0
+
+    def render(self, frequency: float, samples: int) -> np.ndarray:
+        """
+        :param frequency: The frequency to play at, in Hz.
+        :param samples: The number of samples to render.
+        :return: The next samples of the waveform.
+        """
+        size = WavetableBank.TABLE_SIZE
+        increment = frequency / self._sample_rate
+        if frequency != self._frequency or len(self._steps) != samples:
+            self._frequency = frequency
+            self._steps = np.arange(samples) * (increment * size)
+            self._position = np.empty(samples)
+            self._index = np.empty(samples, dtype=np.intp)
+            level = WavetableBank.level(frequency, self._sample_rate)
+            self._table, self._slope = self._tables[level], self._slopes[level]
+
+        # Split the table position of each sample into index and fraction
+        position, index = self._position, self._index
+        np.add(self._steps, self.phase * size, out=position)
+        np.copyto(index, position, casting="unsafe")
+        np.subtract(position, index, out=position)
+        np.bitwise_and(index, size - 1, out=index)
+
+        result = self._table[index]
+        slope = self._slope[index]
+        np.multiply(slope, position, out=slope, casting="unsafe")
+        result += slope
+
+        self.phase = (self.phase + increment * samples) % 1.0
+        return result
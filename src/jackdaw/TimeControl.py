@@ -3,6 +3,7 @@ class TimeControl:
     _playhead_time = 0.0
     _paused = True
     _bpm = 172.0
+    _seeks = 0  # Number of times time has jumped, rather than advanced
 
     @staticmethod
     def get_time():
@@ -20,6 +21,11 @@ class TimeControl:
     def set_playhead_time(time):
         TimeControl._playhead_time = time
         TimeControl._time = time
+        TimeControl._seeks += 1
+
+    @staticmethod
+    def get_seek_count():
+        return TimeControl._seeks
 
     @staticmethod
     def get_time_as_beats():
@@ -49,6 +55,7 @@ class TimeControl:
     def stop():
         TimeControl._paused = True
         TimeControl._time = TimeControl._playhead_time
+        TimeControl._seeks += 1
 
     @staticmethod
     def toggle_play_pause():
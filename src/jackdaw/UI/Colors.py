@@ -14,6 +14,7 @@ class Colors:
     router_component_header = (0.2, 0.2, 0.2)
     routing_node_border = (0.5, 0.5, 0.5)
     routing_node_centre = (0.2, 0.2, 0.2)
+    cyclic_route = (0.8, 0.1, 0.1)
 
     _playlist_clip_colors = None
 
@@ -292,10 +292,4 @@ class MidiEditor(Gtk.Window):
 
     @staticmethod
     def note_name_to_index(name: str):
-        if "#" in name:
-            octave = int(name[2:])
-            note = name[:2]
-        else:
-            octave = int(name[1:])
-            note = name[0]
-        return octave * 12 + MusicTheory.NOTES.index(note)
+        return MusicTheory.note_number(name)
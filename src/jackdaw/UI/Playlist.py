@@ -1,3 +1,4 @@
+import os
 import cairo
 from jackdaw.Gi import Gtk, Gdk
 from jackdaw.UI.PlaylistClip import PlaylistClip
@@ -5,7 +6,7 @@ from jackdaw.UI.Playhead import Playhead
 from jackdaw.UI.Drawing import draw_background_grid
 from jackdaw.TimeControl import TimeControl
 from jackdaw.Data import data
-from jackdaw.Data.ProjectData import PlaylistClipData
+from jackdaw.Data.ProjectData import ProjectData, PlaylistClipData, AudioClipData
 from jackdaw.Utils.Singleton import Singleton
 
 
@@ -67,11 +68,33 @@ class Playlist(Gtk.Window, Singleton):
 
         new_clip = PlaylistClipData()
         new_clip.clip.value = Playlist.paste_clip_number
+        new_clip.type.value = Playlist.paste_clip_type
         new_clip.track.value = track
         new_clip.beat.value = beat
 
         data.playlist_clips.add(new_clip)
 
+    def add_audio_clip(self, x: float, y: float):
+        # Ask for a WAV file, and place a clip playing it
+        dialog = Gtk.FileChooserDialog(title="Add audio clip", parent=self, action=Gtk.FileChooserAction.OPEN)
+        dialog.add_buttons(Gtk.STOCK_CANCEL, Gtk.ResponseType.CANCEL, Gtk.STOCK_OPEN, Gtk.ResponseType.OK)
+        wav_filter = Gtk.FileFilter()
+        wav_filter.set_name("WAV files")
+        wav_filter.add_pattern("*.wav")
+        dialog.add_filter(wav_filter)
+        response = dialog.run()
+        filename = dialog.get_filename()
+        dialog.destroy()
+        if response != Gtk.ResponseType.OK or filename is None:
+            return
+
+        audio_clip = AudioClipData()
+        audio_clip.file.value = os.path.relpath(filename, os.path.dirname(os.path.abspath(ProjectData.FILENAME)))
+        Playlist.paste_clip_number = data.audio_clips.get_unique_key()
+        Playlist.paste_clip_type = "Audio"
+        data.audio_clips[Playlist.paste_clip_number] = audio_clip
+        self.paste_clip(x, y)
+
     ###################
     # EVENT CALLBACKS #
     ###################
@@ -82,6 +105,8 @@ class Playlist(Gtk.Window, Singleton):
     def on_background_click(self, widget: Gtk.Widget, button: Gdk.EventButton):
         if button.button == Gdk.BUTTON_PRIMARY:
             self.paste_clip(button.x, button.y)
+        elif button.button == Gdk.BUTTON_SECONDARY:
+            self.add_audio_clip(button.x, button.y)
 
     def on_keypress(self, widget: Gtk.Widget, key: Gdk.EventKey):
         if key.keyval == Gdk.KEY_space:
@@ -140,3 +165,4 @@ class Playlist(Gtk.Window, Singleton):
     ################
 
     paste_clip_number = 0
+    paste_clip_type = "MIDI"
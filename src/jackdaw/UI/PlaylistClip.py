@@ -1,3 +1,4 @@
+import os
 import cairo
 from typing import Callable
 from jackdaw.Gi import Gtk, Gdk
@@ -36,6 +37,10 @@ class PlaylistClip(Gtk.DrawingArea):
 
     def make_unique(self):
 
+        # (Audio clips play a file, which can't be edited, so there's nothing to make unique)
+        if not self.is_midi:
+            return
+
         # Create new midi clip
         new_midi = MidiClipData()
 
@@ -53,6 +58,7 @@ class PlaylistClip(Gtk.DrawingArea):
         new_clip.clip.value = new_key
         data.playlist_clips.add(new_clip)
         PlaylistModule.Playlist.paste_clip_number = new_key
+        PlaylistModule.Playlist.paste_clip_type = "MIDI"
 
         # Delete me
         self.delete()
@@ -65,6 +71,10 @@ class PlaylistClip(Gtk.DrawingArea):
     def clip_number(self):
         return self.clip.clip.value
 
+    @property
+    def is_midi(self):
+        return self.clip.type.value == "MIDI"
+
     ###################
     # EVENT CALLBACKS #
     ###################
@@ -73,7 +83,7 @@ class PlaylistClip(Gtk.DrawingArea):
 
         if button.button == Gdk.BUTTON_PRIMARY:
             # Open midi editor on double left click
-            if button.type == Gdk.EventType.DOUBLE_BUTTON_PRESS:
+            if button.type == Gdk.EventType.DOUBLE_BUTTON_PRESS and self.is_midi:
                 MidiEditor.open(self.clip_number)
 
             # Set the playhead to the start of this clip
@@ -81,6 +91,7 @@ class PlaylistClip(Gtk.DrawingArea):
 
             # Set the clip number we're pasting to this clip
             PlaylistModule.Playlist.paste_clip_number = self.clip_number
+            PlaylistModule.Playlist.paste_clip_type = self.clip.type.value
             return
 
         if button.button == Gdk.BUTTON_SECONDARY:
@@ -101,13 +112,17 @@ class PlaylistClip(Gtk.DrawingArea):
         context.rectangle(1, 1, width - 2, height - 2)
         context.fill()
 
-        self.draw_midi_preview(area, context)
+        if self.is_midi:
+            self.draw_midi_preview(area, context)
 
         font_size = height // 5
         context.set_font_size(font_size)
         context.set_source_rgb(0.0, 0.0, 0.0)
         context.move_to(1, font_size)
-        context.show_text(f"{self.clip_number}")
+        if self.is_midi:
+            context.show_text(f"{self.clip_number}")
+        elif self.clip_number in data.audio_clips:
+            context.show_text(os.path.basename(data.audio_clips[self.clip_number].file.value))
 
     def draw_midi_preview(self, area: Gtk.DrawingArea, context: cairo.Context):
 
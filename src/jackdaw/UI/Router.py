@@ -151,9 +151,12 @@ class Router(Gtk.Window, Singleton):
         context.rectangle(0, 0, width, height)
         context.fill()
 
-        # Draw connections
-        context.set_source_rgb(0.0, 0.0, 0.0)
+        # Draw connections (in black, or in red if they close a cycle, so aren't rendered)
+        from jackdaw.Rendering.Renderer import Renderer
+        cyclic = Renderer.instance().cyclic_routes()
         for route in data.routes:
+            is_cyclic = Renderer.route_from_data(route) in cyclic
+            context.set_source_rgb(*(Colors.cyclic_route if is_cyclic else (0.0, 0.0, 0.0)))
             start = self.get_node_coords(route.from_component.value, route.from_node.value, False)
             end = self.get_node_coords(route.to_component.value, route.to_node.value, True)
 
@@ -172,8 +175,7 @@ class Router(Gtk.Window, Singleton):
             context.move_to(*(centre + (n - t) * d))
             context.line_to(*centre)
             context.line_to(*(centre + (-n - t) * d))
-
-        context.stroke()
+            context.stroke()
 
     def on_click_background(self, area: Gtk.Widget, button: Gdk.EventButton):
 
@@ -1,5 +1,5 @@
 import cairo
-from jackdaw.Gi import Gtk, Gdk
+from jackdaw.Gi import Gtk, Gdk, GLib
 from jackdaw.UI.RoutingNode import RoutingNode
 from jackdaw.UI.Colors import Colors
 from jackdaw.Data import data
@@ -66,11 +66,52 @@ class RouterComponent(Gtk.Grid):
         self.show_all()
 
         def on_click(button: Gdk.EventButton):
+            if button.button == Gdk.BUTTON_SECONDARY:
+                self.show_freeze_menu(label, button)
+                return
             from jackdaw.UI.Router import Router
             Router.instance().on_click_routing_node(self.id, label, False)
 
         output_node.add_click_event(on_click)
 
+    def show_freeze_menu(self, label: str, button: Gdk.EventButton):
+        from jackdaw.Rendering.Renderer import Renderer
+        from jackdaw.Rendering.Typedefs import Node
+        renderer = Renderer.instance()
+        node = Node(self.id, label)
+
+        menu = Gtk.Menu()
+        if renderer.is_frozen(node):
+            entry = Gtk.MenuItem(label="Unfreeze")
+            entry.connect("button-press-event", lambda a, b: renderer.unfreeze(node))
+        else:
+            entry = Gtk.MenuItem(label="Freeze")
+            entry.connect("button-press-event", lambda a, b: self.freeze(label))
+        menu.attach(entry, 0, 1, 0, 1)
+        menu.show_all()
+        menu.popup(None, None, None, None, button.button, button.time)
+
+    def freeze(self, label: str):
+        # Freeze an output node in the background, showing how far along it is on its label
+        from jackdaw.Rendering.Renderer import Renderer
+        from jackdaw.Rendering.Typedefs import Node
+        renderer = Renderer.instance()
+        job = renderer.start_freeze(Node(self.id, label))
+        node: RoutingNode = self.outputs[label]
+
+        def poll() -> bool:
+            if not job.done:
+                node.label.set_text(f"{label} (freezing, {job.progress:.0%})")
+                node.label.set_opacity(1.0)
+                return True
+            node.label.set_text(label)
+            node.label.set_opacity(0.0)
+            if Renderer.instance_exists() and Renderer.instance() is renderer:
+                renderer.finish_freeze(job)
+            return False
+
+        GLib.timeout_add(100, poll)
+
     def get_node_coords(self, node_name: str, input: bool):
         d = self.inputs if input else self.outputs
         if node_name not in d:
@@ -1,22 +1,7 @@
-from jackdaw.Data.ProjectData import RouterComponentData
 from jackdaw.UI.RouterComponent import RouterComponent
-from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
 from jackdaw.Gi import Gtk
 
 
-class MasterOutputData(RouterComponentData):
-
-    def create_component(self, id: int):
-        return MasterOutput(id)
-
-    def create_component_renderer(self):
-        return MasterOutputRenderer()
-
-
-class MasterOutputRenderer(ComponentRenderer):
-    pass
-
-
 class MasterOutput(RouterComponent):
 
     def __init__(self, id: int):
@@ -1,31 +1,7 @@
-from jackdaw.Data.ProjectData import RouterComponentData
 from jackdaw.UI.RouterComponent import RouterComponent
-from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
 from jackdaw.Gi import Gtk
 import cairo
 import numpy as np
-from typing import Dict
-from jackdaw.Rendering.Signal import Signal
-
-
-class SawtoothSignalData(RouterComponentData):
-
-    def create_component(self, id: int):
-        return SawtoothSignal(id)
-
-    def create_component_renderer(self):
-        return SawtoothSignalRenderer()
-
-
-class SawtoothSignalRenderer(ComponentRenderer):
-
-    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
-        # Render a sine signal
-        result = Signal()
-        ts: np.ndarray = self.sample_range_to_times(start, samples)
-        ts *= 440
-        result[0] = ts - np.floor(ts)
-        return result
 
 
 class SawtoothSignal(RouterComponent):
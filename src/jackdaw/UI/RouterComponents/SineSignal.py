@@ -1,30 +1,7 @@
-from jackdaw.Data.ProjectData import RouterComponentData
 from jackdaw.UI.RouterComponent import RouterComponent
-from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
 from jackdaw.Gi import Gtk
 import cairo
 import numpy as np
-from typing import Dict
-from jackdaw.Rendering.Signal import Signal
-
-
-class SineSignalData(RouterComponentData):
-
-    def create_component(self, id: int):
-        return SineSignal(id)
-
-    def create_component_renderer(self):
-        return SineSignalRenderer()
-
-
-class SineSignalRenderer(ComponentRenderer):
-
-    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
-        # Render a sine signal
-        result = Signal()
-        ts: np.ndarray = self.sample_range_to_times(start, samples)
-        result[0] = 0.5 - 0.5 * np.cos(ts * np.pi * 2 * 440)
-        return result
 
 
 class SineSignal(RouterComponent):
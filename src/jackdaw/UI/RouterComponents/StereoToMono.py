@@ -1,9 +1,5 @@
-from jackdaw.Data.ProjectData import RouterComponentData
 from jackdaw.UI.RouterComponent import RouterComponent
-from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
 from jackdaw.Gi import Gtk
-from typing import Dict
-from jackdaw.Rendering.Signal import Signal
 
 
 class StereoToMono(RouterComponent):
@@ -14,26 +10,3 @@ class StereoToMono(RouterComponent):
         self.add_output_node("Left")
         self.add_output_node("Right")
         self.content = Gtk.Label(label="Stereo\nTo\nMono")
-
-
-class StereoToMonoRenderer(ComponentRenderer):
-
-    def render(self, output_node: str, start: int, samples: int, inputs: Dict[str, Signal]) -> Signal:
-        result = Signal()
-        if "In" not in inputs:
-            return result
-
-        if output_node == "Left":
-            result[0] = inputs["In"][0]
-        elif output_node == "Right":
-            result[0] = inputs["In"][1]
-        return result
-
-
-class StereoToMonoData(RouterComponentData):
-
-    def create_component_renderer(self):
-        return StereoToMonoRenderer()
-
-    def create_component(self, id: int):
-        return StereoToMono(id)
@@ -1,26 +1,6 @@
 from jackdaw.UI.RouterComponent import RouterComponent
 from jackdaw.Gi import Gtk
 from jackdaw.Data import data
-from jackdaw.Data.DataObjects import *
-from jackdaw.Data.ProjectData import RouterComponentData
-from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
-
-
-class TrackSignalData(RouterComponentData):
-
-    def __init__(self):
-        super().__init__()
-        self.track = RawDataObject(0)
-
-    def create_component(self, id: int):
-        return TrackSignal(id)
-
-    def create_component_renderer(self):
-        return TrackSignalRenderer()
-
-
-class TrackSignalRenderer(ComponentRenderer):
-    pass
 
 
 class TrackSignal(RouterComponent):
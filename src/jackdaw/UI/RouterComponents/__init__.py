@@ -1,5 +1,6 @@
 import os
 import importlib
+import jackdaw.Components  # The data/renderers behind the widgets
 
 # Import all router components
 for f in os.listdir(os.path.dirname(__file__)):
@@ -0,0 +1,74 @@
+import wave
+import numpy as np
+from typing import List
+from jackdaw.Data import data
+from jackdaw.Data.DataObjects import RawDataObject
+from jackdaw.Data.ProjectData import AudioClipData, PlaylistClipData, RouterComponentData, \
+    RouterComponentDataWrapper, RouterRouteData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+
+
+class GainRenderer(ComponentRenderer):
+
+    purity = ComponentRenderer.STATELESS
+
+    def __init__(self, gain):
+        self.gain = gain
+
+    def render(self, output_node, start, samples, inputs):
+        result = inputs["In"].copy()
+        for channel in result:
+            result[channel] = result[channel] * self.gain
+        return result
+
+
+class GainData(RouterComponentData):
+
+    def __init__(self):
+        super().__init__()
+        self.gain = RawDataObject(1.0)
+
+    def create_component_renderer(self):
+        return GainRenderer(self.gain.value)
+
+
+def chain_project(datatypes: List[str]):
+    # Components of the given types, each feeding the next (through "Out" -> "In"), the last one the master output
+    for i, datatype in enumerate(datatypes + ["MasterOutputData"]):
+        wrapper = RouterComponentDataWrapper()
+        wrapper.datatype.value = datatype
+        data.router_components[i] = wrapper
+    for i in range(len(datatypes)):
+        route = RouterRouteData()
+        route.from_component.value = i
+        route.from_node.value = "Out"
+        route.to_component.value = i + 1
+        route.to_node.value = "In" if i + 1 < len(datatypes) else "To Master"
+        data.routes.add(route)
+
+
+def gain_project():
+    # Sine -> Gain -> Master output
+    chain_project(["SineSignalData", "GainData"])
+
+
+def audio_clip_project(file: str, beat: float = 0.0) -> PlaylistClipData:
+    # An audio clip of the file at the given beat of track 0, played by a track signal into the master output
+    audio_clip = AudioClipData()
+    audio_clip.file.value = file
+    data.audio_clips[0] = audio_clip
+    clip = PlaylistClipData()
+    clip.type.value = "Audio"
+    clip.beat.value = beat
+    data.playlist_clips.add(clip)
+    chain_project(["TrackSignalData"])
+    return clip
+
+
+def write_pcm(path, samples: np.ndarray, sample_rate: int):
+    # samples: (frames, channels) in [-1, 1], written as 16 bit PCM
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(samples.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(np.round(samples * 32767).astype("<i2").tobytes())
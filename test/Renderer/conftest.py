@@ -0,0 +1,26 @@
+import pytest
+from jackdaw.Data.ProjectData import ProjectData
+from jackdaw.Rendering.Renderer import Renderer
+from .Projects import gain_project
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    # An empty project in a directory of its own (the working directory), with a render cache of its
+    # own. Whatever is built in it, and the Renderer if one is started over it, are torn down afterwards.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Renderer, "CACHE_PATH", str(tmp_path / "cache.sqlite"))
+    try:
+        yield tmp_path
+    finally:
+        try:
+            Renderer.clear_instance()
+        finally:
+            ProjectData.clear_instance()
+
+
+@pytest.fixture
+def renderer(project):
+    # A Renderer over the gain project (see Projects.gain_project)
+    gain_project()
+    return Renderer.instance()
@@ -0,0 +1,76 @@
+import os
+import struct
+import numpy as np
+from jackdaw.Rendering.AudioFiles import AudioCache, WavFile, read_audio
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Timeline import beats_to_samples
+from .Projects import audio_clip_project, write_pcm
+
+
+def write_float(path, samples: np.ndarray, sample_rate: int):
+    # samples: (frames, channels), written as float32, with a chunk before the format to skip
+    channels = samples.shape[1]
+    body = samples.astype("<f4").tobytes()
+    fmt = struct.pack("<HHIIHH", 3, channels, sample_rate, sample_rate * channels * 4, channels * 4, 32)
+    chunks = b"LIST" + struct.pack("<I", 3) + b"abc\0" + \
+             b"fmt " + struct.pack("<I", len(fmt)) + fmt + \
+             b"data" + struct.pack("<I", len(body)) + body
+    with open(path, "wb") as f:
+        f.write(b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks)
+
+
+def test_decode(tmp_path):
+    rng = np.random.default_rng(0)
+    samples = rng.uniform(-1, 1, (5000, 2))
+    write_pcm(tmp_path / "pcm.wav", samples, 44100)
+    write_float(tmp_path / "float.wav", samples, 44100)
+    write_pcm(tmp_path / "slow.wav", samples, 22050)
+
+    cache = AudioCache(44100)
+
+    # Opening a file decodes nothing, the samples under each chunk are converted as they are read
+    decoded = cache.decoded(str(tmp_path / "float.wav"))
+    assert decoded.path == str(tmp_path / "float.wav") and decoded.frames == 5000
+    assert np.array_equal(read_audio(decoded, 100, 300), samples[100: 300].T.astype(np.float32))
+    decoded = cache.decoded(str(tmp_path / "pcm.wav"))
+    assert decoded.path == str(tmp_path / "pcm.wav") and decoded.frames == 5000
+    assert np.allclose(read_audio(decoded, 0, 5000), samples.T, atol=1e-4)
+    assert np.allclose(read_audio(decoded, 1234, 1490), samples[1234: 1490].T, atol=1e-4)
+    assert AudioCache(44100).decoded(str(tmp_path / "pcm.wav")) == decoded
+    assert sorted(os.listdir(tmp_path)) == ["float.wav", "pcm.wav", "slow.wav"]
+
+    # Files at another rate are resampled, wherever they are read from
+    decoded = cache.decoded(str(tmp_path / "slow.wav"))
+    assert decoded.frames == 10000
+    resampled = read_audio(decoded, 0, 10000)
+    assert np.allclose(resampled[:, 0::2], samples.T, atol=1e-4)
+    assert np.allclose(resampled[:, 1:-1:2], (samples[:-1] + samples[1:]).T / 2, atol=1e-4)
+    assert np.allclose(read_audio(decoded, 301, 557), resampled[:, 301: 557], atol=1e-6)
+
+    # Files that can't be read have nothing to play
+    (tmp_path / "broken.wav").write_bytes(b"RIFF")
+    assert cache.decoded(str(tmp_path / "broken.wav")) is None
+    assert cache.decoded(str(tmp_path / "missing.wav")) is None
+    assert WavFile(str(tmp_path / "pcm.wav")).channels == 2
+
+
+def test_audio_clip(project):
+    samples = np.random.default_rng(1).uniform(-1, 1, (3000, 2))
+    write_pcm(project / "stem.wav", samples, 44100)
+
+    # An audio clip at beat 0.5 of track 0, played by a track signal into the master output
+    clip = audio_clip_project("stem.wav", 0.5)
+
+    renderer = Renderer.instance()
+    start = beats_to_samples(0.5)
+    left, right = renderer.render_master(0, start + 4000)
+    assert not np.any(left[:start]) and not np.any(right[:start])
+    assert np.allclose(left[start: start + 3000], samples[:, 0], atol=1e-4)
+    assert np.allclose(right[start: start + 3000], samples[:, 1], atol=1e-4)
+    assert not np.any(left[start + 3000:])
+
+    # Moving the clip moves the audio
+    clip.beat.value = 0.0
+    moved, _ = renderer.render_master(0, start + 4000)
+    assert np.allclose(moved[:3000], samples[:, 0], atol=1e-4)
+    assert not np.any(moved[3000:])
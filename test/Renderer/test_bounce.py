@@ -0,0 +1,75 @@
+import os
+import numpy as np
+from jackdaw.Bounce import bounce_project
+from jackdaw.Data.ProjectData import ProjectData
+from jackdaw.Rendering.AudioFiles import WavFile
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Bounce import bounce, LatestChunkStore
+from jackdaw.Rendering.Playback import AudioSink
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import Node
+from .Projects import audio_clip_project, chain_project, write_pcm
+
+
+class ArraySink(AudioSink):
+
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, frames):
+        self.blocks.append(frames.copy())
+
+    @property
+    def frames(self):
+        return np.hstack(self.blocks)
+
+
+def expected_sine(start, end):
+    ts = np.arange(start, end) / 44100
+    return 0.5 - 0.5 * np.cos(ts * np.pi * 2 * 440)
+
+
+def test_latest_chunk_store():
+    store = LatestChunkStore(4)
+    node = Node(0, "Out")
+    signal = Signal()
+    signal[1] = np.ones(4)
+    store.write(node, 0, signal)
+    buffer = store.read(node, 0)
+    store.mix(node, 1, [signal, signal])
+    assert store.read(node, 1) is buffer
+    assert 0 not in buffer
+    assert np.array_equal(buffer[1], np.full(4, 2))
+
+
+def test_bounce(project):
+    # Sine -> Pass through -> Master output
+    chain_project(["SineSignalData", "PassThroughData"])
+    sink = ArraySink()
+    start, end = 100, 3 * Renderer.CHUNK_SIZE + 7
+    stats = bounce(sink, start, end)
+    assert stats.samples == end - start
+    assert np.allclose(sink.frames[0], expected_sine(start, end), atol=1e-6)
+    assert np.array_equal(sink.frames[1], np.zeros(end - start))
+
+    # The same as rendering with the render workers
+    left, right = Renderer.instance().render_master(start, end - start)
+    assert np.array_equal(left, sink.frames[0])
+
+
+def test_bounce_project_elsewhere(project, monkeypatch):
+    # A project that plays an audio file next to it, bounced from another directory
+    (project / "project").mkdir()
+    (project / "elsewhere").mkdir()
+    monkeypatch.setattr(ProjectData, "FILENAME", str(project / "project" / "ProjectData.json"))
+    samples = np.random.default_rng(2).uniform(-1, 1, (3000, 2))
+    write_pcm(project / "project" / "stem.wav", samples, 44100)
+    audio_clip_project("stem.wav")
+    ProjectData.clear_instance()  # (Saving the project)
+
+    monkeypatch.setattr(ProjectData, "FILENAME", "ProjectData.json")
+    monkeypatch.chdir(project / "elsewhere")
+    bounce_project(os.path.join("..", "project", "ProjectData.json"), "bounce.wav", 0, 4000 / 44100, "float32")
+    bounced = WavFile(str(project / "elsewhere" / "bounce.wav"))
+    assert bounced.frames == 4000
+    assert np.allclose(bounced.decode(0, 3000), samples, atol=1e-4)
@@ -0,0 +1,63 @@
+import numpy as np
+from jackdaw.Data import data
+from jackdaw.Data.ProjectData import MidiClipData, MidiNoteData, PlaylistClipData
+from jackdaw.Rendering.NoteIndex import NoteEvents
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Timeline import beats_to_samples
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+from .Projects import chain_project
+
+
+def test_query():
+    rng = np.random.default_rng(0)
+    starts = rng.integers(0, 100000, 500)
+    notes = [(int(s), int(s + rng.integers(1, 3000)), float(f)) for s, f in zip(starts, rng.uniform(50, 500, 500))]
+    events = NoteEvents("jdn_test_query", notes)
+    try:
+        stops = dict(zip(zip(events.starts.tolist(), events.ends.tolist()), events.stops.tolist()))
+        for start in range(0, 100000, 997):
+            found_starts, found_ends, _, found_frequencies = events.query(start, start + 256)
+            found = set(zip(found_starts.tolist(), found_ends.tolist(), found_frequencies.tolist()))
+            assert found == {n for n in notes if n[0] < start + 256 and stops[n[:2]] > start}
+    finally:
+        events.unlink()
+        events.close()
+
+
+def track_project():
+    # A clip with a single A4 on track 0, played by a track signal into the master output
+    note = MidiNoteData()
+    note.note.value = "A4"
+    midi_clip = MidiClipData()
+    midi_clip.notes.add(note)
+    data.midi_clips[0] = midi_clip
+
+    clip = PlaylistClipData()
+    clip.beat.value = 0.5
+    data.playlist_clips.add(clip)
+
+    chain_project(["TrackSignalData"])
+    return clip, note
+
+
+def test_track_signal(project):
+    clip, note = track_project()
+    renderer = Renderer.instance()
+    start, end = beats_to_samples(0.5), beats_to_samples(1.5)
+    stop = end + VoiceEngine.RELEASE
+    left, _ = renderer.render_master(0, stop + 1000)
+
+    # The note sounds from exactly where it starts, until its release has
+    # died away, as a 440 Hz sine (shaped by the envelope of its voice)
+    assert not np.any(left[:start + 1])
+    assert np.all(left[start + 1: start + 20] > 0)
+    ts = np.arange(stop - start)
+    envelope = np.clip(np.minimum(ts / VoiceEngine.ATTACK, (stop - start - ts) / VoiceEngine.RELEASE), 0, 1)
+    assert np.allclose(left[start: stop], 0.25 * envelope * np.sin(2 * np.pi * 440 * ts / 44100), atol=1e-4)
+    assert not np.any(left[stop:])
+
+    # Moving the clip moves the note
+    clip.beat.value = 0.0
+    moved, _ = renderer.render_master(0, stop + 1000)
+    assert np.allclose(moved[:stop - start], left[start: stop], atol=1e-4)
+    assert not np.any(moved[stop - start + 1:])
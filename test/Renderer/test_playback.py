@@ -0,0 +1,137 @@
+import time
+import struct
+import wave
+import numpy as np
+from jackdaw.TimeControl import TimeControl
+from jackdaw.Rendering.Playback import PlaybackEngine, NullSink, WavSink
+
+
+class RampSource:
+
+    def __init__(self, slow_after: int = None):
+        self.requested = []
+        self.held = []
+        self.playhead = None
+        self.slow_after = slow_after
+
+    def request_master(self, start, samples):
+        self.requested.append((start, samples))
+        self.held.append((start, samples))
+
+    def release_master(self, start, samples):
+        self.held.remove((start, samples))
+
+    def set_playhead(self, sample):
+        self.playhead = sample
+
+    def render_master(self, start, samples, timeout=None):
+        if self.slow_after is not None and start >= self.slow_after:
+            return None  # Never rendered in time
+        ramp = (np.arange(start, start + samples) % 100) / 100.0
+        return ramp, -ramp
+
+
+def test_follow_time_control():
+    source = RampSource()
+    sink = NullSink()
+    engine = PlaybackEngine(sink, source, block_samples=100, realtime=False)
+    try:
+        TimeControl.set_playhead_time(1.0)
+        TimeControl.pause()
+        assert not engine.step()
+
+        TimeControl.play()
+        assert engine.step() and engine.step()
+        assert engine.position == PlaybackEngine.SAMPLE_RATE + 200
+        assert source.requested[0] == (PlaybackEngine.SAMPLE_RATE, 100 + PlaybackEngine.SAMPLE_RATE // 2)
+
+        # Moving the playhead moves playback
+        TimeControl.set_playhead_time(0.0)
+        engine.step()
+        assert engine.position == 100
+        assert sink.samples == 300
+        assert engine.underruns == 0
+
+        # Only the window ahead of the playhead is held on to, and nothing once paused
+        assert source.playhead == 0
+        assert source.held == [(0, 100 + PlaybackEngine.SAMPLE_RATE // 2)]
+        TimeControl.pause()
+        engine.step()
+        assert source.held == []
+    finally:
+        TimeControl.pause()
+        TimeControl.set_playhead_time(0.0)
+
+
+def test_errors_keep_playing():
+    # A source that fails now and then doesn't stop playback
+    class FlakySource(RampSource):
+        def render_master(self, start, samples, timeout=None):
+            if start % 300 == 0:
+                raise KeyError(f"Chunk {start} has not been rendered")
+            return super().render_master(start, samples, timeout)
+
+    engine = PlaybackEngine(NullSink(), FlakySource(), block_samples=100, realtime=False)
+    try:
+        TimeControl.set_playhead_time(0.0)
+        TimeControl.play()
+        engine.start()
+        while engine.blocks_played < 10:
+            time.sleep(0.001)
+    finally:
+        TimeControl.pause()
+        engine.stop()
+    assert engine.errors > 0
+
+
+def test_underruns_wav(tmp_path):
+    filename = str(tmp_path / "out.wav")
+    engine = PlaybackEngine(WavSink(filename), RampSource(slow_after=200),
+                            block_samples=100, latency=0.0)
+    try:
+        TimeControl.set_playhead_time(0.0)
+        TimeControl.play()
+        engine.start()
+        while engine.blocks_played < 4:
+            time.sleep(0.001)
+    finally:
+        TimeControl.pause()
+        engine.stop()
+
+    assert engine.underruns == engine.blocks_played - 2
+    with wave.open(filename, "rb") as f:
+        assert f.getnchannels() == 2
+        frames = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2").reshape(-1, 2)
+    assert len(frames) == 100 * engine.blocks_played
+    assert frames[50, 0] == round(0.5 * 32767)
+    assert frames[50, 1] == -round(0.5 * 32767)
+    assert np.all(frames[200:] == 0)
+
+
+def test_wav_formats(tmp_path):
+    ramp = np.linspace(-1.0, 1.0, 11)
+    for sample_format, dtype in [("pcm16", "<i2"), ("pcm24", None), ("float32", "<f4")]:
+        filename = str(tmp_path / f"{sample_format}.wav")
+        sink = WavSink(filename, sample_format)
+        sink.open(PlaybackEngine.SAMPLE_RATE, 2)
+        sink.write(np.vstack((ramp, -ramp)))
+        sink.close()
+
+        with open(filename, "rb") as f:
+            raw = f.read()
+        tag, channels, rate, byte_rate, align, bits = struct.unpack("<HHIIHH", raw[20:36])
+        assert (channels, rate, bits // 8) == (2, PlaybackEngine.SAMPLE_RATE, WavSink.FORMATS[sample_format][1])
+        assert struct.unpack("<I", raw[4:8])[0] == len(raw) - 8
+        size = struct.unpack("<I", raw[40:44])[0]
+        assert size == 11 * 2 * bits // 8
+
+        if dtype is None:
+            # 24-bit samples, sign-extended into 32 bits
+            b = np.frombuffer(raw[44: 44 + size], dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            samples = (b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)) << 8 >> 8
+            scale = 8388607
+        else:
+            samples = np.frombuffer(raw[44: 44 + size], dtype=dtype)
+            scale = 32767 if sample_format == "pcm16" else 1
+        assert np.allclose(samples.reshape(-1, 2)[:, 0] / scale, ramp, atol=1e-4)
+        assert np.allclose(samples.reshape(-1, 2)[:, 1] / scale, -ramp, atol=1e-4)
@@ -0,0 +1,91 @@
+import numpy as np
+import jackdaw.Rendering.RenderCache as RenderCacheModule
+from jackdaw.Rendering.RenderCache import RenderCache, content_keys
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import Node
+
+
+def test_put_get(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache.sqlite"))
+    signal = Signal()
+    signal[1] = np.arange(8.0)
+    cache.put("abc", 3, signal)
+    assert cache.get("abc", 2) is None
+    cache.close()
+
+    # The cache persists, and can be opened again
+    cache = RenderCache(str(tmp_path / "cache.sqlite"))
+    result = cache.get("abc", 3)
+    assert list(result) == [1]
+    assert np.array_equal(result[1], np.arange(8))
+    cache.close()
+
+
+def test_batched_writes(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache.sqlite"))
+    other = RenderCache(str(tmp_path / "cache.sqlite"))
+    signal = Signal()
+    signal[0] = np.ones(8)
+
+    # Puts are seen straight away by the process that made them, by others once written
+    for chunk in range(RenderCache.FLUSH_PUTS - 1):
+        cache.put("abc", chunk, signal)
+    assert cache.get("abc", 0) is not None
+    assert other.get("abc", 0) is None
+    cache.put("abc", RenderCache.FLUSH_PUTS, signal)
+    assert other.get("abc", 0) is not None
+
+    # Uses are written in the same way
+    cache.put("def", 0, signal)
+    cache.flush()
+    used = other._db().execute("SELECT used FROM chunks WHERE key = 'def'").fetchone()[0]
+    assert other.get("def", 0) is not None
+    assert other._db().execute("SELECT used FROM chunks WHERE key = 'def'").fetchone()[0] == used
+    other.flush()
+    assert other._db().execute("SELECT used FROM chunks WHERE key = 'def'").fetchone()[0] > used
+    cache.close()
+    other.close()
+
+
+def test_eviction(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache.sqlite"), max_bytes=10 * 64 * 4)
+    signal = Signal()
+    signal[0] = np.ones(64)
+    for chunk in range(20):
+        cache.put("abc", chunk, signal)
+    cache.get("abc", 0)  # Recently used, so kept
+    cache.evict()
+    assert cache.get("abc", 0) is not None
+    assert cache.get("abc", 1) is None
+    assert cache.get("abc", 19) is not None
+    cache.close()
+
+
+def test_content_keys(monkeypatch):
+    # Two identical sources mixed into one input, and a stateful source
+    a, b, c, s = Node(0, "Out"), Node(1, "Out"), Node(2, "In"), Node(3, "Out")
+    d = Node(4, "In")
+    order = [a, b, s, c, d]
+    parents = {a: set(), b: set(), s: set(), c: {a, b}, d: {c, s}}
+    inout = {a: "output", b: "output", s: "output", c: "input", d: "input"}
+    datatypes = {a: "Sine", b: "Sine", s: "Synth", c: "Mix", d: "Mix"}
+    purities = {a: ComponentRenderer.STATELESS, b: ComponentRenderer.STATELESS,
+                s: ComponentRenderer.STATEFUL, c: ComponentRenderer.TIME_INVARIANT,
+                d: ComponentRenderer.TIME_INVARIANT}
+
+    def keys(freq_b):
+        params = {a: {"freq": 440}, b: {"freq": freq_b}, s: {}, c: {}, d: {}}
+        return content_keys(order, parents, inout, datatypes, params, purities, 256)
+
+    before, after = keys(440), keys(220)
+    assert before[a] == before[b] != ""
+    assert before[a] == after[a]
+    assert before[b] != after[b]
+    assert before[c] != after[c]
+    assert before[s] == before[d] == ""
+    assert keys(440) == before
+
+    # Chunks cached by other versions aren't found
+    monkeypatch.setattr(RenderCacheModule, "CACHE_VERSION", RenderCacheModule.CACHE_VERSION + 1)
+    assert all(keys(440)[n] != before[n] for n in [a, b, c])
@@ -0,0 +1,107 @@
+import numpy as np
+from jackdaw.Rendering.RenderPlan import compile_plans, run_plan, route
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import Node, NodeSpec, Frozen
+
+
+def glue_graph():
+    # Source -> pass through -> split stereo -> join stereo (swapped) -> master
+    source = Node(0, "Out")
+    through_in, through_out = Node(1, "In"), Node(1, "Out")
+    split_in, split_left, split_right = Node(2, "In"), Node(2, "Left"), Node(2, "Right")
+    join_left, join_right, join_out = Node(3, "Left"), Node(3, "Right"), Node(3, "Out")
+    master = Node(4, "To Master")
+
+    parents = {
+        source: set(),
+        through_in: {source},
+        through_out: {through_in},
+        split_in: {through_out},
+        split_left: {split_in},
+        split_right: {split_in},
+        join_left: {split_right},
+        join_right: {split_left},
+        join_out: {join_left, join_right},
+        master: {join_out},
+    }
+    order = [source, through_in, through_out, split_in, split_left, split_right,
+             join_left, join_right, join_out, master]
+    routings = {
+        through_out: "In",
+        split_left: (("In", 0),),
+        split_right: (("In", 1),),
+        join_out: (("Left", 0), ("Right", 0)),
+    }
+    inputs = {through_in, split_in, join_left, join_right, master}
+    specs = {n: NodeSpec("", "input" if n in inputs else "output", tuple(parents[n]),
+                         routing=routings.get(n)) for n in order}
+    return order, parents, specs, source, master
+
+
+def test_glue_is_folded():
+    order, parents, specs, source, master = glue_graph()
+    plan_order, plan_parents, plan_specs = compile_plans(order, parents, specs, {master})
+
+    # Only the source and the master input are left to render
+    assert plan_order == [source, master]
+    assert plan_parents == {source: set(), master: {source}}
+    assert plan_specs[master].parents == (source,)
+
+    # The pass through and the single inputs cost nothing, leaving
+    # the read, the two channels picked out and the join
+    assert [step.op for step in plan_specs[master].plan] == ["read", "route", "route", "route"]
+
+    signal = Signal()
+    signal[0] = np.ones(8)
+    signal[1] = np.full(8, 2.0)
+    inputs = run_plan(plan_specs[master], {source: signal}, 0, 8)
+    assert len(inputs) == 1
+    swapped = inputs[0][1]
+    assert np.array_equal(swapped[0], np.full(8, 2.0))
+    assert np.array_equal(swapped[1], np.ones(8))
+
+
+def test_route_views():
+    signal = Signal()
+    signal[0] = np.ones(8)
+    signal[1] = np.full(8, 2.0)
+
+    # Picking out a channel that is present is a view
+    right = route({"In": signal}, (("In", 1),), 8)
+    assert list(right) == [0]
+    assert np.shares_memory(right[0], signal[1])
+
+    # Channels that are missing come out silent
+    joined = route({"Left": right}, (("Left", 0), ("Right", 0)), 8)
+    assert list(joined) == [0, 1]
+    assert np.array_equal(joined[0], np.full(8, 2.0))
+    assert np.array_equal(joined[1], np.zeros(8))
+
+    # Routing nothing but silence is silent, without touching any samples
+    assert route({"Left": Signal.silence(8)}, (("Left", 0), ("Right", 0)), 8).silent
+
+
+def test_frozen_is_read(tmp_path):
+    order, parents, specs, source, master = glue_graph()
+    path = str(tmp_path / "frozen.f32")
+    np.arange(16, dtype=Signal.DTYPE).tofile(path)
+    split_left = Node(2, "Left")
+    specs[split_left] = specs[split_left]._replace(frozen=Frozen(path, 1))
+    plan_order, plan_parents, plan_specs = compile_plans(order, parents, specs, {master})
+
+    # Only the right channel is still rendered from the source
+    assert plan_order == [source, master]
+    assert [(step.op, step.node) for step in plan_specs[master].plan] == \
+           [("read", source), ("frozen", split_left), ("route", Node(2, "Right")), ("route", Node(3, "Out"))]
+
+    # Reads past the end of the file are silent
+    signal = Signal()
+    signal[1] = np.full(8, 2.0)
+    joined = run_plan(plan_specs[master], {source: signal}, 12, 8)[0][1]
+    assert np.array_equal(joined[0], np.full(8, 2.0))
+    assert np.array_equal(joined[1], [12, 13, 14, 15, 0, 0, 0, 0])
+
+    # With the whole source frozen, nothing is rendered but the master
+    specs[source] = specs[source]._replace(frozen=Frozen(path, 2))
+    plan_order, _, _ = compile_plans(order, parents, specs, {master})
+    assert plan_order == [master]
@@ -0,0 +1,43 @@
+import json
+from jackdaw.Rendering.RenderStats import RenderStats, summarize, chrome_trace
+from jackdaw.Rendering.Typedefs import Node, NodeSpec, RenderTask
+
+NODE = Node(3, "Out")
+
+
+def task(chunk, requested=1.0, ready=1.5):
+    return RenderTask(NODE, chunk, 1, NodeSpec("Test", "output", ()), (requested, ready))
+
+
+def test_record(monkeypatch):
+    monkeypatch.setattr(RenderStats, "CAPACITY", 4)
+    stats = RenderStats(2)
+    try:
+        stats.record(1, task(0), 2.0, 2.25, 2048, False)
+        s, = stats.records()
+        assert (s.node, s.chunk, s.worker, s.cached, s.bytes) == (NODE, 0, 1, False, 2048)
+        assert (s.parent_wait, s.queued, s.compute) == (0.5, 0.5, 0.25)
+
+        # Only the most recent records are kept
+        for chunk in range(1, 6):
+            stats.record(0, task(chunk), 2.0 + chunk, 2.5 + chunk, 0, True)
+        assert [s.chunk for s in stats.records()] == [0, 2, 3, 4, 5]
+        assert summarize(stats.records())[NODE].chunks == 5
+
+        stats.clear()
+        assert stats.records() == []
+    finally:
+        stats.close()
+
+
+def test_chrome_trace():
+    stats = RenderStats(1)
+    try:
+        stats.record(0, task(0), 2.0, 2.5, 0, False)
+        stats.record(0, task(1), 3.0, 3.25, 0, True)
+        trace = json.loads(json.dumps(chrome_trace(stats.records())))
+        events = trace["traceEvents"]
+        assert [(e["name"], e["cat"], e["ts"], e["dur"]) for e in events] == \
+            [("3.Out", "render", 0.0, 500000.0), ("3.Out", "cache", 1000000.0, 250000.0)]
+    finally:
+        stats.close()
@@ -0,0 +1,176 @@
+import threading
+import numpy as np
+from jackdaw.Data import data
+from jackdaw.Data.ProjectData import RouterRouteData
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Typedefs import Node, Route, SampleRange
+from .Projects import gain_project
+
+
+def test_parameter_invalidation(renderer):
+    left, _ = renderer.render_master(0, Renderer.CHUNK_SIZE)
+    sine, gain, master = Node(0, "Out"), Node(1, "Out"), Node(2, "To Master")
+
+    # Moving a component doesn't affect rendering
+    data.router_components[1].component_data.position.value = (300, 200)
+    assert renderer._scheduler.is_done(gain, 0)
+
+    # Changing the gain invalidates the gain and what it feeds, but not the sine
+    # (holding the scheduler's lock, so nothing can be re-rendered meanwhile)
+    with renderer._scheduler._lock:
+        data.router_components[1].component_data.gain.value = 0.5
+        assert renderer._scheduler.is_done(sine, 0)
+        assert not renderer._scheduler.is_done(gain, 0)
+        assert not renderer._scheduler.is_done(master, 0)
+    halved, _ = renderer.render_master(0, Renderer.CHUNK_SIZE)
+    assert np.allclose(halved, left * 0.5)
+
+    # Every task was recorded, the gain node twice
+    rendered = [(s.node, s.chunk) for s in renderer.stats()]
+    assert rendered.count((gain, 0)) == 2
+    assert rendered.count((sine, 0)) == 1
+
+
+def test_render_while_editing(renderer):
+    # Master output read from another thread (as the playback engine does) while
+    # the gain is edited is always whole, rendered either before or after an edit
+    left, _ = renderer.render_master(0, 2048)
+    failures = []
+    stop = threading.Event()
+
+    def play():
+        try:
+            while not stop.is_set():
+                result, _ = renderer.render_master(0, 2048)
+                assert np.allclose(result, left) or np.allclose(result, left * 0.5)
+        except Exception as e:
+            failures.append(e)
+
+    player = threading.Thread(target=play)
+    player.start()
+    try:
+        for edit in range(200):
+            data.router_components[1].component_data.gain.value = 0.5 if edit % 2 == 0 else 1.0
+    finally:
+        stop.set()
+        player.join()
+    assert failures == []
+
+
+def test_range_invalidation(renderer):
+    size = Renderer.CHUNK_SIZE
+    left, _ = renderer.render_master(0, 4 * size)
+
+    # Only the chunks overlapping the range are rendered again, all the way downstream
+    with renderer._scheduler._lock:
+        renderer.invalidate({Node(0, "Out"): [SampleRange(2 * size + 10, 2 * size + 20)]})
+        for node in [Node(0, "Out"), Node(1, "Out"), Node(2, "To Master")]:
+            assert [c for c in range(4) if renderer._scheduler.is_done(node, c)] == [0, 1, 3]
+    again, _ = renderer.render_master(0, 4 * size)
+    assert np.array_equal(again, left)
+
+
+def test_freeze(project, renderer):
+    size = Renderer.CHUNK_SIZE
+    sine, gain = Node(0, "Out"), Node(1, "Out")
+    left, _ = renderer.render_master(0, 4 * size)
+
+    # Freezing writes the whole output of the gain next to the project, and the
+    # sine (which only feeds the gain) isn't rendered any more
+    renderer.freeze(gain, 3 * size)
+    assert renderer.is_frozen(gain)
+    files = list((project / Renderer.FROZEN_DIRECTORY).iterdir())
+    assert len(files) == 1
+    assert sine not in renderer._plan
+    frozen, _ = renderer.render_master(0, 4 * size)
+    assert np.array_equal(frozen[0: 3 * size], left[0: 3 * size])
+    assert np.all(frozen[3 * size:] == 0)  # Past the end of the file
+
+    # Edits upstream (including the frozen node itself) have no effect
+    data.router_components[1].component_data.gain.value = 0.5
+    assert np.array_equal(renderer.render_master(0, 4 * size)[0], frozen)
+
+    # Until it is unfrozen
+    renderer.unfreeze(gain)
+    assert not renderer.is_frozen(gain)
+    assert not files[0].exists()
+    halved, _ = renderer.render_master(0, 4 * size)
+    assert np.allclose(halved, left * 0.5)
+
+    # Freezing in the background only switches over to the file when finished
+    job = renderer.start_freeze(gain, 3 * size)
+    assert job.wait(30) and job.progress == 1 and not renderer.is_frozen(gain)
+    assert renderer.finish_freeze(job) and renderer.is_frozen(gain)
+    assert np.array_equal(renderer.render_master(0, 3 * size)[0], halved[0: 3 * size])
+
+    # Or not at all, if it is cancelled
+    renderer.unfreeze(gain)
+    job = renderer.start_freeze(gain, 3 * size)
+    job.cancel()
+    job.wait()
+    assert not renderer.finish_freeze(job) and not renderer.is_frozen(gain)
+    assert len(list((project / Renderer.FROZEN_DIRECTORY).iterdir())) == 0
+
+
+def test_meter(project):
+    gain_project()
+    data.router_components[1].component_data.gain.value = 0.5
+    renderer = Renderer.instance()
+    size = Renderer.CHUNK_SIZE
+    gain = Node(1, "Out")
+    assert renderer.meter(gain, SampleRange(0, 4 * size)).chunks == 0
+
+    left, _ = renderer.render_master(0, 4 * size)
+    levels = renderer.meter(gain, SampleRange(10, 4 * size - 10))
+    assert levels.chunks == 4
+    assert np.isclose(levels.peak[0], np.abs(left).max())
+    assert np.isclose(levels.rms[0], np.sqrt(np.mean(left ** 2)), rtol=1e-4)
+    assert levels.peak[1] == 0
+
+
+def test_waveform(renderer):
+    size = Renderer.CHUNK_SIZE
+    gain = Node(1, "Out")
+    assert np.all(np.isnan(renderer.waveform(gain, SampleRange(0, 64 * size), 4).mins))
+
+    # Drawn from the pyramid, a pixel per 16 chunks
+    left, _ = renderer.render_master(0, 64 * size)
+    waveform = renderer.waveform(gain, SampleRange(0, 64 * size), 4)
+    assert np.array_equal(waveform.mins[0], left.reshape(4, -1).min(axis=1))
+    assert np.array_equal(waveform.maxs[0], left.reshape(4, -1).max(axis=1))
+    assert np.array_equal(waveform.maxs[1], [0, 0, 0, 0])
+
+    # Drawn from the samples, zoomed in
+    waveform = renderer.waveform(gain, SampleRange(10, 10 + 2 * size), 2 * size)
+    assert np.array_equal(waveform.mins[0], left[10: 10 + 2 * size])
+
+    # And again once the gain changes
+    data.router_components[1].component_data.gain.value = 0.5
+    halved, _ = renderer.render_master(0, 64 * size)
+    assert np.array_equal(renderer.waveform(gain, SampleRange(0, 64 * size), 4).maxs[0],
+                          halved.reshape(4, -1).max(axis=1))
+
+
+def test_cyclic_routes(project):
+    # A project that feeds the gain back into itself still opens, and renders without the feedback
+    gain_project()
+    feedback = RouterRouteData()
+    feedback.from_component.value = 1
+    feedback.from_node.value = "Out"
+    feedback.to_component.value = 1
+    feedback.to_node.value = "In"
+    data.routes.add(feedback)
+    renderer = Renderer.instance()
+    cycle = Route(Node(1, "Out"), Node(1, "In"))
+    assert renderer.cyclic_routes() == {cycle}
+    left, _ = renderer.render_master(0, Renderer.CHUNK_SIZE)
+    assert np.any(left)
+
+    # Taking it away, then adding it back while open, is fine too
+    data.routes.remove(feedback)
+    assert renderer.cyclic_routes() == set()
+    data.routes.add(feedback)
+    assert renderer.cyclic_routes() == {cycle}
+    data.router_components[1].component_data.gain.value = 0.5
+    halved, _ = renderer.render_master(0, Renderer.CHUNK_SIZE)
+    assert np.allclose(halved, left * 0.5)
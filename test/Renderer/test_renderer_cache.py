@@ -0,0 +1,95 @@
+from jackdaw.Data.DataObjects import RawDataObject
+from jackdaw.Data.ProjectData import RouterComponentData
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+from jackdaw.Rendering.RendererCache import RendererCache, renderer_purity
+from jackdaw.Rendering.Typedefs import Node, NodeSpec, RenderTask
+
+
+class CountingRenderer(ComponentRenderer):
+
+    def __init__(self):
+        self.calls = []
+
+    def render(self, output_node, start, samples, inputs):
+        raise NotImplementedError()
+
+    def prepare(self):
+        self.calls.append("prepare")
+
+    def reset(self):
+        self.calls.append("reset")
+
+    def release(self):
+        self.calls.append("release")
+
+
+class CountingData(RouterComponentData):
+
+    def create_component_renderer(self):
+        return CountingRenderer()
+
+
+def task(chunk, version=1, datatype="CountingData"):
+    return RenderTask(Node(0, "Out"), chunk, version, NodeSpec(datatype, "output", ()))
+
+
+def test_renderer_lifecycle():
+    cache = RendererCache()
+
+    # The same renderer is used for consecutive chunks
+    renderer = cache.get(task(0))
+    assert cache.get(task(1)) is renderer
+    assert renderer.calls == ["prepare"]
+
+    # Skipping a chunk, or a new version of the node, resets it
+    assert cache.get(task(3)) is renderer
+    assert cache.get(task(4, version=2)) is renderer
+    assert renderer.calls == ["prepare", "reset", "reset"]
+
+    cache.release(Node(0, "Out"))
+    assert renderer.calls[-1] == "release"
+    assert len(cache) == 0
+    assert cache.get(task(5)) is not renderer
+
+
+class StatelessData(RouterComponentData):
+
+    def create_component_renderer(self):
+        renderer = CountingRenderer()
+        renderer.purity = ComponentRenderer.STATELESS
+        return renderer
+
+
+def test_stateless_not_reset():
+    cache = RendererCache()
+    renderer = cache.get(task(3, datatype="StatelessData"))
+    cache.get(task(0, datatype="StatelessData"))
+    assert renderer.calls == ["prepare"]
+    assert renderer_purity("StatelessData") == ComponentRenderer.STATELESS
+    assert renderer_purity("CountingData") == ComponentRenderer.STATEFUL
+
+
+class LevelData(RouterComponentData):
+
+    def __init__(self):
+        super().__init__()
+        self.level = RawDataObject(0)
+
+    def create_component_renderer(self):
+        renderer = CountingRenderer()
+        renderer.level = self.level.value
+        return renderer
+
+
+def test_parameters_recreate_renderer():
+    cache = RendererCache()
+    spec = NodeSpec("LevelData", "output", (), parameters={"level": 1})
+    renderer = cache.get(RenderTask(Node(0, "Out"), 0, 1, spec))
+    assert cache.get(RenderTask(Node(0, "Out"), 1, 1, spec)) is renderer
+
+    # A renderer created with stale parameters is let go of
+    spec = spec._replace(parameters={"level": 2})
+    new_renderer = cache.get(RenderTask(Node(0, "Out"), 2, 2, spec))
+    assert new_renderer is not renderer
+    assert (renderer.level, new_renderer.level) == (1, 2)
+    assert renderer.calls == ["prepare", "release"]
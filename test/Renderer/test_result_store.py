@@ -0,0 +1,148 @@
+import numpy as np
+import multiprocessing as mp
+from jackdaw.Rendering.ResultStore import ResultStore
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.Typedefs import Node
+
+
+def chunk_signal(chunk: int, size: int, channels=(0, 1)) -> Signal:
+    signal = Signal()
+    for c in channels:
+        signal[c] = np.arange(chunk * size, (chunk + 1) * size) + 0.5 * c
+    return signal
+
+
+def test_write_read():
+    store = ResultStore(16)
+    node = Node(0, "Out")
+    try:
+        assert not store.has(node, 3)
+        store.write(node, 3, chunk_signal(3, 16))
+        assert store.has(node, 3)
+        assert not store.has(node, 2)
+
+        result = store.read(node, 3)
+        assert np.array_equal(result[0], np.arange(48, 64))
+        assert np.array_equal(result[1], np.arange(48, 64) + 0.5)
+    finally:
+        store.release(node)
+
+
+def test_read_range_across_blocks():
+    size = 4
+    store = ResultStore(size)
+    node = Node(1, "Out")
+    try:
+        chunks = ResultStore.BLOCK_CHUNKS + 4
+        for c in range(chunks):
+            store.write(node, c, chunk_signal(c, size))
+
+        # Within a single block, we get a view onto shared memory
+        view = store.read_range(node, 3, 10)
+        assert np.array_equal(view[0], np.arange(3, 13))
+        assert not view[0].flags.owndata
+
+        # Across blocks we get a copy
+        start = ResultStore.BLOCK_CHUNKS * size - 5
+        copy = store.read_range(node, start, 10)
+        assert np.array_equal(copy[0], np.arange(start, start + 10))
+        assert np.array_equal(copy[1], np.arange(start, start + 10) + 0.5)
+    finally:
+        store.release(node)
+
+
+def test_invalidate_release():
+    store = ResultStore(8)
+    node = Node(2, "In")
+    try:
+        for c in range(10):
+            store.write(node, c, chunk_signal(c, 8, channels=(0,)))
+        store.invalidate(node, 5)
+        assert all(store.has(node, c) for c in range(5))
+        assert not any(store.has(node, c) for c in range(5, 10))
+        assert 1 not in store.read(node, 0)
+    finally:
+        store.release(node)
+    assert not store.has(node, 0)
+
+
+def test_invalidate_range():
+    store = ResultStore(8)
+    node = Node(2, "Out")
+    try:
+        for c in range(10):
+            store.write(node, c, chunk_signal(c, 8))
+        store.invalidate(node, 2, 7)
+        assert [c for c in range(10) if store.has(node, c)] == [0, 1, 7, 8, 9]
+    finally:
+        store.release(node)
+
+
+def write_chunks(store: ResultStore, node: Node):
+    for c in range(4):
+        store.write(node, c, chunk_signal(c, store.chunk_size))
+    store.close()
+
+
+def test_write_from_other_process():
+    store = ResultStore(32)
+    node = Node(3, "Out")
+    try:
+        p = mp.Process(target=write_chunks, args=(store, node))
+        p.start()
+        p.join()
+        assert np.array_equal(store.read_range(node, 0, 128)[1], np.arange(128) + 0.5)
+    finally:
+        store.release(node)
+
+
+def test_mix():
+    store = ResultStore(8)
+    node = Node(4, "In")
+    try:
+        # Stale data in the slot doesn't leak into the mix
+        store.write(node, 0, chunk_signal(0, 8))
+        store.mix(node, 0, [chunk_signal(0, 8, channels=(0,)), chunk_signal(0, 8, channels=(0,))])
+        result = store.read(node, 0)
+        assert np.array_equal(result[0], 2 * np.arange(8))
+        assert 1 not in result
+        assert not result[0].flags.writeable
+    finally:
+        store.release(node)
+
+
+def test_levels():
+    size = 8
+    store = ResultStore(size)
+    node = Node(5, "Out")
+    try:
+        # Chunks across two blocks (only the mono ones mixed), and one that isn't rendered
+        chunks = ResultStore.BLOCK_CHUNKS + 4
+        for c in range(chunks):
+            if c == 3:
+                continue
+            if c % 2 == 0:
+                store.write(node, c, chunk_signal(c, size))
+            else:
+                store.mix(node, c, [chunk_signal(c, size, channels=(0,))])
+
+        samples = np.concatenate([chunk_signal(c, size)[0] for c in range(10, chunks) if c != 3])
+        levels = store.levels(node, 10, None)
+        assert levels.chunks == chunks - 10
+        assert np.isclose(levels.peak[0], np.abs(samples).max())
+        assert np.isclose(levels.rms[0], np.sqrt(np.mean(samples ** 2)), rtol=1e-5)
+
+        levels = store.levels(node, 0, 6)
+        assert levels.chunks == 5
+        assert levels.peak[1] == 4 * size + size - 1 + 0.5  # (From the even chunks only)
+
+        # As are the min and max of each chunk
+        mins, maxs = store.extremes(node, 2, 5)
+        assert np.array_equal(mins[[0, 2], 0], [2 * size, 4 * size]) and mins[1, 0] == np.inf
+        assert np.array_equal(maxs[[0, 2], 1], [3 * size - 0.5, 5 * size - 0.5]) and maxs[1, 1] == -np.inf
+
+        # Invalidated chunks don't count
+        store.invalidate(node, 2)
+        assert store.levels(node, 0, None).chunks == 2
+    finally:
+        store.release(node)
@@ -0,0 +1,92 @@
+from jackdaw.Rendering.RoutingGraph import topological_order, RoutingCycleException, RoutingGraph
+from jackdaw.Rendering.Typedefs import Node, Route
+
+
+def assert_valid_order(parents, order):
+    assert set(order) == set(parents)
+    position = {n: i for i, n in enumerate(order)}
+    for n in parents:
+        for p in parents[n]:
+            assert position[p] < position[n]
+
+
+def test_topological_order():
+    # Two sources mixed into one component, which feeds two outputs
+    parents = {
+        Node(3, "Out"): {Node(3, "In")},
+        Node(3, "In"): {Node(0, "Out"), Node(1, "Out")},
+        Node(0, "Out"): set(),
+        Node(1, "Out"): set(),
+        Node(4, "In"): {Node(3, "Out")},
+        Node(5, "In"): {Node(3, "Out"), Node(1, "Out")},
+    }
+    assert_valid_order(parents, topological_order(parents))
+
+
+def test_long_chain():
+    n = 5000
+    parents = {Node(i, "Out"): {Node(i + 1, "Out")} for i in range(n)}
+    parents[Node(n, "Out")] = set()
+    order = topological_order(parents)
+    assert order[0] == Node(n, "Out")
+    assert_valid_order(parents, order)
+
+
+def test_cycle():
+    a, b, c, d = Node(0, "Out"), Node(1, "In"), Node(1, "Out"), Node(2, "In")
+    parents = {a: set(), b: {a, c}, c: {b}, d: {c}}
+    try:
+        topological_order(parents)
+        assert False
+    except RoutingCycleException as e:
+        assert set(e.cycle) == {b, c}
+
+
+def route(from_id, to_id):
+    return Route(Node(from_id, "Out"), Node(to_id, "In"))
+
+
+def test_graph_matches_rebuild():
+    # Edit a graph one route at a time, checking it against
+    # the parent structure rebuilt from scratch each time
+    graph = RoutingGraph()
+    routes = set()
+    edits = [route(0, 1), route(1, 2), route(0, 2), route(2, 3), route(1, 3)]
+    for r in edits + edits[::2]:
+        if r in routes:
+            routes.remove(r)
+        else:
+            routes.add(r)
+        graph.update(routes)
+
+        expected = {n: set() for r in routes for n in r}
+        for r in routes:
+            expected[r.to_node].add(r.from_node)
+        for n in expected:
+            if n.node == "Out":
+                expected[n].update(Node(n.id, "In") for r in routes if r.to_node.id == n.id)
+
+        assert graph.parents == expected
+        for n in expected:
+            for p in expected[n]:
+                assert n in graph.children[p]
+        assert_valid_order(expected, graph.render_order())
+
+
+def test_graph_invalidation():
+    graph = RoutingGraph()
+    routes = {route(0, 1), route(1, 2), route(3, 4)}
+    graph.update(routes)
+    assert graph.downstream(Node(1, "In")) == {Node(1, "In"), Node(1, "Out"), Node(2, "In")}
+
+    # Re-routing 1 -> 2 into 4 invalidates what was, and is now, downstream
+    added, removed, invalidated = graph.update({route(0, 1), route(1, 4), route(3, 4)})
+    assert added == set()
+    assert removed == {Node(2, "In")}
+    assert invalidated == {Node(2, "In"), Node(4, "In")}
+    assert graph.downstream(Node(0, "Out")) == {Node(0, "Out"), Node(1, "In"), Node(1, "Out"), Node(4, "In")}
+
+    # Unrelated parts of the graph aren't invalidated
+    added, removed, invalidated = graph.update({route(0, 1), route(1, 4), route(3, 4), route(5, 6)})
+    assert invalidated == added == {Node(5, "Out"), Node(6, "In")}
+    assert graph.downstream(Node(0, "Out")) == {Node(0, "Out"), Node(1, "In"), Node(1, "Out"), Node(4, "In")}
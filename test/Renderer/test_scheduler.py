@@ -0,0 +1,228 @@
+from jackdaw.Rendering.Scheduler import RenderScheduler, RenderFailedException
+from jackdaw.Rendering.Typedefs import Node, NodeSpec, ReleaseTask
+from jackdaw.Rendering.ComponentRenderer import ComponentRenderer
+
+A = Node(0, "Out")
+B = Node(1, "In")
+C = Node(1, "Out")
+
+
+def chain_scheduler(workers=4):
+    dispatched = []
+    scheduler = RenderScheduler(workers, lambda worker, task: dispatched.append((worker, task)))
+    parents = {A: set(), B: {A}, C: {B}}
+    specs = {n: NodeSpec("Test", "output", tuple(parents[n])) for n in parents}
+    scheduler.set_graph(parents, [A, B, C], specs)
+    return scheduler, dispatched
+
+
+def complete_all(scheduler, dispatched):
+    done = [(t.node, t.chunk) for w, t in dispatched]
+    tasks = list(dispatched)
+    dispatched.clear()
+    for w, t in tasks:
+        scheduler.complete(w, t.node, t.chunk, t.version)
+    return done
+
+
+def test_pipelining():
+    scheduler, dispatched = chain_scheduler()
+    scheduler.request(range(3))
+
+    # Only the source can start
+    assert complete_all(scheduler, dispatched) == [(A, 0)]
+
+    # Chunk 1 of A can run alongside chunk 0 of B
+    assert set(complete_all(scheduler, dispatched)) == {(A, 1), (B, 0)}
+    assert set(complete_all(scheduler, dispatched)) == {(A, 2), (B, 1), (C, 0)}
+
+    while len(dispatched) > 0:
+        complete_all(scheduler, dispatched)
+    scheduler.wait([C], range(3))
+    assert all(scheduler.is_done(n, c) for n in [A, B, C] for c in range(3))
+
+
+def test_worker_limit():
+    scheduler, dispatched = chain_scheduler(workers=1)
+    scheduler.request(range(3))
+    complete_all(scheduler, dispatched)
+    assert len(dispatched) == RenderScheduler.MAX_IN_FLIGHT
+
+
+def test_invalidate_chunks():
+    scheduler, dispatched = chain_scheduler()
+    scheduler.request(range(6))
+    while len(dispatched) > 0:
+        complete_all(scheduler, dispatched)
+
+    # Only the given chunks are rendered again
+    scheduler.invalidate_chunks({A: [(1, 2), (4, None)], B: [(1, 3)]})
+    assert [c for c in range(6) if scheduler.is_done(A, c)] == [0, 2, 3]
+    assert [c for c in range(6) if scheduler.is_done(B, c)] == [0, 3, 4, 5]
+    rendered = []
+    while len(dispatched) > 0:
+        rendered += complete_all(scheduler, dispatched)
+    assert sorted(rendered) == [(A, 1), (A, 4), (A, 5), (B, 1), (B, 2)]
+
+
+def test_invalidate_in_flight():
+    scheduler, dispatched = chain_scheduler()
+    scheduler.request([0])
+    complete_all(scheduler, dispatched)
+    assert dispatched[0][1].node == B
+
+    # Invalidate B while it is being rendered, the
+    # stale result should be ignored and B re-rendered
+    scheduler.invalidate([B])
+    assert len(dispatched) == 1
+    complete_all(scheduler, dispatched)
+    assert not scheduler.is_done(B, 0)
+    assert complete_all(scheduler, dispatched) == [(B, 0)]
+    assert scheduler.is_done(B, 0)
+
+
+def test_failure():
+    scheduler, dispatched = chain_scheduler()
+    scheduler.request([0])
+    worker, task = dispatched.pop()
+    scheduler.complete(worker, task.node, task.chunk, task.version, "Broken")
+    try:
+        scheduler.wait([C], [0])
+        assert False
+    except RenderFailedException:
+        pass
+
+
+def test_worker_affinity():
+    scheduler, dispatched = chain_scheduler(workers=3)
+    scheduler.request(range(4))
+    workers = dict()
+    while len(dispatched) > 0:
+        for w, t in dispatched:
+            assert workers.setdefault(t.node, w) == w
+        complete_all(scheduler, dispatched)
+    assert all(scheduler.is_done(C, c) for c in range(4))
+
+    # Removing a node tells its worker to let go of its renderer
+    parents = {A: set(), B: {A}}
+    specs = {n: NodeSpec("Test", "output", tuple(parents[n])) for n in parents}
+    scheduler.set_graph(parents, [A, B], specs)
+    assert dispatched == [(workers[C], ReleaseTask(C))]
+
+
+def test_stateless_fan_out():
+    dispatched = []
+    scheduler = RenderScheduler(4, lambda worker, task: dispatched.append((worker, task)))
+    parents = {A: set(), B: {A}}
+    specs = {A: NodeSpec("Test", "output", (), ComponentRenderer.STATELESS),
+             B: NodeSpec("Test", "output", (A,))}
+    scheduler.set_graph(parents, [A, B], specs)
+    scheduler.request(range(8))
+
+    # Every chunk of the stateless source is rendered at once, across all workers
+    assert {t.chunk for w, t in dispatched} == set(range(8))
+    assert {w for w, t in dispatched} == set(range(4))
+    complete_all(scheduler, dispatched)
+
+    # The stateful node is still rendered one chunk at a time, on one worker
+    assert [(t.node, t.chunk) for w, t in dispatched] == [(B, 0)]
+    workers = set()
+    while len(dispatched) > 0:
+        workers.update(w for w, t in dispatched)
+        assert len(dispatched) == 1
+        complete_all(scheduler, dispatched)
+    assert len(workers) == 1
+    assert all(scheduler.is_done(B, c) for c in range(8))
+
+
+def test_silence_is_skipped():
+    dispatched, skipped = [], []
+    scheduler = RenderScheduler(1, lambda worker, task: dispatched.append((worker, task)),
+                                lambda node, chunk: skipped.append((node, chunk)))
+    parents = {A: set(), B: {A}, C: {B}}
+    specs = {A: NodeSpec("Test", "output", (), ComponentRenderer.STATELESS),
+             B: NodeSpec("Test", "input", (A,), ComponentRenderer.TIME_INVARIANT),
+             C: NodeSpec("Test", "output", (B,), ComponentRenderer.TIME_INVARIANT)}
+    scheduler.set_graph(parents, [A, B, C], specs)
+    scheduler.request(range(2))
+
+    # Chunk 0 of the source is silent, so everything downstream of it is, without being rendered
+    worker, task = dispatched.pop(0)
+    scheduler.complete(worker, task.node, task.chunk, task.version, silent=True)
+    assert skipped == [(B, 0), (C, 0)]
+    assert scheduler.is_silent(C, 0)
+
+    # Chunk 1 isn't, so it is rendered all the way down
+    rendered = complete_all(scheduler, dispatched)
+    while len(dispatched) > 0:
+        rendered += complete_all(scheduler, dispatched)
+    assert rendered == [(A, 1), (B, 1), (C, 1)]
+    assert not scheduler.is_silent(C, 1)
+
+    # Silence is forgotten along with the chunks (and found again
+    # straight away, where it follows from silence upstream)
+    scheduler.invalidate([A, C])
+    assert not scheduler.is_silent(A, 0)
+    assert scheduler.is_silent(C, 0) and skipped[-1] == (C, 0)
+
+
+def test_only_changes_are_considered():
+    scheduler, dispatched = chain_scheduler()
+    scheduler.request(range(1000))
+    while len(dispatched) > 0:
+        complete_all(scheduler, dispatched)
+
+    considered = []
+    is_ready = scheduler._is_ready
+    scheduler._is_ready = lambda node, chunk: considered.append((node, chunk)) or is_ready(node, chunk)
+
+    # Setting the same graph again looks at nothing
+    parents = {A: set(), B: {A}, C: {B}}
+    scheduler.set_graph(parents, [A, B, C], {n: NodeSpec("Test", "output", tuple(parents[n])) for n in parents})
+    assert considered == [] and dispatched == []
+
+    # Invalidating a few chunks looks at (little more than) those chunks
+    scheduler.invalidate_chunks({A: [(500, 502)], B: [(500, 502)], C: [(500, 502)]})
+    assert len(considered) <= 4 and [(t.node, t.chunk) for w, t in dispatched] == [(A, 500)]
+
+    # As does asking for more chunks
+    considered.clear()
+    complete_all(scheduler, dispatched)
+    considered.clear()
+    scheduler.request(range(1000, 1010))
+    assert {node for node, chunk in considered} == {A}
+
+
+def test_chunks_in_ranges():
+    chunks = {0, 1, 5, 9, 100}
+    assert RenderScheduler.chunks_in_ranges(chunks, [(0, None)]) == chunks
+    assert RenderScheduler.chunks_in_ranges(chunks, [(1, 6), (50, None)]) == {1, 5, 100}
+    assert RenderScheduler.chunks_in_ranges(chunks, [(2, 5)]) == set()
+
+
+def test_playhead_first():
+    dispatched = []
+    scheduler = RenderScheduler(1, lambda worker, task: dispatched.append((worker, task)))
+    specs = {A: NodeSpec("Test", "output", (), ComponentRenderer.STATELESS)}
+    scheduler.set_graph({A: set()}, [A], specs)
+    scheduler.set_playhead(900)
+    scheduler.request(range(1000))
+
+    # Chunks from the playhead onwards go first
+    assert [t.chunk for w, t in dispatched] == [900, 901]
+    while len(dispatched) > 0:
+        complete_all(scheduler, dispatched)
+
+    # Chunks that are released aren't rendered again when invalidated, the rest are (playhead first)
+    scheduler.release(range(0, 899))
+    scheduler.invalidate([A])
+    rendered = []
+    while len(dispatched) > 0:
+        rendered += [c for n, c in complete_all(scheduler, dispatched)]
+    assert rendered == list(range(900, 1000)) + [899]
+
+    # Chunks requested twice are held until released twice
+    scheduler.request([899])
+    scheduler.release([899])
+    scheduler.invalidate([A])
+    assert [t.chunk for w, t in dispatched] == [900, 901]
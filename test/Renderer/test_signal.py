@@ -13,3 +13,91 @@ def test_add():
     c = a + b
     assert np.array_equal(c[0], np.ones(3))
     assert np.array_equal(c[1], np.ones(3))
+
+
+def test_insert():
+    a = Signal()
+    a[0] = np.zeros(0)
+
+    # Append chunks one after another
+    chunk = Signal()
+    for n in range(100):
+        chunk[0] = np.full(16, n, dtype=float)
+        a.insert(chunk, a.samples)
+    assert a.samples == 1600
+    assert np.array_equal(a[0], np.repeat(np.arange(100), 16))
+
+    # Inserting past the end leaves zeros in the gap
+    a.insert(chunk, 1610)
+    assert a.samples == 1626
+    assert np.array_equal(a[0][1600:1610], np.zeros(10))
+
+    # Views share memory with the signal
+    v = a.view(16, 4)
+    assert np.array_equal(v[0], np.ones(4))
+    v[0][:] = 5
+    assert np.array_equal(a[0][16:20], np.full(4, 5))
+
+
+def test_insert_copies_channels():
+    original = np.ones(4)
+    a = Signal()
+    a[0] = original
+    b = Signal()
+    b[0] = np.zeros(2)
+    a.insert(b, 1)
+    assert np.array_equal(original, np.ones(4))
+    assert np.array_equal(a[0], [1, 0, 0, 1])
+
+
+def test_mix_into():
+    a = Signal()
+    b = Signal()
+    a[0] = np.ones(4)
+    b[0] = np.ones(4)
+    b[1] = np.arange(4.0)
+
+    out = Signal(4)
+    buffer = out[0]
+    assert Signal.mix_into(out, [a, b, None]) is out
+    assert out.dtype == np.float32
+    assert np.array_equal(out[0], np.full(4, 2))
+    assert np.array_equal(out[1], np.arange(4))
+    assert np.shares_memory(Signal.mix_into(out, [a])[0], out[0])
+    assert not np.shares_memory(buffer, out[0])
+
+    # Mixing doesn't touch the inputs
+    assert np.array_equal(a[0], np.ones(4))
+
+
+def test_missing_channel():
+    a = Signal(dtype=np.float64)
+    a[1] = np.ones(3)
+    assert a.dtype == np.float64
+    assert 0 not in a
+    assert np.array_equal(a[0], np.zeros(3))
+    assert a[0] is a[0]
+
+
+def test_read_only_copy_on_write():
+    array = np.ones((2, 3), dtype=np.float32)
+    array.flags.writeable = False
+    a = Signal.wrap(array, [0])
+    a[1] = np.zeros(3)
+    assert np.array_equal(array, np.ones((2, 3)))
+    assert np.array_equal(a[0], np.ones(3))
+    assert list(a) == [0, 1]
+
+
+def test_silence():
+    # Silent signals share their zeros, and stop being silent once written to
+    a, b = Signal.silence(4), Signal.silence(4)
+    assert a.silent and a.samples == 4 and list(a) == []
+    assert a[0] is b[1]
+    a[1] = np.ones(4)
+    assert not a.silent
+    assert np.array_equal(b[1], np.zeros(4))
+
+    # Mixing silence in leaves the output alone
+    out = Signal.mix_into(Signal(4), [b])
+    assert out.silent
@@ -0,0 +1,56 @@
+from jackdaw.Data import data
+from jackdaw.Data.ProjectData import MidiClipData, MidiNoteData, PlaylistClipData
+from jackdaw.Rendering.Renderer import Renderer
+from jackdaw.Rendering.Timeline import clip_spans, changed_ranges, merge_ranges, chunk_range, beats_to_samples
+from jackdaw.Rendering.Typedefs import Node, SampleRange
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+
+
+def add_clip(clip_id, track, beat):
+    clip = PlaylistClipData()
+    clip.clip.value = clip_id
+    clip.track.value = track
+    clip.beat.value = beat
+    data.playlist_clips.add(clip)
+    return clip
+
+
+def test_changed_ranges(project):
+    midi_clip = MidiClipData()
+    for beat in [0.0, 2.0]:
+        note = MidiNoteData()
+        note.beat.value = beat
+        midi_clip.notes.add(note)
+    data.midi_clips[0] = midi_clip
+    add_clip(0, 0, 0.0)
+    moved = add_clip(0, 1, 16.0)
+    before = clip_spans()
+    assert set(before) == {0, 1}
+
+    # Moving a clip changes where it was, and where it is now
+    moved.beat.value = 32.0
+    assert changed_ranges(before, clip_spans()) == {1: [
+        SampleRange(beats_to_samples(16.0), beats_to_samples(19.0) + VoiceEngine.RELEASE),
+        SampleRange(beats_to_samples(32.0), beats_to_samples(35.0) + VoiceEngine.RELEASE)]}
+
+    # Editing a note changes everywhere the clip is used
+    before = clip_spans()
+    next(iter(midi_clip.notes)).note.value = "D3"
+    assert set(changed_ranges(before, clip_spans())) == {0, 1}
+
+
+def test_merge_ranges():
+    assert merge_ranges([SampleRange(10, 20), SampleRange(0, 5), SampleRange(15, 30)]) == \
+        [SampleRange(0, 5), SampleRange(10, 30)]
+    assert merge_ranges([SampleRange(40, 50), SampleRange(10, None)]) == [SampleRange(10, None)]
+    assert chunk_range(SampleRange(300, 513), 256) == (1, 3)
+    assert chunk_range(SampleRange(300, None), 256) == (1, None)
+
+
+def test_propagate_ranges():
+    # A -> B -> C, where B has a tail and C is stateful
+    a, b, c = Node(0, "Out"), Node(1, "Out"), Node(2, "Out")
+    children = {a: {b}, b: {c}, c: set()}
+    affected = Renderer.propagate_ranges({a: [SampleRange(100, 200)]}, [a, b, c], children,
+                                         {a: 0, b: 50, c: None})
+    assert affected == {a: [SampleRange(100, 200)], b: [SampleRange(100, 250)], c: [SampleRange(100, None)]}
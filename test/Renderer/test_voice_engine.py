@@ -0,0 +1,63 @@
+import numpy as np
+from jackdaw.Rendering.VoiceEngine import VoiceEngine
+
+RATE = 44100
+
+
+def reference(start, samples, starts, ends, stops, frequencies):
+    # Each note on its own, one at a time
+    ts = np.arange(start, start + samples)
+    result = np.zeros(samples)
+    for note_start, end, stop, frequency in zip(starts, ends, stops, frequencies):
+        envelope = np.minimum.reduce([(ts - note_start) / VoiceEngine.ATTACK,
+                                      (end + VoiceEngine.RELEASE - ts) / VoiceEngine.RELEASE,
+                                      (stop - ts) / VoiceEngine.STEAL_FADE])
+        tone = np.sin(2 * np.pi * frequency * (ts - note_start) / RATE)
+        result += 0.25 * np.clip(envelope, 0, 1) * tone
+    return result
+
+
+def test_render():
+    rng = np.random.default_rng(0)
+    starts = np.sort(rng.integers(0, 4000, 10))
+    ends = starts + rng.integers(100, 3000, 10)
+    frequencies = rng.uniform(50, 2000, 10)
+    stops = VoiceEngine.allocate(starts, ends)
+
+    engine = VoiceEngine("sine", RATE)
+    for start in range(0, 8000, 256):
+        sounding = (starts < start + 256) & (stops > start)
+        notes = (starts[sounding], ends[sounding], stops[sounding], frequencies[sounding])
+        assert np.allclose(engine.render(start, 256, notes), reference(start, 256, *notes), atol=1e-4)
+
+
+def test_voice_stealing():
+    # One more note than there are voices, all held down
+    starts = np.arange(VoiceEngine.VOICES + 1) * 10
+    ends = np.full(len(starts), 100000)
+    stops = VoiceEngine.allocate(starts, ends)
+
+    # The longest playing voice is taken for the last note
+    assert stops[0] == starts[-1]
+    assert np.all(stops[1:] == 100000 + VoiceEngine.RELEASE)
+
+    # Voices that have finished are free again
+    starts = np.array([0, 10, 100000])
+    ends = np.array([50000, 50000, 150000])
+    assert np.array_equal(VoiceEngine.allocate(starts, ends), ends + VoiceEngine.RELEASE)
+
+
+def test_steal_within_block():
+    # A full chord, and a note that steals a voice from it within the first block,
+    # so that the block holds one more note than there are voices
+    starts = np.append(np.zeros(VoiceEngine.VOICES, dtype=np.int64), 100)
+    ends = np.full(len(starts), 10000)
+    frequencies = np.linspace(100, 1000, len(starts))
+    stops = VoiceEngine.allocate(starts, ends)
+    assert stops[0] == 100
+
+    engine = VoiceEngine("sine", RATE)
+    for start in (0, 256):
+        sounding = (starts < start + 256) & (stops > start)
+        notes = (starts[sounding], ends[sounding], stops[sounding], frequencies[sounding])
+        assert np.allclose(engine.render(start, 256, notes), reference(start, 256, *notes), atol=1e-4)
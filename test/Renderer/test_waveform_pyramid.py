@@ -0,0 +1,67 @@
+import numpy as np
+from jackdaw.Rendering.ResultStore import ResultStore
+from jackdaw.Rendering.Signal import Signal
+from jackdaw.Rendering.WaveformPyramid import WaveformPyramid
+from jackdaw.Rendering.Typedefs import Node
+
+
+def brute_force(samples: np.ndarray, start: int, end: int, pixels: int, size: int):
+    # The min and max of every chunk overlapped by each pixel, straight from the samples
+    mins, maxs = np.zeros((2, pixels)), np.zeros((2, pixels))
+    for p in range(pixels):
+        lo = start + (end - start) * p // pixels
+        hi = start + (end - start) * (p + 1) // pixels
+        chunks = samples[:, lo // size * size: -(-hi // size) * size]
+        mins[:, p], maxs[:, p] = chunks.min(axis=1), chunks.max(axis=1)
+    return mins, maxs
+
+
+def test_waveform():
+    size = 16
+    store = ResultStore(size)
+    node = Node(0, "Out")
+    try:
+        chunks = 1024
+        samples = np.random.default_rng(0).uniform(-1, 1, (2, chunks * size)).astype(np.float32)
+        for c in range(chunks):
+            store.write(node, c, Signal.wrap(samples[:, c * size: (c + 1) * size], (0, 1)))
+        pyramid = WaveformPyramid(size, ResultStore.CHANNELS, lambda f, e: store.extremes(node, f, e))
+
+        # Each bin of each level covers 2^level chunks
+        for level in [1, 3, 6, 9]:
+            mins, maxs = pyramid.bins(level, 0, 2)
+            binned = samples.reshape(2, -1, size << level)[:, 0: 2]
+            assert np.array_equal(mins.T, binned.min(axis=2)) and np.array_equal(maxs.T, binned.max(axis=2))
+
+        # Pixels get the extremes of the bins under them, which (when the pixels
+        # line up with the bins) are those of the chunks under them, whatever the zoom
+        for start, end, pixels in [(0, chunks * size, 8), (64 * size, 192 * size, 16), (37, 290, 40)]:
+            waveform = pyramid.waveform(start, end, pixels)
+            mins, maxs = brute_force(samples, start, end, pixels, size)
+            assert np.array_equal(waveform.mins, mins) and np.array_equal(waveform.maxs, maxs)
+
+        # (Otherwise they might also take in a little of their neighbours)
+        waveform = pyramid.waveform(100, 9000, 50)
+        mins, maxs = brute_force(samples, 100, 9000, 50, size)
+        assert np.all(waveform.mins <= mins) and np.all(waveform.maxs >= maxs)
+
+        # Chunks that are rendered again show up (only) where they are
+        samples[:, 500 * size: 501 * size] = 2
+        store.write(node, 500, Signal.wrap(samples[:, 500 * size: 501 * size], (0, 1)))
+        pyramid.changed(500, 501)
+        waveform = pyramid.waveform(0, chunks * size, 8)
+        assert np.array_equal(waveform.maxs[:, 3], [2, 2])
+        assert np.array_equal(waveform.maxs, brute_force(samples, 0, chunks * size, 8, size)[1])
+
+        # Pixels over nothing rendered are NaN, the rest only show what has been rendered
+        store.invalidate(node, 200, 600)
+        pyramid.changed(200, 600)
+        waveform = pyramid.waveform(0, chunks * size, 8)
+        assert np.all(np.isnan(waveform.mins[:, 2: 4]))
+        assert np.array_equal(waveform.maxs[:, 5:], brute_force(samples, 0, chunks * size, 8, size)[1][:, 5:])
+        assert not np.any(np.isnan(waveform.maxs[:, 1])) and not np.any(np.isnan(waveform.maxs[:, 4]))
+
+        # Past the end of what has ever been rendered
+        assert np.all(np.isnan(pyramid.waveform(chunks * size, 4 * chunks * size, 10).mins))
+    finally:
+        store.release(node)
@@ -0,0 +1,55 @@
+import numpy as np
+import multiprocessing as mp
+from jackdaw.Rendering.Wavetable import WavetableBank, Oscillator, wavetables
+
+RATE = 44100
+
+
+def test_sine():
+    oscillator = Oscillator("sine", RATE)
+    oscillator.seek(440.0, 1000)
+    samples = np.concatenate([oscillator.render(440.0, 256), oscillator.render(440.0, 100)])
+    ts = np.arange(1000, 1356) / RATE
+    assert np.allclose(samples, 0.5 - 0.5 * np.cos(ts * np.pi * 2 * 440), atol=1e-6)
+
+
+def test_sawtooth_is_band_limited():
+    frequency = 1760.0
+    oscillator = Oscillator("sawtooth", RATE)
+    samples = oscillator.render(frequency, RATE)  # One second, so each bin is 1 Hz
+    spectrum = np.abs(np.fft.rfft(samples - samples.mean())) / RATE
+
+    harmonics = np.arange(frequency, RATE / 2, frequency).astype(int)
+    assert np.allclose(spectrum[harmonics[:5]], 1 / (2 * np.pi * np.arange(1, 6)), rtol=0.01)
+    spectrum[harmonics] = 0
+    assert spectrum.max() < 1e-4  # Nothing folded back from above Nyquist
+
+    # Whereas a naive sawtooth aliases
+    ts = np.arange(RATE) / RATE * frequency
+    naive = np.abs(np.fft.rfft(ts - np.floor(ts) - 0.5)) / RATE
+    naive[harmonics] = 0
+    assert naive.max() > 1e-3
+
+
+def test_level():
+    for frequency in [20.0, 440.0, 3000.0, 15000.0]:
+        level = WavetableBank.level(frequency, RATE)
+        assert (WavetableBank.HARMONICS >> level) * frequency <= RATE / 2
+        assert level == 0 or (WavetableBank.HARMONICS >> (level - 1)) * frequency > RATE / 2
+
+
+def attached_tables(queue):
+    bank = wavetables()
+    queue.put((bank.name, bank.tables("sawtooth")[3].copy()))
+
+
+def test_shared_between_processes():
+    bank = wavetables()
+    context = mp.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=attached_tables, args=(queue,))
+    process.start()
+    name, table = queue.get(timeout=60)
+    process.join()
+    assert name == bank.name
+    assert np.array_equal(table, bank.tables("sawtooth")[3])